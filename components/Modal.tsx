@@ -56,6 +56,7 @@ const Modal: React.FC<ModalProps> = ({
           </div>
           <button
             onClick={onClose}
+            aria-label="Fechar"
             className="flex h-12 w-12 items-center justify-center rounded-[1.2rem] bg-gray-50 dark:bg-white/5 text-gray-400 hover:bg-primary hover:text-white transition-all shadow-sm active:scale-95"
           >
             <X className="w-6 h-6" />
@@ -34,7 +34,7 @@ const ActivityFeed: React.FC<ActivityFeedProps> = ({ items }) => {
                     const Icon = config.icon;
 
                     return (
-                        <div key={item.id} className="flex gap-3 group cursor-pointer hover:bg-slate-50 dark:hover:bg-slate-800/50 p-2 rounded-lg transition-colors border border-transparent hover:border-slate-100 dark:hover:border-slate-800">
+                        <div key={item.id} data-testid="activity-item" className="flex gap-3 group cursor-pointer hover:bg-slate-50 dark:hover:bg-slate-800/50 p-2 rounded-lg transition-colors border border-transparent hover:border-slate-100 dark:hover:border-slate-800">
                             <div className={`w-8 h-8 rounded-lg ${config.bg} ${config.text} flex items-center justify-center shrink-0`}>
                                 <Icon size={16} />
                             </div>
@@ -69,7 +69,7 @@ const Topbar: React.FC = () => {
                 {/* User Info */}
                 <div className="h-8 w-[1px] bg-slate-200 dark:border-slate-700 mx-1" />
                 <div className="flex items-center gap-3">
-                    <div className="text-right hidden md:block">
+                    <div className="text-right hidden md:block" data-testid="topbar-user">
                         <p className="text-xs font-bold text-slate-900 dark:text-white leading-none mb-1 uppercase tracking-tight">João Alfredo</p>
                         <p className="text-[10px] text-primary font-black uppercase tracking-widest leading-none">Admin Alpha</p>
                     </div>
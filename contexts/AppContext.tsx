@@ -148,6 +148,13 @@ export const AppProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
     const onNewOrderRef = useRef<((order: Order) => void) | undefined>(undefined);
     const onNewMessageRef = useRef<((message: Message) => void) | undefined>(undefined);
     const { showToast } = useToast();
+    const [isHydrated, setIsHydrated] = useState(false);
+
+    // DOM marker for E2E readiness checks (testsprite_tests/harness/readiness.py).
+    // Set from an effect so it only appears after the fetched data is committed.
+    useEffect(() => {
+        if (isHydrated) document.documentElement.dataset.hydrated = 'true';
+    }, [isHydrated]);
 
     // Initial Fetch & Real-time Subscriptions
     useEffect(() => {
@@ -256,6 +263,8 @@ export const AppProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
                     state: profileData.state
                 });
             }
+
+            setIsHydrated(true);
         };
 
         fetchData();
@@ -53,7 +53,7 @@ export default function InvoicePaper({
   };
 
   return (
-    <div className={wrapperClasses} style={paddingStyle}>
+    <div className={wrapperClasses} style={paddingStyle} data-testid="invoice-paper">
       <div>
         <div className="flex justify-between items-start mb-12">
           <div className="flex items-center gap-3">
@@ -121,6 +121,7 @@ const Agenda: React.FC = () => {
                     return (
                       <div
                         key={day}
+                        data-testid="agenda-day"
                         onClick={() => handleDayClick(day)}
                         className={`p-2 rounded-xl border transition-all cursor-pointer flex flex-col gap-1 overflow-hidden
                           ${isToday ? 'border-primary bg-primary/5' : 'border-slate-100 dark:border-slate-800 hover:border-slate-200 dark:hover:border-slate-700'}`}
@@ -290,10 +290,10 @@ const Inventory: React.FC = () => {
                                             </td>
                                             <td className="px-8 py-5 text-right">
                                                 <div className="flex items-center justify-end gap-2 opacity-0 group-hover:opacity-100 transition-opacity">
-                                                    <button onClick={() => handleOpenEditModal(item)} className="w-9 h-9 rounded-xl bg-white dark:bg-white/10 shadow-sm border border-gray-100 dark:border-gray-800 flex items-center justify-center text-gray-400 hover:text-primary transition-all">
+                                                    <button onClick={() => handleOpenEditModal(item)} aria-label="Editar" className="w-9 h-9 rounded-xl bg-white dark:bg-white/10 shadow-sm border border-gray-100 dark:border-gray-800 flex items-center justify-center text-gray-400 hover:text-primary transition-all">
                                                         <Edit2 className="w-4 h-4" />
                                                     </button>
-                                                    <button onClick={() => { setItemToDelete(item.id); setIsDeleteDialogOpen(true); }} className="w-9 h-9 rounded-xl bg-white dark:bg-white/10 shadow-sm border border-gray-100 dark:border-gray-800 flex items-center justify-center text-gray-400 hover:text-red-500 transition-all">
+                                                    <button onClick={() => { setItemToDelete(item.id); setIsDeleteDialogOpen(true); }} aria-label="Excluir" className="w-9 h-9 rounded-xl bg-white dark:bg-white/10 shadow-sm border border-gray-100 dark:border-gray-800 flex items-center justify-center text-gray-400 hover:text-red-500 transition-all">
                                                         <Trash2 className="w-4 h-4" />
                                                     </button>
                                                 </div>
@@ -144,6 +144,7 @@ const MobileDashboard: React.FC = () => {
                     filteredOrders.map(order => (
                         <button
                             key={order.id}
+                            data-testid="mobile-order-card"
                             onClick={() => navigate(`/mobile/order/${order.id}`)}
                             className="w-full text-left bg-white rounded-[2rem] shadow-sm border border-gray-100 p-6 flex flex-col gap-4 active:scale-[0.98] transition-all hover:bg-gray-50/50"
                         >
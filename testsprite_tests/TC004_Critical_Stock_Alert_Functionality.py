@@ -1,36 +1,24 @@
 import asyncio
 from playwright import async_api
-from playwright.async_api import expect
-
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+
+from harness.budget import Expectations
+from harness.config import BASE_URL
+from harness.locators import locate
+from harness.pool import open_context
+from harness.readiness import Readiness
+
+# Starts from the cached admin session instead of driving the login form.
+ROLE = "admin"
+
+
+async def run_test(context=None):
+    async with open_context(context, role=ROLE) as context:
         # Open a new page in the browser context
         page = await context.new_page()
+        ready = Readiness(page)
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:3333", wait_until="commit", timeout=10000)
+        await page.goto(f"{BASE_URL}/dashboard", wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -44,117 +32,87 @@ async def run_test():
                 await frame.wait_for_load_state("domcontentloaded", timeout=3000)
             except async_api.Error:
                 pass
-        
-        # Interact with the page elements to simulate user flow
-        # -> Click on 'Entrar' link to go to login page
-        frame = context.pages[-1]
-        # Click on 'Entrar' link to navigate to login page
-        elem = frame.locator('xpath=html/body/div/div/header/div/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
 
-        # -> Input username and password, then click login button
-        frame = context.pages[-1]
-        # Input username 'martes'
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/div/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('martes')
-        
-
-        frame = context.pages[-1]
-        # Input password 'admin123'
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/div/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('admin123')
+        # Wait for AppContext hydration and idle Supabase traffic before interacting
+        await ready.settle()
         
-
-        frame = context.pages[-1]
-        # Click 'Entrar na Plataforma' button to login
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
+        # Interact with the page elements to simulate user flow
         # -> Click on 'Estoque' (Inventory) menu to access inventory management
         frame = context.pages[-1]
         # Click on 'Estoque' menu to go to inventory management
-        elem = frame.locator('xpath=html/body/div/div/aside/nav/div[2]/a[6]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "nav.inventory").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Select an inventory item and reduce its stock quantity below the critical threshold to trigger a critical stock alert
         frame = context.pages[-1]
         # Click on the first inventory item or its quantity field to edit stock quantity
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[5]/div/table/tbody/tr/td[7]/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "inventory.edit").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Reduce stock quantity below critical threshold by setting 'Carga Inicial' to a value less than 5 and save changes
         frame = context.pages[-1]
         # Set 'Carga Inicial' (stock quantity) to 3, below critical threshold 5
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[7]/div[2]/div[2]/form/div[2]/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('3')
+        elem = locate(frame, "inventory.form.quantity").nth(0)
+        await ready.fill(elem, '3')
         
 
         frame = context.pages[-1]
         # Click 'Validar Ativo' button to save changes
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[7]/div[2]/div[3]/div/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "inventory.form.submit").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Select the same inventory item and increase its stock quantity back above the critical threshold
         frame = context.pages[-1]
         # Click on the first inventory item to edit stock quantity and increase it above critical threshold
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[5]/div/table/tbody/tr/td[7]/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "inventory.edit").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Increase 'Carga Inicial' stock quantity to 6 and save changes to remove critical stock alert
         frame = context.pages[-1]
         # Increase 'Carga Inicial' stock quantity to 6, above critical threshold 5
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[7]/div[2]/div[2]/form/div[2]/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('6')
+        elem = locate(frame, "inventory.form.quantity").nth(0)
+        await ready.fill(elem, '6')
         
 
         frame = context.pages[-1]
         # Click 'Validar Ativo' button to save changes
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[7]/div[2]/div[3]/div/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "inventory.form.submit").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Reload or refresh inventory page to check current stock alert status and inventory list
         frame = context.pages[-1]
         # Click 'Estoque' menu to reload inventory page
-        elem = frame.locator('xpath=html/body/div/div/aside/nav/div[2]/a[6]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "nav.inventory").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Click on the first inventory item with zero quantity to increase stock above critical threshold and verify alert removal
         frame = context.pages[-1]
         # Click on first inventory item 'Caixa 4/2 sistema x' to edit stock quantity
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[5]/div/table/tbody/tr/td[7]/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "inventory.edit").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Click the edit button for the first inventory item to open the asset update form and increase stock quantity there
         frame = context.pages[-1]
         # Click edit button for first inventory item 'Caixa 4/2 sistema x' to open asset update form
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[5]/div/table/tbody/tr/td[7]/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "inventory.edit").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # --> Assertions to verify final state
         frame = context.pages[-1]
         try:
-            await expect(frame.locator('text=Critical Stock Alert: Inventory Below Minimum Level').first).to_be_visible(timeout=1000)
+            async with Expectations(frame) as checks:
+                await checks.visible('text=Critical Stock Alert: Inventory Below Minimum Level', timeout=1000)
         except AssertionError:
             raise AssertionError("Test failed: The inventory system did not display the critical stock alert when stock dropped below the predefined minimum level as required by the test plan.")
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
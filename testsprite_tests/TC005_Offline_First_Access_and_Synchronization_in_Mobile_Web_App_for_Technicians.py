@@ -1,36 +1,24 @@
 import asyncio
 from playwright import async_api
-from playwright.async_api import expect
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+from harness.budget import Expectations
+from harness.config import BASE_URL
+from harness.locators import locate
+from harness.pool import open_context
+from harness.readiness import Readiness
+
+# Starts from the cached admin session instead of driving the login form.
+ROLE = "admin"
+
+
+async def run_test(context=None):
+    async with open_context(context, role=ROLE) as context:
         # Open a new page in the browser context
         page = await context.new_page()
+        ready = Readiness(page)
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:3333", wait_until="commit", timeout=10000)
+        await page.goto(f"{BASE_URL}/dashboard", wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -44,60 +32,37 @@ async def run_test():
                 await frame.wait_for_load_state("domcontentloaded", timeout=3000)
             except async_api.Error:
                 pass
-        
-        # Interact with the page elements to simulate user flow
-        # -> Click on 'Entrar' to go to login page.
-        frame = context.pages[-1]
-        # Click on 'Entrar' link to navigate to login page
-        elem = frame.locator('xpath=html/body/div/div/header/div/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
 
-        # -> Input username and password, then submit login form.
-        frame = context.pages[-1]
-        # Input username 'martes'
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/div/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('martes')
+        # Wait for AppContext hydration and idle Supabase traffic before interacting
+        await ready.settle()
         
-
-        frame = context.pages[-1]
-        # Input password 'admin123'
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/div/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('admin123')
-        
-
-        frame = context.pages[-1]
-        # Click 'Entrar na Plataforma' to login
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
+        # Interact with the page elements to simulate user flow
         # -> Simulate offline mode on technician mobile web app.
         frame = context.pages[-1]
         # Click on 'Ajustes' (Settings) to find offline mode or network simulation options
-        elem = frame.locator('xpath=html/body/div/div/aside/nav/div[3]/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "nav.settings").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Navigate to 'Agenda' to preload technician schedules and service details.
         frame = context.pages[-1]
         # Click on 'Agenda' to view technician schedules and service details
-        elem = frame.locator('xpath=html/body/div/div/aside/nav/div[2]/a[4]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "nav.agenda").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Simulate offline mode on technician mobile web app after preloading schedules.
         frame = context.pages[-1]
         # Click on a scheduled event 'Visita Técnica - Condomínio Jardim' on January 19 to view service details and preload data
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[2]/div/div[2]/div/div[2]/div[23]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "agenda.day").nth(18)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Simulate offline mode on technician mobile web app.
         frame = context.pages[-1]
         # Close the 'Novo Alocamento' modal to return to agenda page
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[2]/div[2]/div[2]/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "modal.close").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         await page.mouse.wheel(0, await page.evaluate('() => window.innerHeight'))
@@ -106,35 +71,28 @@ async def run_test():
         # -> Simulate offline mode by disabling network connectivity in the browser to test offline access.
         frame = context.pages[-1]
         # Click on 'Ajustes' to check for offline mode or network simulation options
-        elem = frame.locator('xpath=html/body/div/div/aside/nav/div[3]/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "nav.settings").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Simulate offline mode by disabling network connectivity in browser developer tools.
         frame = context.pages[-1]
         # Focus on global search input to prepare for next steps
-        elem = frame.locator('xpath=html/body/div/div/div/header/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "topbar.search").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # --> Assertions to verify final state
         frame = context.pages[-1]
-        await expect(frame.locator('text=Agenda').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=Serviços').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=Dashboard').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=Chat').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=Ajustes').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=Gerencie as informações de contato, endereço e logotipo da sua empresa.').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=Altere seu login e senha de acesso ao sistema.').first).to_be_visible(timeout=30000)
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+        async with Expectations(frame) as checks:
+            await checks.visible('text=Agenda', timeout=30000)
+            await checks.visible('text=Serviços', timeout=30000)
+            await checks.visible('text=Dashboard', timeout=30000)
+            await checks.visible('text=Chat', timeout=30000)
+            await checks.visible('text=Ajustes', timeout=30000)
+            await checks.visible('text=Gerencie as informações de contato, endereço e logotipo da sua empresa.', timeout=30000)
+            await checks.visible('text=Altere seu login e senha de acesso ao sistema.', timeout=30000)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
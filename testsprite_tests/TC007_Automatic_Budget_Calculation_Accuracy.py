@@ -1,36 +1,24 @@
 import asyncio
 from playwright import async_api
-from playwright.async_api import expect
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+from harness.budget import Expectations
+from harness.config import BASE_URL
+from harness.locators import locate
+from harness.pool import open_context
+from harness.readiness import Readiness
+
+# Starts from the cached admin session instead of driving the login form.
+ROLE = "admin"
+
+
+async def run_test(context=None):
+    async with open_context(context, role=ROLE) as context:
         # Open a new page in the browser context
         page = await context.new_page()
+        ready = Readiness(page)
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:3333", wait_until="commit", timeout=10000)
+        await page.goto(f"{BASE_URL}/dashboard", wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -44,90 +32,60 @@ async def run_test():
                 await frame.wait_for_load_state("domcontentloaded", timeout=3000)
             except async_api.Error:
                 pass
-        
-        # Interact with the page elements to simulate user flow
-        # -> Click on 'Entrar' to go to login page to authenticate as user 'martes'.
-        frame = context.pages[-1]
-        # Click on 'Entrar' link to go to login page
-        elem = frame.locator('xpath=html/body/div/div/header/div/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
 
-        # -> Input username 'martes' and password 'admin123' and submit login form.
-        frame = context.pages[-1]
-        # Input username 'martes'
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/div/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('martes')
+        # Wait for AppContext hydration and idle Supabase traffic before interacting
+        await ready.settle()
         
-
-        frame = context.pages[-1]
-        # Input password 'admin123'
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/div/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('admin123')
-        
-
-        frame = context.pages[-1]
-        # Click 'Entrar na Plataforma' to login
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
+        # Interact with the page elements to simulate user flow
         # -> Click on 'Criar OS' button to start creating a new service order with specific estimated time and materials.
         frame = context.pages[-1]
         # Click on 'Criar OS' button to create a new service order
-        elem = frame.locator('xpath=html/body/div/div/div/header/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "topbar.create_order").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Select a client from the dropdown to proceed with service order creation.
         frame = context.pages[-1]
         # Open client dropdown to select a client
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div/form/div/div/div/div/select').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "create_order.client").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Select a specific client from the dropdown to proceed with service order creation.
         frame = context.pages[-1]
         # Select client 'Empresa Tech' from the dropdown
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div/form/div/div/div/div/select').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "create_order.client").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Select client 'Empresa Tech' from the dropdown to proceed with service order creation.
         frame = context.pages[-1]
         # Select client 'Empresa Tech' from the dropdown
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div/form/div/div/div/div/select').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "create_order.client").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Select client 'Empresa Tech' from the dropdown using click_element action.
         frame = context.pages[-1]
         # Click client dropdown to open options
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div/form/div/div/div/div/select').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "create_order.client").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         frame = context.pages[-1]
         # Click client 'Empresa Tech' option in dropdown
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div/form/div/div/div/div/select').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "create_order.client").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # --> Assertions to verify final state
         frame = context.pages[-1]
         try:
-            await expect(frame.locator('text=Budget Calculation Successful').first).to_be_visible(timeout=1000)
+            async with Expectations(frame) as checks:
+                await checks.visible('text=Budget Calculation Successful', timeout=1000)
         except AssertionError:
             raise AssertionError("Test case failed: Automatic budget calculation did not correctly factor estimated time, selected materials, and configurable price tables when creating service orders as per the test plan.")
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
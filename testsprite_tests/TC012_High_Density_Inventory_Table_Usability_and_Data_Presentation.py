@@ -1,36 +1,24 @@
 import asyncio
 from playwright import async_api
-from playwright.async_api import expect
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+from harness.budget import Expectations
+from harness.config import BASE_URL
+from harness.locators import locate
+from harness.pool import open_context
+from harness.readiness import Readiness
+
+# Starts from the cached admin session instead of driving the login form.
+ROLE = "admin"
+
+
+async def run_test(context=None):
+    async with open_context(context, role=ROLE) as context:
         # Open a new page in the browser context
         page = await context.new_page()
+        ready = Readiness(page)
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:3333", wait_until="commit", timeout=10000)
+        await page.goto(f"{BASE_URL}/dashboard", wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -44,39 +32,16 @@ async def run_test():
                 await frame.wait_for_load_state("domcontentloaded", timeout=3000)
             except async_api.Error:
                 pass
-        
-        # Interact with the page elements to simulate user flow
-        # -> Navigate to login or inventory management page to access inventory table.
-        frame = context.pages[-1]
-        # Click on 'Entrar' link to go to login page
-        elem = frame.locator('xpath=html/body/div/div/header/div/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
 
-        # -> Input username and password, then click login button to access inventory management.
-        frame = context.pages[-1]
-        # Input username 'martes'
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/div/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('martes')
+        # Wait for AppContext hydration and idle Supabase traffic before interacting
+        await ready.settle()
         
-
-        frame = context.pages[-1]
-        # Input password 'admin123'
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/div/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('admin123')
-        
-
-        frame = context.pages[-1]
-        # Click 'Entrar na Plataforma' button to log in
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
+        # Interact with the page elements to simulate user flow
         # -> Click on 'Estoque' menu item to open inventory management view.
         frame = context.pages[-1]
         # Click on 'Estoque' menu item to open inventory management view
-        elem = frame.locator('xpath=html/body/div/div/aside/nav/div[2]/a[6]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "nav.inventory").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Test smooth scrolling by scrolling down the inventory table to verify all rows and columns render correctly without lag.
@@ -86,29 +51,29 @@ async def run_test():
         # -> Use the search input at index 17 to search for a specific SKU or item name and verify the table updates with correct filtered results.
         frame = context.pages[-1]
         # Input search term 'DVR 8CH MHDX 1208' to filter inventory table
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[3]/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('DVR 8CH MHDX 1208')
+        elem = locate(frame, "inventory.search").nth(0)
+        await ready.fill(elem, 'DVR 8CH MHDX 1208')
         
 
         # -> Click on the 'VIDEOMONITORAMENTO' category filter button at index 19 and verify the table updates to show only items in that category.
         frame = context.pages[-1]
         # Click 'VIDEOMONITORAMENTO' category filter button to filter inventory table
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[4]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "inventory.category", name="VIDEOMONITORAMENTO").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Test another category filter button, such as 'ELETRIFICAÇÃO' at index 20, to verify the table updates accordingly.
         frame = context.pages[-1]
         # Click 'ELETRIFICAÇÃO' category filter button to filter inventory table
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[4]/button[3]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "inventory.category", name="ELETRIFICAÇÃO").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Click the 'Todos' button at index 18 to reset filters and verify the inventory table shows all items correctly.
         frame = context.pages[-1]
         # Click 'Todos' category filter button to reset filters and show all inventory items
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div[4]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "inventory.category.all").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Scroll down the inventory table again to verify smooth rendering and performance with the full dataset.
@@ -117,20 +82,13 @@ async def run_test():
 
         # --> Assertions to verify final state
         frame = context.pages[-1]
-        await expect(frame.locator('text=Estoque').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=DVR 8CH MHDX 1208').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=VIDEOMONITORAMENTO').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=ELETRIFICAÇÃO').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=Todos').first).to_be_visible(timeout=30000)
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+        async with Expectations(frame) as checks:
+            await checks.visible('text=Estoque', timeout=30000)
+            await checks.visible('text=DVR 8CH MHDX 1208', timeout=30000)
+            await checks.visible('text=VIDEOMONITORAMENTO', timeout=30000)
+            await checks.visible('text=ELETRIFICAÇÃO', timeout=30000)
+            await checks.visible('text=Todos', timeout=30000)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
@@ -1,36 +1,21 @@
 import asyncio
 from playwright import async_api
-from playwright.async_api import expect
-
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+
+from harness.budget import Expectations
+from harness.config import BASE_URL
+from harness.locators import locate
+from harness.pool import open_context
+from harness.readiness import Readiness
+
+
+async def run_test(context=None):
+    async with open_context(context) as context:
         # Open a new page in the browser context
         page = await context.new_page()
+        ready = Readiness(page)
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:3333", wait_until="commit", timeout=10000)
+        await page.goto(BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -44,114 +29,110 @@ async def run_test():
                 await frame.wait_for_load_state("domcontentloaded", timeout=3000)
             except async_api.Error:
                 pass
+
+        # Wait for AppContext hydration and idle Supabase traffic before interacting
+        await ready.settle()
         
         # Interact with the page elements to simulate user flow
         # -> Navigate to the login page to verify UI components and Tailwind CSS adherence there
         frame = context.pages[-1]
         # Click on 'Entrar' link to navigate to login page
-        elem = frame.locator('xpath=html/body/div/div/header/div/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "landing.login").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Test keyboard navigation and verify screen reader labels on login page UI components
         frame = context.pages[-1]
         # Focus on username input to check keyboard accessibility
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/div/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "login.username").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         frame = context.pages[-1]
         # Focus on password input to check keyboard accessibility
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/div/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "login.password").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         frame = context.pages[-1]
         # Focus on 'Lembrar de mim' checkbox to check keyboard accessibility
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/div[2]/label/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "login.remember").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         frame = context.pages[-1]
         # Focus on 'Entrar na Plataforma' button to check keyboard accessibility
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "login.submit").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Navigate to dashboard or main app view to continue UI component verification
         frame = context.pages[-1]
         # Click on 'Solicite uma proposta' link to navigate to another page or section for further UI checks
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/p/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "login.request_quote").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Test keyboard navigation and screen reader labels on landing page UI components, especially form inputs and buttons
         frame = context.pages[-1]
         # Focus on 'Seu Nome' input to check keyboard accessibility and screen reader label
-        elem = frame.locator('xpath=html/body/div/div/section/div[2]/div[2]/div/form/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "landing.lead.name").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         frame = context.pages[-1]
         # Focus on 'WhatsApp' input to check keyboard accessibility and screen reader label
-        elem = frame.locator('xpath=html/body/div/div/section/div[2]/div[2]/div/form/div/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "landing.lead.whatsapp").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         frame = context.pages[-1]
         # Focus on 'Continuar' button to check keyboard accessibility and screen reader label
-        elem = frame.locator('xpath=html/body/div/div/section/div[2]/div[2]/div/form/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "landing.lead.continue").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Verify keyboard navigability and screen reader labels on navigation links and header/footer components on landing page
         frame = context.pages[-1]
         # Focus on 'Início' navigation link to check keyboard accessibility and screen reader label
-        elem = frame.locator('xpath=html/body/div/div/header/div/nav/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "landing.nav.home").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         frame = context.pages[-1]
         # Focus on 'Serviços' navigation link to check keyboard accessibility and screen reader label
-        elem = frame.locator('xpath=html/body/div/div/header/div/nav/a[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "landing.nav.services").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Focus on 'Sobre Nós' and 'Entrar' navigation links to verify keyboard accessibility and screen reader labels
         frame = context.pages[-1]
         # Focus on 'Sobre Nós' navigation link to check keyboard accessibility and screen reader label
-        elem = frame.locator('xpath=html/body/div/div/header/div/nav/a[3]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "landing.nav.about").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         frame = context.pages[-1]
         # Focus on 'Entrar' navigation link to check keyboard accessibility and screen reader label
-        elem = frame.locator('xpath=html/body/div/div/header/div/div/a[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "landing.login").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Focus on footer menu links and buttons to verify keyboard accessibility and screen reader labels
         frame = context.pages[-1]
         # Focus on 'Início' footer menu link to check keyboard accessibility and screen reader label
-        elem = frame.locator('xpath=html/body/div/div/footer/div/div[3]/li/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "landing.footer.home").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # --> Assertions to verify final state
         frame = context.pages[-1]
         try:
-            await expect(frame.locator('text=Tailwind CSS Design System Audit Passed').first).to_be_visible(timeout=1000)
+            async with Expectations(frame) as checks:
+                await checks.visible('text=Tailwind CSS Design System Audit Passed', timeout=1000)
         except AssertionError:
             raise AssertionError("Test plan failed: UI components do not consistently follow Tailwind CSS design patterns or lack clear visual feedback and accessibility support as required.")
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
@@ -1,36 +1,24 @@
 import asyncio
 from playwright import async_api
-from playwright.async_api import expect
-
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+
+from harness.budget import Expectations
+from harness.config import BASE_URL
+from harness.locators import locate
+from harness.pool import open_context
+from harness.readiness import Readiness
+
+# Starts from the cached admin session instead of driving the login form.
+ROLE = "admin"
+
+
+async def run_test(context=None):
+    async with open_context(context, role=ROLE) as context:
         # Open a new page in the browser context
         page = await context.new_page()
+        ready = Readiness(page)
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:3333", wait_until="commit", timeout=10000)
+        await page.goto(f"{BASE_URL}/dashboard", wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -44,111 +32,81 @@ async def run_test():
                 await frame.wait_for_load_state("domcontentloaded", timeout=3000)
             except async_api.Error:
                 pass
-        
-        # Interact with the page elements to simulate user flow
-        # -> Click on 'Entrar' to go to login page
-        frame = context.pages[-1]
-        # Click on 'Entrar' link to navigate to login page
-        elem = frame.locator('xpath=html/body/div/div/header/div/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
 
-        # -> Input username and password and click login button
-        frame = context.pages[-1]
-        # Input username 'martes'
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/div/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('martes')
-        
-
-        frame = context.pages[-1]
-        # Input password 'admin123'
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/div/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('admin123')
+        # Wait for AppContext hydration and idle Supabase traffic before interacting
+        await ready.settle()
         
-
-        frame = context.pages[-1]
-        # Click 'Entrar na Plataforma' button to login
-        elem = frame.locator('xpath=html/body/div/div/div[2]/div/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
+        # Interact with the page elements to simulate user flow
         # -> Click on 'Criar OS' button to start creating a new service order
         frame = context.pages[-1]
         # Click on 'Criar OS' button to open service order creation form
-        elem = frame.locator('xpath=html/body/div/div/div/header/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "topbar.create_order").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Attempt to submit the form with all required fields empty to verify error messages and prevention of submission.
         frame = context.pages[-1]
         # Click 'Salvar Ordem' button to attempt saving with empty required fields
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/header/div[2]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "create_order.save").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Select a client and a technician, leave other required fields empty, then attempt to save to verify validation error messages for missing required fields.
         frame = context.pages[-1]
         # Click 'Salvar Ordem' button to attempt saving with missing required fields
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/header/div[2]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "create_order.save").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Attempt to input invalid text into 'Tipo de Serviço' and 'Descrição do Problema/Serviço' fields and verify validation messages.
         frame = context.pages[-1]
         # Input invalid text '@@@!!!' into 'Tipo de Serviço' field
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div/form/div/div[2]/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('@@@!!!')
+        elem = locate(frame, "create_order.service_type").nth(0)
+        await ready.fill(elem, '@@@!!!')
         
 
         frame = context.pages[-1]
         # Input invalid numeric text '1234567890' into 'Descrição do Problema/Serviço' field
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div/form/div/div[2]/div/div[2]/textarea').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('1234567890')
+        elem = locate(frame, "create_order.description").nth(0)
+        await ready.fill(elem, '1234567890')
         
 
         frame = context.pages[-1]
         # Click 'Salvar Ordem' button to attempt saving with invalid text inputs
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/header/div[2]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "create_order.save").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # -> Attempt to select a valid client and technician, fill text fields with valid data, leave date and time empty, then click 'Salvar Ordem' to verify if validation prevents submission due to missing date/time.
         frame = context.pages[-1]
         # Input valid text into 'Tipo de Serviço' field
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div/form/div/div[2]/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Manutenção Preventiva')
+        elem = locate(frame, "create_order.service_type").nth(0)
+        await ready.fill(elem, 'Manutenção Preventiva')
         
 
         frame = context.pages[-1]
         # Input valid text into 'Descrição do Problema/Serviço' field
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/div/form/div/div[2]/div/div[2]/textarea').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Troca de motor do portão automático')
+        elem = locate(frame, "create_order.description").nth(0)
+        await ready.fill(elem, 'Troca de motor do portão automático')
         
 
         frame = context.pages[-1]
         # Click 'Salvar Ordem' button to attempt saving with missing date and time fields
-        elem = frame.locator('xpath=html/body/div/div/div/main/div/header/div[2]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "create_order.save").nth(0)
+        await ready.click(elem, timeout=5000)
         
 
         # --> Assertions to verify final state
         frame = context.pages[-1]
-        await expect(frame.locator('text=Salvar Ordem').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=Selecione um cliente').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=Tipo de Serviço *').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=Descrição do Problema/Serviço *').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=Data de Agendamento').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=Hora de Agendamento').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=Técnico Atribuído *').first).to_be_visible(timeout=30000)
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+        async with Expectations(frame) as checks:
+            await checks.visible('text=Salvar Ordem', timeout=30000)
+            await checks.visible('text=Selecione um cliente', timeout=30000)
+            await checks.visible('text=Tipo de Serviço *', timeout=30000)
+            await checks.visible('text=Descrição do Problema/Serviço *', timeout=30000)
+            await checks.visible('text=Data de Agendamento', timeout=30000)
+            await checks.visible('text=Hora de Agendamento', timeout=30000)
+            await checks.visible('text=Técnico Atribuído *', timeout=30000)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
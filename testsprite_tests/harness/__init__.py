@@ -0,0 +1,13 @@
+"""Shared execution harness for the TestSprite E2E cases.
+
+The ``TC0*.py`` files stay runnable on their own (``python TC001_....py``),
+but when driven through :mod:`harness.runner` they share one browser and
+receive an isolated ``BrowserContext`` from :class:`harness.pool.BrowserPool`.
+
+Only :mod:`harness.config` is imported eagerly, so the pure-Python helpers
+(stats, seeding, reports) can be used without Playwright installed.
+"""
+
+from .config import BASE_URL, LAUNCH_ARGS, load_config
+
+__all__ = ["BASE_URL", "LAUNCH_ARGS", "load_config"]
@@ -0,0 +1,153 @@
+"""Log in once per role and reuse the saved Playwright ``storage_state``.
+
+The app keeps its session in ``localStorage`` (``alfredo_user`` plus the
+Supabase ``sb-*-auth-token`` entry), so a saved storage state is enough for
+a new context to start on ``/dashboard`` already authenticated.
+
+A cached state is reused until one of these happens:
+
+* the Supabase access token inside it expires,
+* it is older than ``MAX_AGE_SECONDS``,
+* the role's credentials (``tmp/config.json`` or env overrides) change.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .config import BASE_URL, DEFAULT_TIMEOUT_MS, TMP_DIR, load_config
+from .locators import locate
+
+AUTH_DIR = TMP_DIR / "auth"
+MAX_AGE_SECONDS = 12 * 3600
+# Refresh a little before the token actually expires so a test never starts
+# with a session that dies half way through.
+EXPIRY_MARGIN_SECONDS = 120
+
+_SUPABASE_TOKEN_KEY = re.compile(r"^sb-.*-auth-token$")
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+def credentials(role: str = "admin") -> Tuple[str, str]:
+    """Return ``(username, password)`` for ``role``.
+
+    ``admin`` comes from ``tmp/config.json``; any role can be overridden with
+    ``TESTSPRITE_<ROLE>_USER`` / ``TESTSPRITE_<ROLE>_PASSWORD``.
+    """
+    config = load_config()
+    prefix = f"TESTSPRITE_{role.upper()}_"
+    user = os.environ.get(prefix + "USER")
+    password = os.environ.get(prefix + "PASSWORD")
+    if role == "admin":
+        user = user or config.get("loginUser")
+        password = password or config.get("loginPassword")
+    if not user or not password:
+        raise KeyError(f"no credentials configured for role {role!r} (set {prefix}USER/{prefix}PASSWORD)")
+    return user, password
+
+
+def fingerprint(role: str) -> str:
+    user, password = credentials(role)
+    raw = f"{BASE_URL}\0{role}\0{user}\0{password}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def state_path(role: str) -> Path:
+    return AUTH_DIR / f"{role}.json"
+
+
+def _meta_path(role: str) -> Path:
+    return AUTH_DIR / f"{role}.meta.json"
+
+
+def token_expiry(state: dict) -> Optional[float]:
+    """Earliest ``expires_at`` of any Supabase session stored in ``state``."""
+    expiries = []
+    for origin in state.get("origins", []):
+        for item in origin.get("localStorage", []):
+            if not _SUPABASE_TOKEN_KEY.match(item.get("name", "")):
+                continue
+            try:
+                session = json.loads(item.get("value") or "{}")
+            except ValueError:
+                continue
+            expires_at = session.get("expires_at") or (session.get("currentSession") or {}).get("expires_at")
+            if expires_at:
+                expiries.append(float(expires_at))
+    return min(expiries) if expiries else None
+
+
+def cached_state(role: str, now: Optional[float] = None) -> Optional[Path]:
+    """Return the cached state file for ``role`` if it is still usable."""
+    now = time.time() if now is None else now
+    path, meta_path = state_path(role), _meta_path(role)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    if meta.get("fingerprint") != fingerprint(role):
+        return None
+    if now - meta.get("created_at", 0) > MAX_AGE_SECONDS:
+        return None
+    expiry = token_expiry(state)
+    if expiry is not None and expiry - EXPIRY_MARGIN_SECONDS <= now:
+        return None
+    return path
+
+
+def invalidate(role: str) -> None:
+    for path in (state_path(role), _meta_path(role)):
+        path.unlink(missing_ok=True)
+
+
+async def login(page, role: str = "admin") -> None:
+    """Drive the ``/login`` form for ``role`` and wait for the redirect."""
+    user, password = credentials(role)
+    await page.goto(f"{BASE_URL}/login", wait_until="domcontentloaded")
+    # The form checks credentials against the technicians/clients already
+    # fetched by AppContext, so let the initial hydration finish first.
+    await page.wait_for_load_state("networkidle")
+    await locate(page, "login.username").fill(user)
+    await locate(page, "login.password").fill(password)
+    await locate(page, "login.submit").click()
+    await page.wait_for_url(re.compile(r"/(client/)?dashboard"), timeout=DEFAULT_TIMEOUT_MS * 3)
+
+
+async def ensure_storage_state(browser, role: str = "admin") -> Path:
+    """Return a valid storage-state file for ``role``, logging in if needed.
+
+    Concurrent callers for the same role share a single login.
+    """
+    lock = _locks.setdefault(role, asyncio.Lock())
+    async with lock:
+        path = cached_state(role)
+        if path is not None:
+            return path
+        context = await browser.new_context()
+        context.set_default_timeout(DEFAULT_TIMEOUT_MS)
+        try:
+            await login(await context.new_page(), role)
+            state = await context.storage_state()
+        finally:
+            await context.close()
+        # Atomic writes: worker processes (runner --isolation process, shard)
+        # may log in for the same role at once.
+        AUTH_DIR.mkdir(parents=True, exist_ok=True)
+        path = state_path(role)
+        _write_atomic(path, json.dumps(state))
+        _write_atomic(_meta_path(role), json.dumps({"role": role, "fingerprint": fingerprint(role), "created_at": time.time()}))
+        return path
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
@@ -0,0 +1,158 @@
+"""Per-case time budgets and fail-fast assertion batching.
+
+Every case gets one :class:`Budget` (``TESTSPRITE_CASE_BUDGET_S``, or a
+module-level ``BUDGET_S`` in the TC file). Waits run through
+:class:`~harness.readiness.Readiness` and :class:`Expectations` have their
+timeouts capped by what is left of it, so a broken page can no longer spend
+30 s on each of dozens of assertions.
+
+:class:`Expectations` treats the first assertion as a sentinel and gives it
+the (capped) timeout. As soon as one assertion misses, the page is assumed
+wrong: the remaining ones are not polled but checked together against a
+single DOM snapshot when the block exits, and one ``AssertionError`` lists
+every expectation that missed::
+
+    async with Expectations(frame) as checks:
+        await checks.visible('text=OS ATIVAS', timeout=30000)
+        await checks.visible('text=FUNIL OPERACIONAL', timeout=30000)
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .config import DEFAULT_TIMEOUT_MS
+from .results import record_assertion
+
+DEFAULT_CASE_BUDGET_S = float(os.environ.get("TESTSPRITE_CASE_BUDGET_S", "120"))
+# Never hand Playwright less than this, so a nearly spent budget still
+# produces a real assertion failure instead of a zero-timeout error.
+MIN_TIMEOUT_MS = 250
+
+
+class BudgetExceeded(AssertionError):
+    """The case ran out of its time budget."""
+
+
+class Budget:
+    """A wall-clock deadline shared by every wait in one case."""
+
+    def __init__(self, total_s: float = DEFAULT_CASE_BUDGET_S):
+        self.total_s = total_s
+        self.started = time.monotonic()
+        self.deadline = self.started + total_s
+
+    def remaining_ms(self) -> float:
+        return max(0.0, (self.deadline - time.monotonic()) * 1000)
+
+    def elapsed_s(self) -> float:
+        return time.monotonic() - self.started
+
+    def cap(self, timeout_ms: Optional[float] = None) -> float:
+        """``timeout_ms`` limited to the remaining budget."""
+        remaining = self.remaining_ms()
+        if remaining <= 0:
+            raise BudgetExceeded(f"time budget of {self.total_s:g}s exhausted")
+        requested = DEFAULT_TIMEOUT_MS if timeout_ms is None else timeout_ms
+        return max(MIN_TIMEOUT_MS, min(requested, remaining))
+
+
+_current: contextvars.ContextVar[Optional[Budget]] = contextvars.ContextVar("testsprite_budget", default=None)
+
+
+def activate(budget: Budget) -> contextvars.Token:
+    """Make ``budget`` the current one for this task (and tasks it spawns)."""
+    return _current.set(budget)
+
+
+def active() -> Optional[Budget]:
+    """The budget activated for this task, if any."""
+    return _current.get()
+
+
+def current() -> Budget:
+    """The active budget; a default one is started on first use."""
+    budget = _current.get()
+    if budget is None:
+        budget = Budget()
+        _current.set(budget)
+    return budget
+
+
+# innerText only contains rendered text, so it doubles as a visibility check.
+_SNAPSHOT_JS = """
+(texts) => {
+  const norm = (s) => s.replace(/\\s+/g, ' ').trim().toLowerCase();
+  const body = norm(document.body ? document.body.innerText : '');
+  return texts.map((t) => body.includes(norm(t)));
+}
+"""
+
+
+@dataclass
+class Miss:
+    selector: str
+    reason: str
+
+
+class Expectations:
+    """Visibility assertions that share the case budget and fail fast."""
+
+    def __init__(self, page, budget: Optional[Budget] = None):
+        self.page = page
+        self.budget = budget or current()
+        self.checked = 0
+        self.misses: List[Miss] = []
+        self._deferred: List[str] = []
+
+    @property
+    def batching(self) -> bool:
+        return bool(self.misses)
+
+    async def visible(self, selector: str, timeout: float = DEFAULT_TIMEOUT_MS) -> None:
+        self.checked += 1
+        if self.batching:
+            self._deferred.append(selector)
+            return
+        from playwright.async_api import expect
+
+        start = time.monotonic()
+        try:
+            await expect(self.page.locator(selector).first).to_be_visible(timeout=self.budget.cap(timeout))
+        except AssertionError as exc:
+            reason = "time budget exhausted" if isinstance(exc, BudgetExceeded) else "not visible"
+            self.misses.append(Miss(selector, reason))
+        record_assertion(selector, time.monotonic() - start)
+
+    async def _check_deferred(self) -> None:
+        texts = [s for s in self._deferred if s.startswith("text=")]
+        others = [s for s in self._deferred if not s.startswith("text=")]
+        self._deferred = []
+        if texts:
+            found = await self.page.evaluate(_SNAPSHOT_JS, [s[len("text="):].strip("'\"") for s in texts])
+            self.misses.extend(Miss(s, "not in DOM snapshot") for s, ok in zip(texts, found) if not ok)
+        for selector in others:
+            # is_visible() does not wait, so this is still one round-trip each.
+            if not await self.page.locator(selector).first.is_visible():
+                self.misses.append(Miss(selector, "not visible in snapshot"))
+
+    async def verify(self) -> None:
+        """Raise one ``AssertionError`` listing every missed expectation."""
+        await self._check_deferred()
+        if self.misses:
+            lines = [f"  - {m.selector} ({m.reason})" for m in self.misses]
+            raise AssertionError(
+                f"{len(self.misses)} of {self.checked} expectations missed "
+                f"after {self.budget.elapsed_s():.1f}s:\n" + "\n".join(lines)
+            )
+
+    async def __aenter__(self) -> "Expectations":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.verify()
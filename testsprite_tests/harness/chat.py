@@ -0,0 +1,478 @@
+"""Chat volume benchmark for the admin, technician and client chat pages.
+
+``AppContext.fetchData`` loads the whole ``messages`` table at startup and
+keeps it in one array. ``pages/Communication.tsx``, ``pages/MobileChat.tsx``
+and ``pages/client/ClientChat.tsx`` filter that array by conversation (and
+sort and group it) on every render. This benchmark seeds 10k to 500k
+messages over a set of conversations. Shares follow a Zipf curve, so one
+conversation is much longer than the rest. Then each page is measured:
+
+* **hydrate** - ``goto`` until AppContext is hydrated and Supabase is idle,
+  the ``messages`` fetch (time, bytes, rows the page received) and the Long
+  Tasks on the main thread meanwhile,
+* **switch** - click on a conversation until its first message is painted.
+  There is no switch on the technician page: MobileChat only has the
+  technician's own conversation with the admin,
+* **send** - form submit until the message is painted. The page only adds
+  a message when the realtime ``INSERT`` comes back (``msg_all`` channel),
+  so this covers the REST insert (also shown on its own) plus the realtime
+  hop,
+* **memory** - JS heap after hydration (after a GC), and the peak.
+
+Messages are inserted over PostgREST with ``CHATBENCH-`` content, and sizes
+are inserted one on top of the other. The benchmark's messages and the
+conversations it created are deleted at the end. The technician page needs
+``TESTSPRITE_TECHNICIAN_USER``/``_PASSWORD``, and its conversation is the
+long one. The client page logs in as ``client`` when it has credentials.
+:data:`DEFAULT_BUDGETS` (overridable with ``TESTSPRITE_CHAT_BUDGETS``) fail
+the run::
+
+    python -m harness.chat --messages 10000,100000,500000
+    python -m harness.chat --pages admin,client --messages 50000 --sends 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+
+from .config import BASE_URL, supabase_settings
+from .locators import locate
+from .profiler import HeapSampler
+from .readiness import Readiness
+from .stats import format_summary, summarize
+
+DEFAULT_MESSAGES = (10_000, 100_000, 500_000)
+DEFAULT_CONVERSATIONS = 10
+DEFAULT_SWITCHES = 10
+DEFAULT_SENDS = 10
+MARKER = "CHATBENCH"
+SEND_MARKER = "CHATSEND"
+# The sender id Communication.tsx uses for the admin.
+ADMIN_ID = "00000000-0000-0000-0000-000000000000"
+HISTORY_DAYS = 60
+PHRASES = ["Bom dia, o técnico já está a caminho?", "Pode confirmar o horário da visita?", "Portão travando de novo",
+           "Enviei as fotos do quadro", "Chego em 20 minutos", "Cliente pediu orçamento da cerca elétrica",
+           "Serviço concluído, segue relatório", "Obrigado!", "Vou precisar de mais um controle remoto",
+           "A câmera 3 está sem imagem desde ontem"]
+
+# page -> (route, storage-state role, message input locator)
+PAGES: Dict[str, tuple] = {
+    "admin": ("/communication", "admin", "communication.input"),
+    "technician": ("/mobile/chat", None, "mobile.chat.input"),
+    "client": ("/client/chat", "client", "client.chat.input"),
+}
+
+# Applied to every page and message count.
+DEFAULT_BUDGETS: Dict[str, float] = {
+    "hydrate_ms": 8000,
+    "switch_p95_ms": 500,
+    "send_p95_ms": 1500,
+}
+
+# Paint time of the first CHATBENCH message of each conversation and of
+# each CHATSEND message: first task after the next frame, like
+# harness.inventory. Only the first match of each added node is read, so
+# the observer stays cheap when a whole conversation mounts at once.
+_CHAT_INIT_SCRIPT = """
+window.__chat = { seen: {}, sent: {}, clicks: [], submits: [], longtasks: [] };
+(() => {
+  const paint = (fn) => requestAnimationFrame(() => setTimeout(fn, 0));
+  const note = (map, key) => {
+    if (key in map) return;
+    map[key] = -1;
+    paint(() => { map[key] = performance.now(); });
+  };
+  document.addEventListener('click', (e) => window.__chat.clicks.push(e.timeStamp), true);
+  document.addEventListener('submit', (e) => window.__chat.submits.push(e.timeStamp), true);
+  new MutationObserver((mutations) => {
+    for (const m of mutations) {
+      for (const n of m.addedNodes) {
+        const text = n.textContent || '';
+        const bench = text.match(/CHATBENCH-(\\d+)-/);
+        if (bench) note(window.__chat.seen, bench[1]);
+        const sent = text.match(/CHATSEND-(\\d+)/);
+        if (sent) note(window.__chat.sent, sent[1]);
+      }
+    }
+  }).observe(document, { childList: true, subtree: true });
+  try {
+    new PerformanceObserver((list) => {
+      for (const e of list.getEntries()) window.__chat.longtasks.push(e.duration);
+    }).observe({ type: 'longtask', buffered: true });
+  } catch (e) {}
+})();
+"""
+
+
+@dataclass
+class PageResult:
+    page: str
+    messages: int
+    loaded_rows: Optional[int] = None
+    hydrate_ms: Optional[float] = None
+    fetch_ms: Optional[float] = None
+    payload_bytes: Optional[int] = None
+    hydrate_long_task_ms: float = 0.0
+    heap_after_hydrate: int = 0
+    heap_peak: int = 0
+    switch: Dict[str, float] = field(default_factory=dict)
+    insert: Dict[str, float] = field(default_factory=dict)
+    send: Dict[str, float] = field(default_factory=dict)
+    missed_sends: int = 0
+    error: Optional[str] = None
+    violations: List[str] = field(default_factory=list)
+
+    def format(self) -> str:
+        head = f"{self.page:<10} {self.messages:,} messages"
+        if self.error:
+            return f"{head}: ERROR {self.error}"
+        mib = 1024 * 1024
+        loaded = self.loaded_rows if self.loaded_rows is not None else "?"
+        lines = [
+            f"{head} ({loaded} loaded by the page, {(self.payload_bytes or 0) / mib:.1f} MiB)",
+            f"  hydrate {self.hydrate_ms or 0:7.0f}ms (messages fetch {self.fetch_ms or 0:.0f}ms, "
+            f"long tasks {self.hydrate_long_task_ms:.0f}ms)",
+            f"  heap    {self.heap_after_hydrate / mib:7.1f} MiB after hydrate, peak {self.heap_peak / mib:.1f} MiB",
+            "  " + format_summary("switch -> paint", self.switch),
+            "  " + format_summary("send insert", self.insert),
+            "  " + format_summary("send -> paint", self.send) + (f" ({self.missed_sends} never shown)" if self.missed_sends else ""),
+        ]
+        lines += [f"  BUDGET: {v}" for v in self.violations]
+        return "\n".join(lines)
+
+
+def load_budgets() -> Dict[str, float]:
+    budgets = dict(DEFAULT_BUDGETS)
+    path = os.environ.get("TESTSPRITE_CHAT_BUDGETS")
+    if path:
+        with open(path, encoding="utf-8") as fh:
+            budgets.update(json.load(fh))
+    return budgets
+
+
+def check_budgets(result: PageResult, budgets: Dict[str, float]) -> List[str]:
+    if result.error:
+        return []
+    violations = []
+    if result.hydrate_ms is None or result.hydrate_ms > budgets["hydrate_ms"]:
+        observed = "n/a" if result.hydrate_ms is None else f"{result.hydrate_ms:.0f}ms"
+        violations.append(f"hydrate {observed} > {budgets['hydrate_ms']:g}ms")
+    checks = [("send", result.send, budgets["send_p95_ms"])]
+    if result.page != "technician":
+        checks.append(("switch", result.switch, budgets["switch_p95_ms"]))
+    for name, summary, limit in checks:
+        p95 = summary.get("p95")
+        if p95 is None or p95 > limit:
+            violations.append(f"{name} p95 {'n/a' if p95 is None else f'{p95:.0f}ms'} > {limit:g}ms")
+    if result.missed_sends:
+        violations.append(f"{result.missed_sends} sent messages never rendered")
+    return violations
+
+
+def shares(total: int, parts: int) -> List[int]:
+    """Zipf-like split of ``total`` over ``parts``, at least one each."""
+    total = max(total, parts)
+    weights = [1 / (i + 1) for i in range(parts)]
+    scale = max(total - parts, 0) / sum(weights)
+    counts = [1 + int(w * scale) for w in weights]
+    counts[0] += total - sum(counts)
+    return counts
+
+
+@dataclass
+class Conversation:
+    id: str
+    kind: str
+    # Technician or client on the other side.
+    party_id: str
+    party_name: str
+    created: bool = False
+    messages: int = 0
+
+
+class ChatSeeder:
+    """Sets up conversations and inserts or removes ``CHATBENCH-`` messages over PostgREST."""
+
+    def __init__(self, request, batch_size: int = 2000, seed: int = 42):
+        url, key = supabase_settings()
+        self.request = request
+        self.rest = f"{url}/rest/v1"
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}", "Content-Type": "application/json",
+                        "Prefer": "return=minimal"}
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.now = datetime.now(timezone.utc)
+        self.conversations: List[Conversation] = []
+
+    async def _get(self, path: str) -> list:
+        response = await self.request.get(f"{self.rest}/{path}", headers=self.headers)
+        if not response.ok:
+            raise RuntimeError(f"GET {path} -> {response.status} {await response.text()}")
+        return await response.json()
+
+    async def _create(self, kind: str, party_id: str) -> str:
+        headers = dict(self.headers, Prefer="return=representation")
+        body = {"type": kind, "participants": [party_id], "last_message_at": self.now.isoformat()}
+        response = await self.request.post(f"{self.rest}/conversations", headers=headers, data=json.dumps(body))
+        if not response.ok:
+            raise RuntimeError(f"insert conversation -> {response.status} {await response.text()}")
+        return (await response.json())[0]["id"]
+
+    async def setup(self, count: int, technician: Optional[str] = None) -> None:
+        """``count`` technician and ``count`` client conversations; ``technician``'s comes first."""
+        technicians = await self._get("technicians?select=id,name,username&order=name.asc")
+        names = [t["name"] for t in technicians]
+        # The admin page is driven by contact name, so skip ambiguous ones.
+        picked = [t for t in technicians if t.get("username") == technician]
+        picked += [t for t in technicians if names.count(t["name"]) == 1 and t not in picked]
+        existing = await self._get("conversations?type=eq.administrador-tecnico&select=id,participants")
+        for tech in picked[:count]:
+            conv_id = next((c["id"] for c in existing if tech["id"] in (c.get("participants") or [])), None)
+            created = conv_id is None
+            if created:
+                conv_id = await self._create("administrador-tecnico", tech["id"])
+            self.conversations.append(Conversation(conv_id, "technician", tech["id"], tech["name"], created))
+        for client in await self._get(f"clients?select=id,name&limit={count}"):
+            conv_id = await self._create("administrador-cliente", client["id"])
+            self.conversations.append(Conversation(conv_id, "client", client["id"], client["name"], True))
+        if not self.conversations:
+            raise RuntimeError("no technicians or clients to hold conversations; seed the database first")
+
+    def _message(self, index: int, conv: Conversation, seq: int) -> dict:
+        mine = seq % 2 == 0
+        return {
+            "conversation_id": conv.id,
+            "sender_id": ADMIN_ID if mine else conv.party_id,
+            "sender_type": "admin" if mine else conv.kind,
+            "content": f"{MARKER}-{index}-{seq} {self.rng.choice(PHRASES)}",
+            "read": True,
+            "created_at": (self.now - timedelta(seconds=self.rng.randrange(HISTORY_DAYS * 86400))).isoformat(),
+        }
+
+    async def grow(self, total: int) -> None:
+        """Insert messages until the conversations hold ``total`` between them."""
+        batch = []
+        for index, (conv, target) in enumerate(zip(self.conversations, shares(total, len(self.conversations)))):
+            for seq in range(conv.messages, target):
+                batch.append(self._message(index, conv, seq))
+                if len(batch) == self.batch_size:
+                    await self._insert(batch)
+                    batch = []
+            conv.messages = max(conv.messages, target)
+        if batch:
+            await self._insert(batch)
+
+    async def _insert(self, batch: List[dict]) -> None:
+        response = await self.request.post(f"{self.rest}/messages", headers=self.headers, data=json.dumps(batch))
+        if not response.ok:
+            raise RuntimeError(f"insert messages -> {response.status} {await response.text()}")
+
+    async def clear(self) -> None:
+        for prefix in (MARKER, SEND_MARKER):
+            response = await self.request.delete(f"{self.rest}/messages?content=like.{prefix}-*", headers=self.headers)
+            if not response.ok:
+                raise RuntimeError(f"delete messages -> {response.status} {await response.text()}")
+        created = [c.id for c in self.conversations if c.created]
+        if created:
+            await self.request.delete(f"{self.rest}/conversations?id=in.({','.join(created)})", headers=self.headers)
+
+
+async def _chat_state(page) -> dict:
+    return await page.evaluate("() => window.__chat")
+
+
+async def _reset(page, *keys: str) -> None:
+    await page.evaluate("(keys) => { for (const k of keys) window.__chat[k] = Array.isArray(window.__chat[k]) ? [] : {}; }", list(keys))
+
+
+async def _switch(page, target, timeout_ms: float) -> Optional[float]:
+    """Click ``target`` and return click -> first benchmark message painted."""
+    await _reset(page, "seen", "clicks")
+    await target.click()
+    try:
+        await page.wait_for_function("() => Object.values(window.__chat.seen).some((t) => t > 0)", timeout=timeout_ms)
+    except Exception:  # noqa: BLE001 - a conversation without benchmark messages
+        return None
+    state = await _chat_state(page)
+    painted = min(t for t in state["seen"].values() if t > 0)
+    return painted - state["clicks"][0] if state["clicks"] else None
+
+
+async def _targets(page, name: str, seeder: ChatSeeder, timeout_ms: float) -> list:
+    """Conversation entries to switch between on ``name``'s page."""
+    if name == "admin":
+        return [locate(page, "communication.contact", name=c.party_name).first
+                for c in seeder.conversations if c.kind == "technician"]
+    # Every client conversation is called "Administrador Alfredo"; keep the
+    # ones that show benchmark messages.
+    buttons = locate(page, "client.chat.conversation")
+    wanted = sum(1 for c in seeder.conversations if c.kind == "client")
+    targets = []
+    for i in range(await buttons.count()):
+        if len(targets) == wanted:
+            break
+        if await _switch(page, buttons.nth(i), timeout_ms) is not None:
+            targets.append(buttons.nth(i))
+    return targets
+
+
+async def measure(pool, name: str, messages: int, seeder: ChatSeeder, switches: int, sends: int,
+                  counter: List[int]) -> PageResult:
+    from .auth import credentials
+    from .mobile import technician_login
+
+    route, role, input_key = PAGES[name]
+    result = PageResult(name, messages)
+    if role is not None and role != "admin":
+        try:
+            credentials(role)
+        except KeyError:
+            role = None
+    async with pool.context(role=role) as context:
+        page = await context.new_page()
+        await page.add_init_script(_CHAT_INIT_SCRIPT)
+        ready = Readiness(page, timeout_ms=180000)
+        if name == "technician":
+            await technician_login(page, ready)
+        session = await context.new_cdp_session(page)
+        await session.send("HeapProfiler.enable")
+        heap = HeapSampler(session)
+        heap.phase = "hydrate"
+        heap.start()
+        try:
+            await _reset(page, "longtasks")
+            start = time.perf_counter()
+            async with page.expect_response(lambda r: "/rest/v1/messages" in r.url and r.request.method == "GET",
+                                            timeout=180000) as info:
+                await page.goto(BASE_URL + route, wait_until="commit", timeout=60000)
+            response = await info.value
+            body = await response.body()
+            await ready.settle(180000)
+            result.hydrate_ms = (time.perf_counter() - start) * 1000
+            result.fetch_ms = response.request.timing["responseEnd"]
+            result.payload_bytes = len(body)
+            rows = json.loads(body)
+            result.loaded_rows = len(rows) if isinstance(rows, list) else None
+            del body, rows
+            result.hydrate_long_task_ms = sum((await _chat_state(page))["longtasks"])
+            await session.send("HeapProfiler.collectGarbage")
+            result.heap_after_hydrate = (await heap.sample()).used
+
+            heap.phase = "switch"
+            if name != "technician":
+                targets = await _targets(page, name, seeder, 10000)
+                latencies = []
+                for i in range(switches if len(targets) > 1 else 0):
+                    latency = await _switch(page, targets[i % len(targets)], 30000)
+                    if latency is not None:
+                        latencies.append(latency)
+                result.switch = summarize(latencies)
+                if targets:
+                    # Send into the long conversation.
+                    await _switch(page, targets[0], 30000)
+            else:
+                await page.wait_for_function("() => Object.values(window.__chat.seen).some((t) => t > 0)", timeout=60000)
+
+            heap.phase = "send"
+            box = locate(page, input_key)
+            inserts, painted = [], []
+            for _ in range(sends):
+                counter[0] += 1
+                key = str(counter[0])
+                await _reset(page, "submits")
+                await box.fill(f"{SEND_MARKER}-{key} mensagem de teste")
+                async with page.expect_response(lambda r: "/rest/v1/messages" in r.url and r.request.method == "POST",
+                                                timeout=30000) as posted:
+                    await box.press("Enter")
+                insert = await posted.value
+                await insert.finished()
+                inserts.append(insert.request.timing["responseEnd"])
+                try:
+                    await page.wait_for_function("(k) => window.__chat.sent[k] > 0", arg=key, timeout=30000)
+                except Exception:  # noqa: BLE001 - never rendered is a result, not a crash
+                    result.missed_sends += 1
+                    continue
+                state = await _chat_state(page)
+                painted.append(state["sent"][key] - state["submits"][0])
+            result.insert = summarize(inserts)
+            result.send = summarize(painted)
+        finally:
+            await heap.stop()
+        result.heap_peak = max(s.used for s in heap.samples)
+    return result
+
+
+async def run(sizes: Sequence[int], pages: Sequence[str], budgets: Dict[str, float], conversations: int = DEFAULT_CONVERSATIONS,
+              switches: int = DEFAULT_SWITCHES, sends: int = DEFAULT_SENDS, headless: bool = True) -> List[PageResult]:
+    from .auth import credentials
+    from .pool import BrowserPool
+
+    try:
+        technician = credentials("technician")[0]
+    except KeyError:
+        technician = None
+    results = []
+    counter = [0]
+    async with BrowserPool(workers=2, headless=headless) as pool:
+        async with pool.context() as writer:
+            seeder = ChatSeeder(writer.request)
+            await seeder.clear()
+            try:
+                await seeder.setup(conversations, technician)
+                for size in sorted(sizes):
+                    await seeder.grow(size)
+                    for name in pages:
+                        if name == "technician" and technician is None:
+                            result = PageResult(name, size, error="no technician credentials (TESTSPRITE_TECHNICIAN_USER)")
+                        else:
+                            try:
+                                result = await measure(pool, name, size, seeder, switches, sends, counter)
+                            except Exception as exc:  # noqa: BLE001 - report the page and keep going
+                                result = PageResult(name, size, error=str(exc).splitlines()[0])
+                        result.violations = check_budgets(result, budgets)
+                        print(result.format(), flush=True)
+                        results.append(result)
+            finally:
+                await seeder.clear()
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the chat pages against 10k-500k messages.")
+    parser.add_argument("--messages", default=",".join(str(n) for n in DEFAULT_MESSAGES), help="comma-separated message totals (default: 10000,100000,500000)")
+    parser.add_argument("--pages", default=",".join(PAGES), help="pages to measure (default: admin,technician,client)")
+    parser.add_argument("--conversations", type=int, default=DEFAULT_CONVERSATIONS, help="technician and client conversations each (default: 10)")
+    parser.add_argument("--switches", type=int, default=DEFAULT_SWITCHES, help="conversation switches per page (default: 10)")
+    parser.add_argument("--sends", type=int, default=DEFAULT_SENDS, help="messages sent per page (default: 10)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    sizes = [int(n) for n in args.messages.split(",") if n]
+    pages = [p for p in args.pages.split(",") if p]
+    unknown = [p for p in pages if p not in PAGES]
+    if unknown:
+        print(f"unknown pages: {', '.join(unknown)} (expected {', '.join(PAGES)})", file=sys.stderr)
+        return 2
+    results = asyncio.run(run(sizes, pages, load_budgets(), args.conversations, args.switches, args.sends,
+                              headless=not args.headed))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump([asdict(r) for r in results], fh, indent=2)
+    return 1 if any(r.violations or r.error for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
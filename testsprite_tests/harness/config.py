@@ -0,0 +1,90 @@
+"""Paths and settings shared by the harness modules."""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+TESTS_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = TESTS_DIR.parent
+TMP_DIR = TESTS_DIR / "tmp"
+CONFIG_PATH = TMP_DIR / "config.json"
+
+# Same flags TestSprite generates for every case.
+LAUNCH_ARGS = [
+    "--window-size=1280,720",
+    "--disable-dev-shm-usage",
+    "--ipc=host",
+    "--single-process",
+]
+
+# Chromium's normal process model: renderer, GPU and network work run in
+# their own processes instead of sharing the browser's threads.
+MULTI_PROCESS_ARGS = [a for a in LAUNCH_ARGS if a not in ("--ipc=host", "--single-process")]
+
+BROWSER_MODES = {"single": LAUNCH_ARGS, "multi": MULTI_PROCESS_ARGS}
+DEFAULT_BROWSER_MODE = os.environ.get("TESTSPRITE_BROWSER_MODE", "single")
+
+DEFAULT_TIMEOUT_MS = 5000
+
+
+def launch_args(mode: str = DEFAULT_BROWSER_MODE) -> list:
+    """Chromium flags for a :data:`BROWSER_MODES` key."""
+    try:
+        return list(BROWSER_MODES[mode])
+    except KeyError:
+        raise ValueError(f"unknown browser mode {mode!r} (expected one of {', '.join(BROWSER_MODES)})") from None
+
+
+def load_config(path: Path = CONFIG_PATH) -> dict:
+    """Return the TestSprite run config, or an empty dict if it is missing."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+BASE_URL = os.environ.get(
+    "TESTSPRITE_BASE_URL",
+    load_config().get("localEndpoint", "http://localhost:3333"),
+).rstrip("/")
+
+
+# Where harness.standin listens by default; it accepts any API key.
+STANDIN_URL = "http://localhost:54321"
+
+
+def _dotenv(path: Path = REPO_ROOT / ".env") -> dict:
+    values = {}
+    try:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                key, sep, value = line.strip().partition("=")
+                if sep and not key.startswith("#"):
+                    values[key.strip()] = value.strip().strip("'\"")
+    except FileNotFoundError:
+        pass
+    return values
+
+
+def supabase_settings() -> tuple:
+    """Return ``(url, anon_key)`` of the Supabase project the app talks to.
+
+    ``TESTSPRITE_SUPABASE_URL``/``TESTSPRITE_SUPABASE_KEY`` win, then the
+    app's own ``VITE_SUPABASE_*`` variables (environment, then ``.env``).
+    Without any of them the local stand-in is assumed.
+    """
+    dotenv = _dotenv()
+
+    def lookup(*names):
+        for name in names:
+            value = os.environ.get(name) or dotenv.get(name)
+            if value:
+                return value
+        return None
+
+    url = lookup("TESTSPRITE_SUPABASE_URL", "VITE_SUPABASE_URL") or STANDIN_URL
+    key = lookup("TESTSPRITE_SUPABASE_KEY", "VITE_SUPABASE_ANON_KEY") or "standin"
+    return url.rstrip("/"), key
@@ -0,0 +1,856 @@
+"""Streaming AgendaBoa CSV importer and in-browser import benchmark.
+
+``DataImportModal`` reads the whole file with ``file.text()``, parses it with
+``parseCSV`` (``src/shared/utils/csvImporters.ts``), keeps every mapped row
+in React state for the preview and then inserts the rows one request at a
+time. This module applies the same rules from the command line:
+
+* :func:`detect_import_type` and the ``map_*`` functions port
+  ``detectImportType`` and ``map*FromAgendaBoa`` rule for rule, and
+  :func:`db_row` builds the payload ``handleImport`` sends for each type,
+* :func:`read_records` streams records with :mod:`csv`, so memory stays flat
+  whatever the size of the export,
+* each batch is validated against the enums and ``NOT NULL`` columns of the
+  migrations (:mod:`harness.schema`) before it is sent,
+* batches are upserted with ``COPY`` into a staging table, multi-row
+  ``INSERT ... ON CONFLICT`` or PostgREST ``resolution=merge-duplicates``.
+  Ids are derived from the AgendaBoa id, so importing a file twice updates
+  rows instead of duplicating them. A batch the database rejects is split
+  in halves until the offending rows are isolated and reported.
+
+``bench`` writes a synthetic export and times this importer against the
+Settings modal driven through Playwright. Both must reach the same database:
+``--method rest`` (the default) uses the project from
+:func:`~harness.config.supabase_settings`, ``copy``/``insert`` need
+``--dsn`` to point at that project's Postgres::
+
+    python -m harness.csvimport load export_clientes.csv --method copy
+    python -m harness.csvimport load export_jobs.csv --dry-run
+    python -m harness.csvimport bench --kind clients --rows 200000 --browser-rows 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import http.client
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlparse
+
+from .config import BASE_URL, TMP_DIR, supabase_settings
+from .locators import locate
+from .readiness import Readiness
+from .schema import Schema, load_schema
+from .seed import DEFAULT_DSN, FIRST_NAMES, LAST_NAMES, NEIGHBORHOODS, SERVICE_TYPES, STREETS, _batched, _connect
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+DEFAULT_BATCH_SIZE = 5000
+BENCH_PREFIX = "BENCH-CSV"
+BENCH_DIR = TMP_DIR / "imports"
+# Fixed namespace so the same AgendaBoa row always gets the same uuid.
+ID_NAMESPACE = uuid.UUID("5b0c7f9e-3d2a-4c61-9a8e-0f1d2c3b4a59")
+MAX_SAMPLES = 20
+
+IMPORT_TYPE_LABELS = {
+    "clients": "Clientes",
+    "materials": "Materiais/Estoque",
+    "services": "Serviços",
+    "orders": "Pedidos/Ordens",
+    "financial": "Financeiro (Recebíveis/Recibos)",
+    "profile": "Perfil da Empresa",
+    "unknown": "Desconhecido",
+}
+
+# Import type -> table ``handleImport`` writes to.
+TARGETS = {
+    "clients": "clients",
+    "materials": "inventory",
+    "services": "products_services",
+    "orders": "orders",
+    "financial": "invoices",
+}
+
+# Column matched against ``BENCH_PREFIX`` when cleaning up after ``bench``.
+BENCH_NAME_COLUMNS = {"clients": "name", "orders": "client_name"}
+
+_NUMBER_RE = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_BR_DATE_RE = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
+
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+
+class CsvImportError(ValueError):
+    """The file cannot be imported (unknown type, empty, ...)."""
+
+
+class RestError(RuntimeError):
+    pass
+
+
+@dataclass
+class Validation:
+    """Mirror of ``ValidationResult``."""
+
+    valid: bool = True
+    warnings: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    def error(self, message: str) -> None:
+        self.errors.append(message)
+        self.valid = False
+
+
+# -- parsing --------------------------------------------------------------
+
+def read_records(fh) -> Iterator[Dict[str, str]]:
+    """Records of an open CSV file, one at a time (``parseCSV`` semantics).
+
+    Fields are trimmed, empty header names are dropped, blank records are
+    skipped and missing trailing fields read as ``""``. Quoted fields may
+    span lines. Unlike ``parseCSV``, a quote in the middle of an unquoted
+    field is kept literally instead of toggling quoting.
+    """
+    headers: List[str] = []
+    for row in csv.reader(fh):
+        values = [v.strip() for v in row]
+        if not headers:
+            headers = [h for h in values if h]
+            continue
+        if not any(values):
+            continue
+        yield {h: values[i] if i < len(values) else "" for i, h in enumerate(headers)}
+
+
+def sniff(path: Path) -> Tuple[List[str], str]:
+    """Header names and first line, taken the way ``handleFileSelect`` does."""
+    with open(path, encoding="utf-8-sig", newline="") as fh:
+        for line in fh:
+            if line.strip():
+                first = line.rstrip("\n")
+                return [h.strip().replace('"', "") for h in first.split(",")], first
+    raise CsvImportError(f"{path}: empty CSV")
+
+
+def detect_import_type(headers: Sequence[str], first_line: Optional[str] = None) -> str:
+    """Port of ``detectImportType``."""
+    if first_line and "," in first_line and "id" not in first_line and "name" not in first_line:
+        first = first_line.split(",")[0]
+        if "." in first or first in ("email", "firstName"):
+            return "profile"
+
+    h = {x.lower().strip() for x in headers}
+    if "revenue" in h and ("clientid" in h or "clienid" in h):
+        return "financial"
+    if h & {"cnpj", "cpf", "corporatename", "nome", "razão social"}:
+        if h & {"id do job", "valor total", "jobid"}:
+            return "orders"
+        return "clients"
+    if h & {"trademark", "barcode", "internalcode", "marca", "código de barras"}:
+        return "materials"
+    if "unitprice" in h and "unittype" in h and "trademark" not in h:
+        return "services"
+    if h & {"clientid", "jobstatus", "jobtitle", "id do job", "valor total", "status"}:
+        return "orders"
+    if h & {"cliente", "client"} and h & {"vencimento", "valor", "saldo"}:
+        return "financial"
+    return "unknown"
+
+
+def parse_float(text: str) -> float:
+    """``parseFloat(text) || 0``."""
+    match = _NUMBER_RE.match(text.lstrip())
+    return float(match.group()) if match else 0.0
+
+
+def parse_price(text: str) -> float:
+    """The modal's ``parsePrice``: ``"R$ 1.234,56"`` -> ``1234.56``."""
+    if not text:
+        return 0.0
+    return parse_float(text.replace("R$", "", 1).replace(".", "").replace(",", ".", 1).strip())
+
+
+def _iso(dt: datetime) -> str:
+    dt = dt.astimezone(timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def format_date_to_iso(text: str) -> str:
+    """Port of ``formatDateToISO``; unparseable input becomes "now" as in the app."""
+    text = (text or "").strip()
+    if not text:
+        return _iso(datetime.now(timezone.utc))
+    if text.isdigit() and int(text) > 946684800000:
+        return _iso(datetime.fromtimestamp(int(text) / 1000, timezone.utc))
+    br = _BR_DATE_RE.match(text)
+    if br:
+        day, month, year = br.groups()
+        return f"{year}-{month.zfill(2)}-{day.zfill(2)}T12:00:00.000Z"
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return _iso(datetime.now(timezone.utc))
+    if parsed.tzinfo is None and len(text) == 10:
+        # Date-only ISO strings are UTC in JS, date-times are local.
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return _iso(parsed)
+
+
+# -- mapping --------------------------------------------------------------
+
+def _get(record: Dict[str, str], *keys: str, default: str = "") -> str:
+    for key in keys:
+        value = record.get(key)
+        if value:
+            return value
+    return default
+
+
+def map_client(record: Dict[str, str]) -> Tuple[dict, Validation]:
+    validation = Validation()
+    name = _get(record, "name").strip()
+    if not name:
+        validation.error("Nome é obrigatório")
+    address = ", ".join(p for p in (record.get("street"), _get(record, "number", "streetNumber"), record.get("district")) if p)
+    phones = _get(record, "phones")
+    if not _get(record, "email"):
+        validation.warnings.append("E-mail não informado")
+    if not phones:
+        validation.warnings.append("Telefone não informado")
+    cnpj = _get(record, "cnpj")
+    return {
+        "name": name,
+        "company_name": _get(record, "corporateName").strip(),
+        "email": _get(record, "email").strip(),
+        "phone": re.sub(r"[^\d+\s()-]", "", phones).strip(),
+        "cnpj": re.sub(r"\D", "", cnpj),
+        "cpf": re.sub(r"\D", "", _get(record, "cpf")),
+        "address": address,
+        "city": _get(record, "city").strip(),
+        "state": re.sub(r"[()]", "", _get(record, "state")).strip(),
+        "zip_code": re.sub(r"[^\d-]", "", _get(record, "cep")),
+        "type": "legal_entity" if record.get("clientType") == "legal_entity" or cnpj else "person",
+        "external_id": _get(record, "id"),
+    }, validation
+
+
+def map_material(record: Dict[str, str]) -> Tuple[dict, Validation]:
+    validation = Validation()
+    if not _get(record, "description").strip():
+        validation.error("Descrição é obrigatória")
+    price = parse_price(_get(record, "unitPrice", "cost"))
+    if price == 0:
+        validation.warnings.append("Preço não definido")
+    return {
+        "name": _get(record, "description").strip(),
+        "sku": _get(record, "internalCode", "id") or f"SKU-{int(time.time() * 1000)}",
+        "quantity": 0,
+        "min_quantity": 5,
+        "unit": _get(record, "unitType").strip() or "UN",
+        "category": "Importado",
+        "location": "",
+        "price": price,
+        "supplier": _get(record, "trademark").strip(),
+        "external_id": _get(record, "id"),
+    }, validation
+
+
+def map_service(record: Dict[str, str]) -> Tuple[dict, Validation]:
+    validation = Validation()
+    if not _get(record, "description").strip():
+        validation.error("Descrição é obrigatória")
+    price = parse_price(_get(record, "unitPrice"))
+    if price == 0:
+        validation.warnings.append("Preço não definido")
+    return {
+        "name": _get(record, "description").strip(),
+        "description": _get(record, "details").strip(),
+        "price": price,
+        "unit": _get(record, "unitType").strip() or "SV",
+        "type": "service",
+        "external_id": _get(record, "id"),
+    }, validation
+
+
+def map_order(record: Dict[str, str]) -> Tuple[dict, Validation]:
+    validation = Validation()
+    client_name = _get(record, "clientName", "client", "Cliente", "cliente")
+    if not client_name:
+        validation.error("Cliente é obrigatório")
+    return {
+        "client_name": client_name,
+        "total_price": parse_price(_get(record, "totalPrice", "Valor total", "valor total", "valor", default="0")),
+        "status": _get(record, "jobStatus", "Status", "status", default="pendente").lower(),
+        "description": _get(record, "jobTitle", "Tópico", "tópico", "Título", "descrição", "Descrição"),
+        "job_date": format_date_to_iso(_get(record, "jobTimeInMillis", "jobDate", "Data", "data", "Vencimento", "vencimento")),
+        "external_id": _get(record, "id", "ID do job"),
+    }, validation
+
+
+def map_financial(record: Dict[str, str]) -> Tuple[dict, Validation]:
+    # The modal maps receivables inline and accepts every row.
+    data = dict(record)
+    data["parsedValue"] = parse_price(_get(record, "value", "valor", "saldo", default="0"))
+    return data, Validation()
+
+
+MAPPERS: Dict[str, Callable[[Dict[str, str]], Tuple[dict, Validation]]] = {
+    "clients": map_client,
+    "materials": map_material,
+    "services": map_service,
+    "orders": map_order,
+    "financial": map_financial,
+}
+
+
+def _row_id(kind: str, external_id: str, row: dict) -> str:
+    key = external_id or json.dumps(row, sort_keys=True, default=str)
+    return str(uuid.uuid5(ID_NAMESPACE, f"agendaboa:{kind}:{key}"))
+
+
+def db_row(kind: str, data: dict) -> dict:
+    """The row ``handleImport`` inserts for ``data``, plus a stable ``id``.
+
+    Financial rows carry the client name under ``_client`` until
+    :class:`Importer` has resolved it to ``client_id``.
+    """
+    if kind == "clients":
+        row = {
+            "name": data["name"],
+            "email": data["email"] or None,
+            "phone": data["phone"] or None,
+            "address": data["address"] or None,
+            "cpf_cnpj": data["cnpj"] or data["cpf"] or "",
+            "type": "pj" if data["type"] == "legal_entity" else "pf",
+            "status": "active",
+        }
+    elif kind == "materials":
+        row = {k: data[k] for k in ("name", "sku", "quantity", "min_quantity", "unit", "category", "location", "price", "supplier")}
+    elif kind == "services":
+        row = {k: data[k] for k in ("name", "description", "price", "unit", "type")}
+    elif kind == "orders":
+        row = {
+            "client_name": data["client_name"],
+            "value": data["total_price"],
+            "status": data["status"],
+            "service_type": data["description"] or "Importado",
+            "scheduled_date": data["job_date"],
+            "created_at": data["job_date"],
+        }
+    elif kind == "financial":
+        ext = _get(data, "id")
+        row = {
+            "client_id": None,
+            "total": data["parsedValue"],
+            "subtotal": data["parsedValue"],
+            "tax": 0,
+            "discount": 0,
+            "status": "paga" if data.get("revenue") == "1" else "pendente",
+            "due_date": format_date_to_iso(_get(data, "date", "vencimento"))[:10],
+            "invoice_number": f"IMP-{ext or uuid.uuid4().hex[:6].upper()}",
+            "issue_date": date.today().isoformat(),
+            "items": [],
+        }
+        row["id"] = _row_id(kind, ext, row)
+        row["_client"] = _get(data, "client", "cliente")
+        return row
+    else:
+        raise CsvImportError(f"cannot import {kind!r} files")
+    row["id"] = _row_id(kind, data.get("external_id", ""), row)
+    return row
+
+
+class BatchValidator:
+    """Checks rows against the migrations before they reach the database."""
+
+    def __init__(self, schema: Schema, table: str):
+        self.table = schema.tables.get(table)
+        self.allowed = {}
+        self.required = []
+        if self.table:
+            for col in self.table.columns.values():
+                values = schema.allowed_values(col)
+                if values:
+                    self.allowed[col.name] = set(values)
+                if col.not_null and not col.has_default and not col.primary_key:
+                    self.required.append(col.name)
+
+    def errors(self, row: dict) -> List[str]:
+        if self.table is None:
+            return []
+        found = [f"{c}: {row[c]!r} is not an allowed value" for c, ok in self.allowed.items()
+                 if row.get(c) is not None and row[c] not in ok]
+        # Columns the payload never sets are filled by triggers (orders.protocol).
+        found += [f"{c}: required" for c in self.required if c in row and row[c] is None]
+        return found
+
+
+# -- sinks ----------------------------------------------------------------
+
+class PgSink:
+    """Upserts batches over a direct Postgres connection (psycopg 3)."""
+
+    def __init__(self, dsn: str, method: str = "copy"):
+        import psycopg
+
+        self.errors = (psycopg.Error,)
+        self.conn = _connect(dsn)
+        self.method = method
+        self._staged = set()
+
+    def write(self, table: str, columns: List[str], rows: List[dict]) -> None:
+        col_sql = ", ".join(f'"{c}"' for c in columns)
+        updates = ", ".join(f'"{c}" = excluded."{c}"' for c in columns if c != "id")
+        upsert = f'ON CONFLICT (id) DO UPDATE SET {updates}'
+        values = [[json.dumps(v) if isinstance(v, (list, dict)) else v for v in (row.get(c) for c in columns)] for row in rows]
+        # A savepoint, so a rejected batch can be retried in halves.
+        with self.conn.transaction():
+            if self.method == "copy":
+                staging = f'"_import_{table}"'
+                if table not in self._staged:
+                    # Same column types, no constraints or triggers.
+                    self.conn.execute(f'CREATE TEMP TABLE {staging} AS SELECT {col_sql} FROM public."{table}" WITH NO DATA')
+                    self._staged.add(table)
+                self.conn.execute(f"TRUNCATE {staging}")
+                with self.conn.cursor().copy(f"COPY {staging} ({col_sql}) FROM STDIN") as copy:
+                    for value in values:
+                        copy.write_row(value)
+                self.conn.execute(f'INSERT INTO public."{table}" ({col_sql}) SELECT {col_sql} FROM {staging} {upsert}')
+            else:
+                placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+                self.conn.execute(
+                    f'INSERT INTO public."{table}" ({col_sql}) VALUES {", ".join([placeholders] * len(rows))} {upsert}',
+                    [v for value in values for v in value],
+                )
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def client_id(self, name: str) -> Optional[str]:
+        row = self.conn.execute("SELECT id FROM public.clients WHERE name ILIKE %s LIMIT 1", (f"%{name}%",)).fetchone()
+        return str(row[0]) if row else None
+
+    def delete_like(self, table: str, column: str, prefix: str) -> None:
+        self.conn.execute(f'DELETE FROM public."{table}" WHERE "{column}" LIKE %s', (prefix + "%",))
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class RestSink:
+    """Upserts batches through PostgREST on one keep-alive connection."""
+
+    errors = (RestError,)
+
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None):
+        default_url, default_key = supabase_settings()
+        parsed = urlparse(url or default_url)
+        key = key or default_key
+        self._connection = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        self.netloc = parsed.netloc
+        self.base = parsed.path.rstrip("/") + "/rest/v1"
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}", "Content-Type": "application/json"}
+        self.conn = self._connection(self.netloc, timeout=300)
+
+    def request(self, method: str, path: str, body=None, headers: Optional[dict] = None) -> bytes:
+        payload = json.dumps(body, default=str).encode() if body is not None else None
+        for attempt in (1, 2):
+            try:
+                self.conn.request(method, self.base + path, body=payload, headers={**self.headers, **(headers or {})})
+                response = self.conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server closed the idle keep-alive connection.
+                self.conn.close()
+                self.conn = self._connection(self.netloc, timeout=300)
+                if attempt == 2:
+                    raise
+        if response.status >= 400:
+            try:
+                message = json.loads(data).get("message") or data.decode()
+            except (ValueError, AttributeError):
+                message = data.decode(errors="replace")
+            raise RestError(f"{method} {path.split('?')[0]} -> {response.status} {message}")
+        return data
+
+    def write(self, table: str, columns: List[str], rows: List[dict]) -> None:
+        self.request("POST", f"/{table}?on_conflict=id", [{c: r.get(c) for c in columns} for r in rows],
+                     {"Prefer": "resolution=merge-duplicates,return=minimal"})
+
+    def commit(self) -> None:
+        pass
+
+    def client_id(self, name: str) -> Optional[str]:
+        rows = json.loads(self.request("GET", f"/clients?select=id&name=ilike.{quote('*' + name + '*')}&limit=1"))
+        return rows[0]["id"] if rows else None
+
+    def delete_like(self, table: str, column: str, prefix: str) -> None:
+        self.request("DELETE", f"/{table}?{column}=like.{quote(prefix + '*')}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def open_sink(method: str, dsn: str = DEFAULT_DSN):
+    return RestSink() if method == "rest" else PgSink(dsn, method)
+
+
+# -- import ---------------------------------------------------------------
+
+@dataclass
+class ImportReport:
+    path: str
+    kind: str
+    table: str
+    method: str
+    read: int = 0
+    invalid: int = 0
+    duplicates: int = 0
+    loaded: int = 0
+    rejected: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    peak_rss_mb: Optional[float] = None
+    warnings: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    samples: List[dict] = field(default_factory=list)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+    def format(self) -> str:
+        lines = [
+            f"{self.path}: {IMPORT_TYPE_LABELS.get(self.kind, self.kind)} -> {self.table} via {self.method}",
+            f"  {self.read:,} read, {self.loaded:,} loaded, {self.invalid:,} invalid, {self.rejected:,} rejected, "
+            f"{self.duplicates:,} duplicate ids in {self.batches} batches",
+            f"  {self.seconds:.2f}s, {self.rows_per_sec:,.0f} rows/s"
+            + (f", peak RSS {self.peak_rss_mb:.0f} MiB" if self.peak_rss_mb is not None else ""),
+        ]
+        lines += [f"  warning x{n:,}: {msg}" for msg, n in sorted(self.warnings.items(), key=lambda kv: -kv[1])]
+        lines += [f"  error   x{n:,}: {msg}" for msg, n in sorted(self.errors.items(), key=lambda kv: -kv[1])]
+        return "\n".join(lines)
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Importer:
+    """Streams one AgendaBoa export into ``sink`` batch by batch."""
+
+    def __init__(self, sink=None, batch_size: int = DEFAULT_BATCH_SIZE, schema: Optional[Schema] = None,
+                 client_cache: int = 10_000):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.schema = schema or load_schema()
+        self._clients: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._client_cache = client_cache
+
+    def _note(self, counter: Dict[str, int], message: str) -> None:
+        # Database messages can embed values; keep the report bounded.
+        key = message.splitlines()[0][:200] if len(counter) < 50 or message in counter else "(other)"
+        counter[key] = counter.get(key, 0) + 1
+
+    def _reject(self, report: ImportReport, line: int, row: dict, reasons: List[str]) -> None:
+        for reason in reasons:
+            self._note(report.errors, reason)
+        if len(report.samples) < MAX_SAMPLES:
+            report.samples.append({"record": line, "reasons": reasons, "row": row})
+
+    def _client_id(self, name: str) -> Optional[str]:
+        if name in self._clients:
+            self._clients.move_to_end(name)
+            return self._clients[name]
+        client_id = self.sink.client_id(name) if name else None
+        self._clients[name] = client_id
+        if len(self._clients) > self._client_cache:
+            self._clients.popitem(last=False)
+        return client_id
+
+    def _load(self, table: str, columns: List[str], rows: List[Tuple[int, dict]]) -> List[Tuple[int, dict, str]]:
+        """Write ``rows``; returns the ones the database refused, with why."""
+        try:
+            self.sink.write(table, columns, [row for _, row in rows])
+            return []
+        except self.sink.errors as exc:
+            if len(rows) == 1:
+                return [(rows[0][0], rows[0][1], str(exc).strip())]
+        mid = len(rows) // 2
+        return self._load(table, columns, rows[:mid]) + self._load(table, columns, rows[mid:])
+
+    def run(self, path: Path, kind: Optional[str] = None, dry_run: bool = False) -> ImportReport:
+        if kind is None:
+            headers, first = sniff(path)
+            kind = detect_import_type(headers, first)
+        if kind not in MAPPERS:
+            raise CsvImportError(f"{path}: cannot stream {IMPORT_TYPE_LABELS.get(kind, kind)} files")
+        table = TARGETS[kind]
+        mapper = MAPPERS[kind]
+        validator = BatchValidator(self.schema, table)
+        method = "dry-run" if dry_run or self.sink is None else getattr(self.sink, "method", "rest")
+        report = ImportReport(str(path), kind, table, method)
+        start = time.perf_counter()
+        with open(path, encoding="utf-8-sig", newline="") as fh:
+            numbered = enumerate(read_records(fh), 1)
+            for batch in _batched(numbered, self.batch_size):
+                report.batches += 1
+                rows: "OrderedDict[str, Tuple[int, dict]]" = OrderedDict()
+                for line, record in batch:
+                    report.read += 1
+                    data, validation = mapper(record)
+                    for warning in validation.warnings:
+                        self._note(report.warnings, warning)
+                    if not validation.valid:
+                        report.invalid += 1
+                        self._reject(report, line, record, validation.errors)
+                        continue
+                    row = db_row(kind, data)
+                    problems = validator.errors(row)
+                    if problems:
+                        report.invalid += 1
+                        self._reject(report, line, row, problems)
+                        continue
+                    if row["id"] in rows:
+                        # ON CONFLICT cannot touch one row twice per statement.
+                        report.duplicates += 1
+                    rows[row["id"]] = (line, row)
+                if not rows:
+                    continue
+                if dry_run or self.sink is None:
+                    report.loaded += len(rows)
+                    continue
+                pending = list(rows.values())
+                if kind == "financial":
+                    for _, row in pending:
+                        row["client_id"] = self._client_id(row.pop("_client"))
+                columns = list(pending[0][1])
+                refused = self._load(table, columns, pending)
+                self.sink.commit()
+                report.loaded += len(pending) - len(refused)
+                report.rejected += len(refused)
+                for line, row, reason in refused:
+                    self._reject(report, line, row, [reason])
+        report.seconds = time.perf_counter() - start
+        report.peak_rss_mb = peak_rss_mb()
+        return report
+
+
+def import_file(path: Path, method: str = "copy", dsn: str = DEFAULT_DSN, batch_size: int = DEFAULT_BATCH_SIZE,
+                kind: Optional[str] = None, dry_run: bool = False) -> ImportReport:
+    """Import one AgendaBoa export; see :class:`Importer`."""
+    sink = None if dry_run else open_sink(method, dsn)
+    try:
+        return Importer(sink, batch_size).run(path, kind, dry_run)
+    finally:
+        if sink is not None:
+            sink.close()
+
+
+# -- benchmark ------------------------------------------------------------
+
+SAMPLE_HEADERS = {
+    "clients": ["id", "name", "corporateName", "email", "source", "phones", "clientType", "cnpj", "cpf", "cep", "city",
+                "district", "number", "state", "street", "streetNumber"],
+    "orders": ["id", "clientId", "clientName", "createdAt", "jobDate", "jobNumber", "jobStatus", "jobTitle", "jobType",
+               "totalPrice"],
+}
+SAMPLE_STATUSES = ["Concluida", "Agendada", "Pendente", "Nova", "Cancelada"]
+
+
+def write_sample(path: Path, kind: str, rows: int, seed: int = 42) -> Path:
+    """Write a synthetic AgendaBoa export with ``rows`` records, streamed."""
+    rng = random.Random(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        writer = csv.writer(fh, lineterminator="\n")
+        writer.writerow(SAMPLE_HEADERS[kind])
+        for i in range(rows):
+            name = f"{BENCH_PREFIX} {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+            price = f"R$ {rng.randrange(50, 20000):,}".replace(",", ".") + f",{rng.randrange(100):02d}"
+            if kind == "clients":
+                pj = rng.random() < 0.4
+                writer.writerow([
+                    f"ab-{i}", name, f"{name} LTDA" if pj else "", f"bench{i}@example.test" if rng.random() < 0.8 else "",
+                    "agendaboa", f"(81) 9{i:08d}", "legal_entity" if pj else "person",
+                    f"{rng.randrange(10**13, 10**14)}" if pj else "", "" if pj else f"{rng.randrange(10**10, 10**11)}",
+                    f"5{rng.randrange(1000, 9999)}-{rng.randrange(100, 999)}", "Recife", rng.choice(NEIGHBORHOODS),
+                    str(rng.randrange(1, 3000)), "(PE)", rng.choice(STREETS), "",
+                ])
+            else:
+                title = rng.choice(SERVICE_TYPES)
+                if rng.random() < 0.1:
+                    # Multi-line quoted field, as AgendaBoa exports notes.
+                    title += "\nObs: cliente pediu retorno, \"urgente\""
+                day = f"{rng.randrange(1, 29):02d}/{rng.randrange(1, 13):02d}/{rng.choice([2023, 2024, 2025])}"
+                writer.writerow([f"job-{i}", f"ab-{i % 5000}", name, day, day, str(i), rng.choice(SAMPLE_STATUSES),
+                                 title, "Serviço", price])
+    return path
+
+
+async def browser_import(pool, path: Path, rows: int) -> dict:
+    """Import ``path`` through the Settings modal; returns its timings."""
+    async with pool.context(role="admin") as context:
+        page = await context.new_page()
+        timeout = 60000 + rows * 500
+        ready = Readiness(page, timeout_ms=timeout)
+        await ready.goto(BASE_URL + "/settings", wait_until="commit")
+        await ready.click(locate(page, "settings.import"))
+        session = await context.new_cdp_session(page)
+        submit = locate(page, "import.submit")
+        start = time.perf_counter()
+        await locate(page, "import.file").set_input_files(str(path))
+        await submit.wait_for(timeout=timeout)
+        parsed = time.perf_counter()
+        heap = await session.send("Runtime.getHeapUsage")
+        await submit.click()
+        await locate(page, "import.done").wait_for(timeout=timeout)
+        done = time.perf_counter()
+    return {
+        "rows": rows,
+        "parse_s": parsed - start,
+        "insert_s": done - parsed,
+        "seconds": done - start,
+        "rows_per_sec": rows / (done - start),
+        "heap_after_preview_mb": heap["usedSize"] / 2**20,
+    }
+
+
+@dataclass
+class BenchResult:
+    kind: str
+    method: str
+    python_small: ImportReport
+    browser: dict
+    python_full: Optional[ImportReport] = None
+
+    def format(self) -> str:
+        small, browser = self.python_small, self.browser
+        lines = [
+            f"{self.kind}: {small.read:,} rows",
+            f"  browser  {browser['seconds']:8.2f}s {browser['rows_per_sec']:>10,.0f} rows/s "
+            f"(parse {browser['parse_s']:.2f}s, insert {browser['insert_s']:.2f}s, heap {browser['heap_after_preview_mb']:.0f} MiB)",
+            f"  python   {small.seconds:8.2f}s {small.rows_per_sec:>10,.0f} rows/s via {self.method} "
+            f"({small.rows_per_sec / browser['rows_per_sec']:.1f}x)" if browser["rows_per_sec"] else "",
+        ]
+        if self.python_full:
+            full = self.python_full
+            lines.append(f"  python   {full.read:,} rows in {full.seconds:.2f}s, {full.rows_per_sec:,.0f} rows/s"
+                         + (f", peak RSS {full.peak_rss_mb:.0f} MiB" if full.peak_rss_mb is not None else ""))
+        return "\n".join(line for line in lines if line)
+
+
+def bench(kind: str, rows: int, browser_rows: int, method: str = "rest", dsn: str = DEFAULT_DSN,
+          batch_size: int = DEFAULT_BATCH_SIZE, headless: bool = True) -> BenchResult:
+    from .pool import BrowserPool
+
+    async def drive(path: Path) -> dict:
+        async with BrowserPool(workers=1, headless=headless) as pool:
+            return await browser_import(pool, path, browser_rows)
+
+    table, column = TARGETS[kind], BENCH_NAME_COLUMNS[kind]
+    small = write_sample(BENCH_DIR / f"{kind}-{browser_rows}.csv", kind, browser_rows)
+    sink = open_sink(method, dsn)
+    try:
+        sink.delete_like(table, column, BENCH_PREFIX)
+        try:
+            python_small = Importer(sink, batch_size).run(small, kind)
+        finally:
+            sink.delete_like(table, column, BENCH_PREFIX)
+        try:
+            browser = asyncio.run(drive(small))
+        finally:
+            sink.delete_like(table, column, BENCH_PREFIX)
+        result = BenchResult(kind, method, python_small, browser)
+        if rows > browser_rows:
+            full = write_sample(BENCH_DIR / f"{kind}-{rows}.csv", kind, rows)
+            try:
+                result.python_full = Importer(sink, batch_size).run(full, kind)
+            finally:
+                sink.delete_like(table, column, BENCH_PREFIX)
+    finally:
+        sink.close()
+    return result
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Stream AgendaBoa CSV exports into the database and benchmark the in-app importer.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    load = sub.add_parser("load", help="import one or more exports")
+    load.add_argument("paths", nargs="+", type=Path)
+    load.add_argument("--kind", choices=sorted(MAPPERS), help="skip detection and import as this type")
+    load.add_argument("--method", choices=["copy", "insert", "rest"], default="copy")
+    load.add_argument("--dsn", default=DEFAULT_DSN, help="Postgres DSN for copy/insert (default: $TESTSPRITE_PG_DSN or local Supabase)")
+    load.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    load.add_argument("--dry-run", action="store_true", help="parse, map and validate without writing")
+    load.add_argument("--json", help="write the reports, with sample rejected rows, to this file")
+
+    generate = sub.add_parser("generate", help="write a synthetic AgendaBoa export")
+    generate.add_argument("path", type=Path)
+    generate.add_argument("--kind", choices=sorted(SAMPLE_HEADERS), default="clients")
+    generate.add_argument("--rows", type=int, default=100_000)
+    generate.add_argument("--seed", type=int, default=42)
+
+    bench_parser = sub.add_parser("bench", help="compare throughput with the Settings import modal")
+    bench_parser.add_argument("--kind", choices=sorted(SAMPLE_HEADERS), default="clients")
+    bench_parser.add_argument("--rows", type=int, default=100_000, help="rows for the Python-only run (default: 100000)")
+    bench_parser.add_argument("--browser-rows", type=int, default=2000, help="rows for the head-to-head run (default: 2000)")
+    bench_parser.add_argument("--method", choices=["copy", "insert", "rest"], default="rest")
+    bench_parser.add_argument("--dsn", default=DEFAULT_DSN)
+    bench_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    bench_parser.add_argument("--json", help="write the results to this file")
+    bench_parser.add_argument("--headed", action="store_true", help="show the browser window")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "generate":
+        write_sample(args.path, args.kind, args.rows, args.seed)
+        print(f"wrote {args.rows:,} {args.kind} rows to {args.path}")
+        return 0
+    if args.command == "bench":
+        result = bench(args.kind, args.rows, args.browser_rows, args.method, args.dsn, args.batch_size, headless=not args.headed)
+        print(result.format())
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as fh:
+                json.dump(asdict(result), fh, indent=2, default=str)
+        return 0
+
+    reports = []
+    for path in args.paths:
+        try:
+            report = import_file(path, args.method, args.dsn, args.batch_size, args.kind, args.dry_run)
+        except CsvImportError as exc:
+            print(exc, file=sys.stderr)
+            return 2
+        print(report.format())
+        reports.append(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump([asdict(r) for r in reports], fh, indent=2, default=str)
+    return 1 if any(r.rejected for r in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Shared async executor for compiled test plans (see :mod:`harness.plan`).
+
+Every op runs as its own task that first awaits the ops it depends on, so
+the dependency graph built by the compiler decides what overlaps: runs of
+assertions poll concurrently and a tab's first navigation loads while the
+other tab is still busy. Mutating ops on one tab are additionally serialised
+by a per-tab lock.
+
+Waits go through :class:`~harness.readiness.Readiness` and the case
+:class:`~harness.budget.Budget`; visibility checks share one
+:class:`~harness.budget.Expectations` per tab, so a broken page fails fast
+and every missed assertion is reported together.
+
+Usage::
+
+    from harness.engine import run_plan
+    from harness.plan import compile_plan
+
+    plans, _ = compile_plan(["TC008"])
+    await run_plan(plans[0], context)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .auth import credentials
+from .budget import MIN_TIMEOUT_MS, Expectations, Miss, current
+from .config import BASE_URL, DEFAULT_TIMEOUT_MS
+from .locators import locate
+from .plan import CompiledPlan, Op, substitute
+from .readiness import Readiness
+from .results import record_assertion
+
+# 1x1 transparent PNG for ``upload`` ops.
+_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+_SELECTED_TEXT_JS = "(el) => el.selectedOptions.length ? el.selectedOptions[0].text : ''"
+
+
+@dataclass
+class OpTiming:
+    id: str
+    kind: str
+    tab: str
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class PlanRun:
+    case_id: str
+    vars: Dict[str, str] = field(default_factory=dict)
+    timings: List[OpTiming] = field(default_factory=list)
+
+    @property
+    def wall(self) -> float:
+        if not self.timings:
+            return 0.0
+        return max(t.end for t in self.timings) - min(t.start for t in self.timings)
+
+    @property
+    def serial(self) -> float:
+        """Time the same ops would have taken back to back."""
+        return sum(t.duration for t in self.timings)
+
+
+class _Tab:
+    def __init__(self, page):
+        self.page = page
+        self.ready = Readiness(page)
+        self.checks = Expectations(page)
+        self.lock = asyncio.Lock()
+
+
+class Engine:
+    """Runs one :class:`CompiledPlan` inside a browser context."""
+
+    def __init__(self, context, plan: CompiledPlan, timeout_ms: float = DEFAULT_TIMEOUT_MS * 6):
+        self.context = context
+        self.plan = plan
+        self.timeout_ms = timeout_ms
+        self.budget = current()
+        self.run = PlanRun(plan.case_id, vars={"run": uuid.uuid4().hex[:8]})
+        self._tabs: Dict[str, _Tab] = {}
+        self._tab_lock = asyncio.Lock()
+        self._done: Dict[str, asyncio.Future] = {}
+
+    async def tab(self, name: str) -> _Tab:
+        async with self._tab_lock:
+            tab = self._tabs.get(name)
+            if tab is None:
+                reuse = name == "main" and self.context.pages
+                page = self.context.pages[-1] if reuse else await self.context.new_page()
+                tab = self._tabs[name] = _Tab(page)
+            return tab
+
+    def _sub(self, value):
+        return substitute(value, self.run.vars)
+
+    def _locate(self, tab: _Tab, args: dict):
+        params = {k: self._sub(v) for k, v in (args.get("params") or {}).items()}
+        return locate(tab.page, args["key"], **params).nth(0)
+
+    def _cap(self, timeout_ms: Optional[float] = None) -> float:
+        return self.budget.cap(self.timeout_ms if timeout_ms is None else timeout_ms)
+
+    async def execute(self) -> PlanRun:
+        loop = asyncio.get_running_loop()
+        self._done = {op.id: loop.create_future() for op in self.plan.ops}
+        tasks = [asyncio.ensure_future(self._run_op(op)) for op in self.plan.ops]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        misses = []
+        for name, tab in self._tabs.items():
+            try:
+                await tab.checks.verify()
+            except AssertionError as exc:
+                misses.append(f"[{name}] {exc}")
+        if misses:
+            raise AssertionError(f"{self.plan.case_id}: " + "\n".join(misses))
+        return self.run
+
+    async def _run_op(self, op: Op) -> None:
+        if op.deps:
+            await asyncio.gather(*(self._done[d] for d in op.deps))
+        tab = await self.tab(op.tab)
+        start = time.perf_counter()
+        try:
+            if op.reads:
+                await getattr(self, f"_op_{op.kind}")(tab, op.args)
+            else:
+                async with tab.lock:
+                    await getattr(self, f"_op_{op.kind}")(tab, op.args)
+        except Exception as exc:
+            if isinstance(exc, AssertionError):
+                raise AssertionError(f"{op.id} {op.kind} failed: {exc}") from exc
+            raise RuntimeError(f"{op.id} {op.kind} failed: {exc}") from exc
+        self.run.timings.append(OpTiming(op.id, op.kind, op.tab, start, time.perf_counter()))
+        self._done[op.id].set_result(None)
+
+    # Mutating ops.
+
+    async def _op_goto(self, tab: _Tab, args: dict) -> None:
+        await tab.ready.goto(BASE_URL + self._sub(args["path"]), name=f"goto {args['path']}",
+                             wait_until="commit", timeout=self._cap())
+
+    async def _op_click(self, tab: _Tab, args: dict) -> None:
+        await tab.ready.click(self._locate(tab, args))
+
+    async def _op_fill(self, tab: _Tab, args: dict) -> None:
+        locator, value = self._locate(tab, args), self._sub(args["value"])
+        pattern = args.get("await_response")
+        if not pattern:
+            await tab.ready.fill(locator, value)
+            return
+        # Auto-fill lookups (BrasilAPI) are not Supabase traffic, so
+        # network_idle would not wait for them.
+        async with tab.page.expect_response(lambda r: pattern in r.url, timeout=self._cap()):
+            await tab.ready.fill(locator, value)
+
+    async def _op_select(self, tab: _Tab, args: dict) -> None:
+        option = {k: self._sub(args[k]) for k in ("index", "label", "value") if k in args}
+        await self._locate(tab, args).select_option(timeout=self._cap(DEFAULT_TIMEOUT_MS), **option)
+
+    async def _op_upload(self, tab: _Tab, args: dict) -> None:
+        files = {"name": self._sub(args.get("name", "upload.png")), "mimeType": "image/png", "buffer": _PNG}
+        await self._locate(tab, args).set_input_files(files, timeout=self._cap(DEFAULT_TIMEOUT_MS))
+        await tab.ready.network_idle()
+
+    async def _op_draw(self, tab: _Tab, args: dict) -> None:
+        locator = self._locate(tab, args)
+        await locator.wait_for(state="visible", timeout=self._cap(DEFAULT_TIMEOUT_MS))
+        box = await locator.bounding_box()
+        mouse = tab.page.mouse
+        x, y, w, h = box["x"], box["y"], box["width"], box["height"]
+        await mouse.move(x + w * 0.2, y + h * 0.6)
+        await mouse.down()
+        for i in range(1, 9):
+            await mouse.move(x + w * (0.2 + 0.075 * i), y + h * (0.6 - 0.3 * (i % 2)), steps=4)
+        await mouse.up()
+
+    async def _op_login(self, tab: _Tab, args: dict) -> None:
+        user, password = credentials(args["role"])
+        form = args["form"]
+        await tab.ready.goto(BASE_URL + args["path"], wait_until="commit", timeout=self._cap())
+        await tab.ready.fill(locate(tab.page, f"{form}.username"), user)
+        await tab.ready.fill(locate(tab.page, f"{form}.password"), password)
+        await tab.ready.click(locate(tab.page, f"{form}.submit"))
+        await tab.page.wait_for_url(re.compile(args["url"]), timeout=self._cap())
+
+    async def _op_geolocation(self, tab: _Tab, args: dict) -> None:
+        await self.context.grant_permissions(["geolocation"], origin=BASE_URL)
+        await self.context.set_geolocation({"latitude": args["latitude"], "longitude": args["longitude"]})
+
+    async def _op_remember(self, tab: _Tab, args: dict) -> None:
+        if "url" in args:
+            await tab.page.wait_for_url(re.compile(args["url"]), timeout=self._cap())
+            value = re.search(args["url"], tab.page.url).group(1)
+        elif args.get("attr") == "selected_text":
+            value = await self._locate(tab, args).evaluate(_SELECTED_TEXT_JS)
+        else:
+            value = await self._locate(tab, args).input_value(timeout=self._cap(DEFAULT_TIMEOUT_MS))
+        self.run.vars[args["var"]] = value.strip()
+
+    # Read-only ops; misses are collected on the tab's Expectations.
+
+    async def _op_expect_visible(self, tab: _Tab, args: dict) -> None:
+        if "text" in args:
+            await tab.checks.visible(f"text={self._sub(args['text'])}", timeout=self.timeout_ms)
+            return
+        # Registry keys go through a Locator, which Expectations cannot take.
+        await self._expect(tab, args["key"], lambda e, t: e(self._locate(tab, args)).to_be_visible(timeout=t))
+
+    async def _op_expect_value(self, tab: _Tab, args: dict) -> None:
+        expected = re.compile(r"\S") if args.get("nonempty") else self._sub(args.get("equals", ""))
+        await self._expect(tab, args["key"], lambda e, t: e(self._locate(tab, args)).to_have_value(expected, timeout=t))
+
+    async def _op_expect_url(self, tab: _Tab, args: dict) -> None:
+        pattern = re.compile(self._sub(args["pattern"]))
+        await self._expect(tab, f"url ~ {pattern.pattern}", lambda e, t: e(tab.page).to_have_url(pattern, timeout=t))
+
+    async def _expect(self, tab: _Tab, label: str, check) -> None:
+        from playwright.async_api import expect
+
+        tab.checks.checked += 1
+        # Same fail-fast rule as Expectations: after a miss, only glance.
+        timeout = MIN_TIMEOUT_MS if tab.checks.batching else self._cap()
+        start = time.monotonic()
+        try:
+            await check(expect, timeout)
+        except AssertionError:
+            tab.checks.misses.append(Miss(label, "expectation not met"))
+        record_assertion(label, time.monotonic() - start)
+
+
+async def run_plan(plan: CompiledPlan, context) -> PlanRun:
+    """Execute ``plan`` in ``context`` (see :class:`Engine`)."""
+    return await Engine(context, plan).execute()
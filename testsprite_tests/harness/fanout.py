@@ -0,0 +1,354 @@
+"""Realtime fan-out benchmark for AppContext's ``postgres_changes`` channels.
+
+K browser contexts stay open on ``/orders`` or ``/inventory`` (round-robin)
+while a writer PATCHes one probe row per table over PostgREST at a fixed,
+open-loop rate. Every write stamps a marker (``FANOUT-O-<seq>`` in the
+order's ``client_name``, ``FANOUT-I-<seq>`` in the item's ``name``) and a
+MutationObserver in each page records when a marker first reaches the DOM.
+
+Latency is measured from the moment the write is issued to the moment the
+marker is rendered, per client. React may coalesce several updates of the
+same row into one render, so a write counts as delivered as soon as its
+marker *or any later one* for the same probe is on screen.
+
+The rate is ramped step by step; a step is sustainable when no client
+missed a write, p95 latency stays within ``--budget-ms`` and latency does
+not drift upwards during the step (clients keeping up rather than queueing).
+
+Run against a seeded database or :mod:`harness.standin`::
+
+    python -m harness.fanout --clients 8 --rates 1,2,5,10,20 --duration 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from contextlib import AsyncExitStack
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from .config import BASE_URL, supabase_settings
+from .readiness import Readiness
+from .stats import format_summary, percentile, summarize
+
+MARKER = "FANOUT"
+
+# table -> (view path, marker tag, column rendered by that view, probe ordering)
+TABLES: Dict[str, tuple] = {
+    # Orders are listed newest scheduled_date first, so that row is on screen.
+    "orders": ("/orders", "O", "client_name", "scheduled_date.desc.nullslast"),
+    # Inventory is paginated; the clients search for the marker instead.
+    "inventory": ("/inventory", "I", "name", "name.asc"),
+}
+INVENTORY_SEARCH = "input[placeholder^='PESQUISAR']"
+
+DEFAULT_RATES = (1, 2, 5, 10, 20, 50)
+DEFAULT_BUDGET_MS = 1000.0
+
+_OBSERVER_INIT_SCRIPT = """
+window.__fanout = {};
+new MutationObserver((mutations) => {
+  const now = performance.timeOrigin + performance.now();
+  for (const m of mutations) {
+    const nodes = m.type === 'characterData' ? [m.target] : m.addedNodes;
+    for (const n of nodes) {
+      for (const match of (n.textContent || '').matchAll(/FANOUT-([A-Z])-(\\d+)/g)) {
+        const key = match[1] + match[2];
+        if (!(key in window.__fanout)) window.__fanout[key] = now;
+      }
+    }
+  }
+}).observe(document, { childList: true, subtree: true, characterData: true });
+"""
+
+
+def _now_ms() -> float:
+    return time.time() * 1000
+
+
+def marker(table: str, seq: int) -> str:
+    return f"{MARKER}-{TABLES[table][1]}-{seq}"
+
+
+@dataclass
+class Write:
+    seq: int
+    table: str
+    sent: float
+    acked: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class Client:
+    index: int
+    table: str
+    page: object = field(repr=False)
+
+
+@dataclass
+class StepResult:
+    rate: float
+    duration_s: float
+    clients: int
+    writes: int
+    errors: int
+    missing: int
+    latency: Dict[str, float]
+    ack: Dict[str, float]
+    drift_ms: float
+    sustainable: bool
+
+    def format(self) -> str:
+        verdict = "ok" if self.sustainable else "BEHIND"
+        lines = [
+            f"rate {self.rate:g}/s x {self.duration_s:g}s, {self.clients} clients: {self.writes} writes, "
+            f"{self.errors} errors, {self.missing} missed deliveries, drift {self.drift_ms:+.0f}ms -> {verdict}",
+            "  " + format_summary("commit->DOM", self.latency),
+            "  " + format_summary("write ack", self.ack),
+        ]
+        return "\n".join(lines)
+
+
+class RestWriter:
+    """PATCHes probe rows through the Supabase REST API."""
+
+    def __init__(self, request, url: str, key: str):
+        self.request = request
+        self.base = f"{url}/rest/v1"
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}", "Content-Type": "application/json"}
+        self.probes: Dict[str, dict] = {}
+
+    async def probe(self, table: str) -> dict:
+        """Pick the row the benchmark will rewrite and remember its value."""
+        _, _, column, order = TABLES[table]
+        response = await self.request.get(
+            f"{self.base}/{table}?select=id,{column}&order={order}&limit=1", headers=self.headers
+        )
+        rows = await response.json() if response.ok else []
+        if not rows:
+            raise RuntimeError(f"no {table} row to use as a probe; seed the database first (python -m harness.seed)")
+        self.probes[table] = rows[0]
+        return rows[0]
+
+    async def patch(self, table: str, values: dict) -> None:
+        response = await self.request.patch(
+            f"{self.base}/{table}?id=eq.{self.probes[table]['id']}",
+            headers={**self.headers, "Prefer": "return=minimal"},
+            data=json.dumps(values),
+        )
+        if not response.ok:
+            raise RuntimeError(f"PATCH {table} -> {response.status} {await response.text()}")
+
+    async def write(self, w: Write) -> Write:
+        try:
+            await self.patch(w.table, {TABLES[w.table][2]: marker(w.table, w.seq)})
+        except Exception as exc:  # noqa: BLE001 - a failed write is a data point
+            w.error = str(exc)
+        w.acked = _now_ms()
+        return w
+
+    async def restore(self) -> None:
+        for table, row in self.probes.items():
+            column = TABLES[table][2]
+            await self.patch(table, {column: row[column]})
+
+
+def delivery_latencies(writes: Sequence[Write], seen: Dict[str, float], tag: str) -> tuple:
+    """Return ``({seq: latency_ms}, missing)`` for one client and one probe.
+
+    ``seen`` maps ``<tag><seq>`` to the epoch ms the marker hit the DOM. A
+    write is delivered at the earliest time any marker with ``seq >=`` its
+    own was seen.
+    """
+    by_seq = sorted(((int(k[len(tag):]), t) for k, t in seen.items() if k.startswith(tag)), reverse=True)
+    earliest: List[tuple] = []  # (seq, earliest time any seq' >= seq was seen), seq descending
+    best = float("inf")
+    for seq, t in by_seq:
+        best = min(best, t)
+        earliest.append((seq, best))
+    latencies: Dict[int, float] = {}
+    missing = 0
+    i = len(earliest) - 1
+    for w in sorted(writes, key=lambda w: w.seq):
+        # Advance to the smallest seen seq that is >= w.seq.
+        while i >= 0 and earliest[i][0] < w.seq:
+            i -= 1
+        if i < 0:
+            missing += 1
+        else:
+            latencies[w.seq] = max(0.0, earliest[i][1] - w.sent)
+    return latencies, missing
+
+
+class FanoutBench:
+    def __init__(self, pool, clients: int = 4, tables: Sequence[str] = tuple(TABLES), budget_ms: float = DEFAULT_BUDGET_MS,
+                 drain_ms: float = 3000):
+        self.pool = pool
+        self.n_clients = clients
+        self.tables = list(tables)
+        self.budget_ms = budget_ms
+        self.drain_ms = drain_ms
+        self.clients: List[Client] = []
+        self.writer: Optional[RestWriter] = None
+        self._seq = 0
+        self._initial: Dict[str, int] = {}
+        self._stack = AsyncExitStack()
+
+    async def __aenter__(self) -> "FanoutBench":
+        url, key = supabase_settings()
+        writer_ctx = await self._stack.enter_async_context(self.pool.context())
+        self.writer = RestWriter(writer_ctx.request, url, key)
+        for table in self.tables:
+            await self.writer.probe(table)
+            self._initial[table] = self._next_seq()
+            await self.writer.patch(table, {TABLES[table][2]: marker(table, self._initial[table])})
+        await asyncio.gather(*(self._open_client(i) for i in range(self.n_clients)))
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        try:
+            if self.writer:
+                await self.writer.restore()
+        finally:
+            await self._stack.aclose()
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    async def _open_client(self, index: int) -> None:
+        table = self.tables[index % len(self.tables)]
+        context = await self._stack.enter_async_context(self.pool.context(role="admin"))
+        page = await context.new_page()
+        await page.add_init_script(_OBSERVER_INIT_SCRIPT)
+        ready = Readiness(page)
+        await ready.goto(BASE_URL + TABLES[table][0])
+        await ready.settle()
+        if table == "inventory":
+            await ready.fill(page.locator(INVENTORY_SEARCH).first, MARKER)
+        await page.get_by_text(marker(table, self._initial[table])).first.wait_for(timeout=15000)
+        self.clients.append(Client(index, table, page))
+
+    async def _collect(self) -> List[Dict[str, float]]:
+        seen = await asyncio.gather(*(c.page.evaluate("() => { const s = window.__fanout; window.__fanout = {}; return s; }") for c in self.clients))
+        return list(seen)
+
+    async def run_step(self, rate: float, duration_s: float) -> StepResult:
+        await self._collect()  # discard markers left over from the previous step
+        count = max(1, int(rate * duration_s))
+        start = time.perf_counter()
+        tasks = []
+        for i in range(count):
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            w = Write(self._next_seq(), self.tables[i % len(self.tables)], _now_ms())
+            tasks.append(asyncio.ensure_future(self.writer.write(w)))
+        writes: List[Write] = list(await asyncio.gather(*tasks))
+        await asyncio.sleep(self.drain_ms / 1000)
+        seen = await self._collect()
+
+        ok = [w for w in writes if w.error is None]
+        latencies: List[float] = []
+        head: List[float] = []
+        tail: List[float] = []
+        missing = 0
+        first_seq, third = writes[0].seq, count / 3
+        for client, client_seen in zip(self.clients, seen):
+            relevant = [w for w in ok if w.table == client.table]
+            delivered, miss = delivery_latencies(relevant, client_seen, TABLES[client.table][1])
+            missing += miss
+            for seq, value in delivered.items():
+                latencies.append(value)
+                # Compare the first and last third of the step to spot queueing.
+                if seq - first_seq < third:
+                    head.append(value)
+                elif seq - first_seq >= 2 * third:
+                    tail.append(value)
+        drift = (percentile(tail, 50) - percentile(head, 50)) if head and tail else 0.0
+        latency = summarize(latencies)
+        errors = len(writes) - len(ok)
+        sustainable = (
+            errors == 0
+            and missing == 0
+            and latency.get("n", 0) > 0
+            and latency["p95"] <= self.budget_ms
+            and drift <= self.budget_ms / 2
+        )
+        return StepResult(
+            rate=rate,
+            duration_s=duration_s,
+            clients=len(self.clients),
+            writes=len(writes),
+            errors=errors,
+            missing=missing,
+            latency=latency,
+            ack=summarize(w.acked - w.sent for w in writes if w.acked is not None),
+            drift_ms=drift,
+            sustainable=sustainable,
+        )
+
+    async def ramp(self, rates: Sequence[float], duration_s: float, stop_on_failure: bool = True) -> List[StepResult]:
+        results = []
+        for rate in rates:
+            result = await self.run_step(rate, duration_s)
+            print(result.format(), flush=True)
+            results.append(result)
+            if stop_on_failure and not result.sustainable:
+                break
+        return results
+
+
+def max_sustainable(results: Sequence[StepResult]) -> Optional[float]:
+    passing = [r.rate for r in results if r.sustainable]
+    return max(passing) if passing else None
+
+
+async def run(clients: int, rates: Sequence[float], duration_s: float, tables: Sequence[str], budget_ms: float,
+              headless: bool = True, stop_on_failure: bool = True) -> List[StepResult]:
+    from .pool import BrowserPool
+
+    # One slot per client plus the writer's context.
+    async with BrowserPool(workers=clients + 1, headless=headless) as pool:
+        async with FanoutBench(pool, clients, tables, budget_ms) as bench:
+            return await bench.ramp(rates, duration_s, stop_on_failure)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Realtime fan-out throughput/latency benchmark.")
+    parser.add_argument("-k", "--clients", type=int, default=4, help="concurrent browser contexts (default: 4)")
+    parser.add_argument("--rates", default=",".join(str(r) for r in DEFAULT_RATES), help="comma-separated writes/s to ramp through")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per rate step (default: 10)")
+    parser.add_argument("--tables", default=",".join(TABLES), help=f"tables to write ({', '.join(TABLES)})")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="p95 commit->DOM budget per step")
+    parser.add_argument("--keep-going", action="store_true", help="run every rate even after one falls behind")
+    parser.add_argument("--json", help="write step results to this file")
+    parser.add_argument("--headed", action="store_true", help="show the browser windows")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    tables = [t for t in args.tables.split(",") if t]
+    unknown = set(tables) - set(TABLES)
+    if unknown:
+        print(f"unknown tables: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+    rates = [float(r) for r in args.rates.split(",") if r]
+    results = asyncio.run(run(args.clients, rates, args.duration, tables, args.budget_ms,
+                              headless=not args.headed, stop_on_failure=not args.keep_going))
+    best = max_sustainable(results)
+    print(f"\nmax sustainable write rate: {best:g}/s" if best is not None else "\nno rate was sustainable")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"max_sustainable": best, "steps": [asdict(r) for r in results]}, fh, indent=2)
+    return 0 if best is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""Rendering benchmark for the Estoque page (``pages/Inventory.tsx``).
+
+TC012 scrolls the table twice and checks some text. This benchmark instead
+loads ``/inventory`` with 1k, 10k and 50k extra inventory rows and measures:
+
+* **scroll** - FPS and dropped frames while the page is wheel-scrolled, from
+  the ``DrawFrame``/``DroppedFrame`` events of a Chromium trace (falling
+  back to ``requestAnimationFrame`` intervals if the trace has none),
+* **search** - keystroke to next paint for each character typed into the
+  search box, which re-filters every item on each change,
+* **filter** - click to next paint for the category buttons
+  (``VIDEOMONITORAMENTO``, ``ELETRIFICAÇÃO``...).
+
+Rows are inserted through PostgREST with ``BENCH-`` SKUs and deleted again
+afterwards, so the benchmark works against :mod:`harness.standin` or a
+Supabase project whose key may write ``inventory``. The report shows how
+many rows the page actually received, which exposes a PostgREST
+``max-rows`` cap. :data:`DEFAULT_BUDGETS` (overridable with
+``TESTSPRITE_INVENTORY_BUDGETS``) fail the run::
+
+    python -m harness.inventory --rows 1000,10000,50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from .config import BASE_URL, TMP_DIR, supabase_settings
+from .locators import locate
+from .readiness import Readiness
+from .stats import format_summary, summarize
+
+DEFAULT_ROWS = (1_000, 10_000, 50_000)
+SKU_PREFIX = "BENCH-"
+SEARCH_QUERY = "camera"
+CATEGORIES = ("VIDEOMONITORAMENTO", "ELETRIFICAÇÃO", "COMPONENTES", "REDE")
+FRAME_MS = 1000 / 60
+TRACE_DIR = TMP_DIR / "profiles"
+
+# Applied to every row count.
+DEFAULT_BUDGETS: Dict[str, float] = {
+    "scroll_fps_min": 50,
+    "dropped_frames_pct_max": 10,
+    "search_p95_ms": 100,
+    "filter_p95_ms": 150,
+}
+
+# Input latency: event timestamp to the first task after the next frame,
+# i.e. after React has committed and the browser has painted.
+_LATENCY_INIT_SCRIPT = """
+window.__lat = [];
+window.__frames = [];
+for (const type of ['keydown', 'click']) {
+  document.addEventListener(type, (e) => {
+    const t0 = e.timeStamp;
+    requestAnimationFrame(() => setTimeout(() => window.__lat.push([type, performance.now() - t0]), 0));
+  }, true);
+}
+"""
+
+_RAF_START_JS = """
+() => {
+  window.__frames = [];
+  window.__recording = true;
+  const tick = (t) => { window.__frames.push(t); if (window.__recording) requestAnimationFrame(tick); };
+  requestAnimationFrame(tick);
+}
+"""
+
+
+@dataclass
+class SizeResult:
+    inserted: int
+    loaded_rows: Optional[int] = None
+    scroll: Dict[str, float] = field(default_factory=dict)
+    search: Dict[str, float] = field(default_factory=dict)
+    filter: Dict[str, float] = field(default_factory=dict)
+    trace: Optional[str] = None
+    violations: List[str] = field(default_factory=list)
+
+    def format(self) -> str:
+        s = self.scroll
+        lines = [
+            f"+{self.inserted:,} rows ({self.loaded_rows if self.loaded_rows is not None else '?'} loaded by the page)",
+            f"  scroll  {s.get('fps', 0):5.1f} fps, {s.get('dropped', 0):.0f}/{s.get('frames', 0) + s.get('dropped', 0):.0f} "
+            f"frames dropped ({s.get('dropped_pct', 0):.1f}%) [{s.get('source', '?')}]",
+            "  " + format_summary("keystroke -> paint", self.search),
+            "  " + format_summary("filter click -> paint", self.filter),
+        ]
+        lines += [f"  BUDGET: {v}" for v in self.violations]
+        return "\n".join(lines)
+
+
+def load_budgets() -> Dict[str, float]:
+    budgets = dict(DEFAULT_BUDGETS)
+    path = os.environ.get("TESTSPRITE_INVENTORY_BUDGETS")
+    if path:
+        with open(path, encoding="utf-8") as fh:
+            budgets.update(json.load(fh))
+    return budgets
+
+
+def check_budgets(result: SizeResult, budgets: Dict[str, float]) -> List[str]:
+    violations = []
+    if result.scroll.get("fps", 0) < budgets["scroll_fps_min"]:
+        violations.append(f"scroll {result.scroll.get('fps', 0):.1f} fps < {budgets['scroll_fps_min']:g}")
+    if result.scroll.get("dropped_pct", 100) > budgets["dropped_frames_pct_max"]:
+        violations.append(f"dropped frames {result.scroll.get('dropped_pct', 100):.1f}% > {budgets['dropped_frames_pct_max']:g}%")
+    for name, summary, limit in (("search", result.search, budgets["search_p95_ms"]),
+                                 ("filter", result.filter, budgets["filter_p95_ms"])):
+        p95 = summary.get("p95")
+        if p95 is None or p95 > limit:
+            violations.append(f"{name} p95 {'n/a' if p95 is None else f'{p95:.0f}ms'} > {limit:g}ms")
+    return violations
+
+
+class InventorySeeder:
+    """Inserts and removes ``BENCH-`` inventory rows over PostgREST."""
+
+    def __init__(self, request, batch_size: int = 1000):
+        url, key = supabase_settings()
+        self.request = request
+        self.endpoint = f"{url}/rest/v1/inventory"
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}", "Content-Type": "application/json",
+                        "Prefer": "return=minimal"}
+        self.batch_size = batch_size
+
+    async def insert(self, count: int, seed: int = 42) -> None:
+        from .schema import load_schema
+        from .seed import Generator
+
+        gen = Generator(load_schema(), seed=seed)
+        batch = []
+        for i in range(count):
+            row = gen.inventory(i)
+            row["sku"] = f"{SKU_PREFIX}{i:07d}"
+            batch.append(row)
+            if len(batch) == self.batch_size or i == count - 1:
+                response = await self.request.post(self.endpoint, headers=self.headers, data=json.dumps(batch, default=str))
+                if not response.ok:
+                    raise RuntimeError(f"insert inventory -> {response.status} {await response.text()}")
+                batch = []
+
+    async def clear(self) -> None:
+        response = await self.request.delete(f"{self.endpoint}?sku=like.{SKU_PREFIX}*", headers=self.headers)
+        if not response.ok:
+            raise RuntimeError(f"delete inventory -> {response.status} {await response.text()}")
+
+
+def frame_stats(trace: dict) -> Dict[str, float]:
+    """FPS and dropped frames from a Chromium trace's frame events."""
+    events = trace.get("traceEvents", trace if isinstance(trace, list) else [])
+    drawn = [e["ts"] for e in events if e.get("name") == "DrawFrame"]
+    dropped = sum(1 for e in events if e.get("name") == "DroppedFrame")
+    if len(drawn) < 2:
+        return {}
+    span_s = (max(drawn) - min(drawn)) / 1e6
+    return _frame_summary(len(drawn), dropped, span_s, "trace")
+
+
+def raf_stats(timestamps: Sequence[float]) -> Dict[str, float]:
+    """FPS and dropped frames from ``requestAnimationFrame`` timestamps (ms)."""
+    if len(timestamps) < 2:
+        return {}
+    intervals = [b - a for a, b in zip(timestamps, timestamps[1:])]
+    dropped = sum(max(0, round(i / FRAME_MS) - 1) for i in intervals)
+    return _frame_summary(len(timestamps), dropped, (timestamps[-1] - timestamps[0]) / 1000, "raf")
+
+
+def _frame_summary(frames: int, dropped: int, span_s: float, source: str) -> Dict[str, float]:
+    return {
+        "frames": frames,
+        "dropped": dropped,
+        # n frames span n - 1 intervals.
+        "fps": (frames - 1) / span_s if span_s else 0.0,
+        "dropped_pct": 100 * dropped / (frames + dropped) if frames + dropped else 0.0,
+        "source": source,
+    }
+
+
+async def _latencies(page, kind: str) -> List[float]:
+    entries = await page.evaluate("() => { const l = window.__lat; window.__lat = []; return l; }")
+    return [ms for t, ms in entries if t == kind]
+
+
+async def measure(pool, inserted: int, scroll_steps: int = 30) -> SizeResult:
+    result = SizeResult(inserted)
+    async with pool.context(role="admin") as context:
+        page = await context.new_page()
+        await page.add_init_script(_LATENCY_INIT_SCRIPT)
+        ready = Readiness(page, timeout_ms=120000)
+        async with page.expect_response(lambda r: "/rest/v1/inventory" in r.url and r.request.method == "GET",
+                                        timeout=120000) as info:
+            await ready.goto(BASE_URL + "/inventory", wait_until="commit")
+        body = await (await info.value).json()
+        result.loaded_rows = len(body) if isinstance(body, list) else None
+
+        TRACE_DIR.mkdir(parents=True, exist_ok=True)
+        trace_path = TRACE_DIR / f"inventory-{inserted}.trace.json"
+        await pool.browser.start_tracing(page=page, path=str(trace_path),
+                                         categories=["devtools.timeline", "disabled-by-default-devtools.timeline.frame"])
+        await page.evaluate(_RAF_START_JS)
+        await page.mouse.move(640, 500)
+        for _ in range(scroll_steps):
+            await page.mouse.wheel(0, 400)
+            await page.wait_for_timeout(50)
+        for _ in range(scroll_steps):
+            await page.mouse.wheel(0, -400)
+            await page.wait_for_timeout(50)
+        frames = await page.evaluate("() => { window.__recording = false; return window.__frames; }")
+        trace = json.loads(await pool.browser.stop_tracing())
+        result.trace = str(trace_path)
+        result.scroll = frame_stats(trace) or raf_stats(frames)
+
+        await _latencies(page, "keydown")
+        search = locate(page, "inventory.search").first
+        await search.click()
+        await page.keyboard.type(SEARCH_QUERY, delay=150)
+        await ready.network_idle()
+        result.search = summarize(await _latencies(page, "keydown"))
+        await search.fill("")
+
+        await _latencies(page, "click")
+        for name in CATEGORIES:
+            await locate(page, "inventory.category", name=name).first.click()
+            await page.wait_for_timeout(200)
+        await locate(page, "inventory.category.all").first.click()
+        await page.wait_for_timeout(200)
+        result.filter = summarize(await _latencies(page, "click"))
+    return result
+
+
+async def run(sizes: Sequence[int], budgets: Dict[str, float], headless: bool = True) -> List[SizeResult]:
+    from .pool import BrowserPool
+
+    results = []
+    async with BrowserPool(workers=2, headless=headless) as pool:
+        async with pool.context() as writer:
+            seeder = InventorySeeder(writer.request)
+            await seeder.clear()
+            for size in sizes:
+                try:
+                    await seeder.insert(size)
+                    result = await measure(pool, size)
+                finally:
+                    await seeder.clear()
+                result.violations = check_budgets(result, budgets)
+                results.append(result)
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark scrolling, search and category filters on /inventory.")
+    parser.add_argument("--rows", default=",".join(str(n) for n in DEFAULT_ROWS), help="comma-separated row counts to insert (default: 1000,10000,50000)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    sizes = [int(n) for n in args.rows.split(",") if n]
+    results = asyncio.run(run(sizes, load_budgets(), headless=not args.headed))
+    for result in results:
+        print(result.format())
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump([asdict(r) for r in results], fh, indent=2)
+    return 1 if any(r.violations for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
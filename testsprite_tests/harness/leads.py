@@ -0,0 +1,344 @@
+"""Load generator for the public lead-capture path.
+
+The Landing form (``hooks/useLeadCapture.ts`` and the quick quote in
+``pages/Landing.tsx``) calls the ``get_or_create_client_v1`` RPC with the
+anon key and then inserts an ``orders`` row with ``origin`` ``landing_*``.
+The Dashboard counts those rows as "LEADS HOJE". This module sends the same
+two requests straight to PostgREST, with up to ``--concurrency`` leads in
+flight (or an open-loop ``--rate``), and reports throughput, error rate and
+RPC, insert and end-to-end latency percentiles.
+
+Leads come in groups of ``--repeat`` submissions that share a phone number
+and are fired back to back, which is what the RPC's look-up-then-insert
+has to survive. The race check reports phones that got more than one
+client id back (duplicate clients) and RPC calls that failed with a unique
+violation. The stand-in runs store calls in worker threads, and its
+``get_or_create_client_v1`` looks up and inserts without a shared lock, so
+it can race too. Its SQLite store has no unique constraint on ``phone``,
+so there only duplicate clients show up; Postgres-backed Supabase (or the
+stand-in with ``--dsn``) also reports the unique violations.
+
+Load goes to ``--url`` (``TESTSPRITE_SUPABASE_URL``, else the local
+stand-in), never to the project in the app's ``.env`` unless it is named
+explicitly.
+
+``--browser-samples`` also submits the real form in a browser while the
+load runs, to show what a visitor sees; those go through the app at
+``BASE_URL`` and its own ``VITE_SUPABASE_URL``. Leads are tagged ``LOAD-<run>-``
+and deleted afterwards unless ``--keep`` is given (deleting needs a key
+that may delete ``orders`` and ``clients``)::
+
+    python -m harness.leads --leads 5000 --concurrency 200 --repeat 4
+    python -m harness.leads --leads 2000 --rate 100 --browser-samples 5
+    python -m harness.leads --url https://<project>.supabase.co --key <anon key>
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from .config import BASE_URL, STANDIN_URL
+from .stats import format_summary, summarize
+
+RPC = "get_or_create_client_v1"
+TAG = "LOAD"
+# Mirrors the two Landing flows: the lead modal and the quick quote.
+ORIGINS = ("landing_form", "landing_quick_quote")
+SERVICES = (("portao", "alta"), ("seguranca", "alta"), ("preventiva", "baixa"), ("outro", "media"))
+DEFAULT_MAX_ERROR_RATE = 0.01
+# Only an explicit target gets load; the stand-in accepts any apikey.
+DEFAULT_URL = os.environ.get("TESTSPRITE_SUPABASE_URL") or STANDIN_URL
+DEFAULT_KEY = os.environ.get("TESTSPRITE_SUPABASE_KEY") or "standin"
+UNIQUE_VIOLATION = "23505"
+
+# The quick quote opens wa.me on success; keep the sample on the page.
+_NO_POPUP_JS = "window.open = () => null;"
+
+
+@dataclass
+class Lead:
+    seq: int
+    name: str
+    phone: str
+    origin: str
+    service: str
+    priority: str
+    client_id: Optional[str] = None
+    rpc_ms: Optional[float] = None
+    insert_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+    # "rpc <status> <code>" or "insert <status> <code>"
+    error: Optional[str] = None
+
+
+@dataclass
+class BrowserSample:
+    continue_ms: Optional[float] = None
+    submit_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class LoadReport:
+    leads: int
+    concurrency: int
+    rate: Optional[float]
+    wall_s: float
+    ok: int
+    throughput: float
+    error_rate: float
+    rpc: Dict[str, float] = field(default_factory=dict)
+    insert: Dict[str, float] = field(default_factory=dict)
+    total: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    duplicate_clients: Dict[str, int] = field(default_factory=dict)
+    unique_violations: int = 0
+    browser: List[BrowserSample] = field(default_factory=list)
+    cleanup: Optional[str] = None
+
+    def format(self) -> str:
+        pace = f"{self.rate:g}/s open loop" if self.rate else f"{self.concurrency} in flight"
+        lines = [
+            f"{self.leads} leads ({pace}) in {self.wall_s:.1f}s: {self.ok} ok, "
+            f"{self.throughput:.1f} leads/s, {100 * self.error_rate:.2f}% errors",
+            format_summary("rpc " + RPC, self.rpc),
+            format_summary("orders insert", self.insert),
+            format_summary("lead end to end", self.total),
+        ]
+        lines += [f"  {count:6}x {error}" for error, count in sorted(self.errors.items(), key=lambda kv: -kv[1])]
+        if self.duplicate_clients:
+            lines.append(f"RACE: {len(self.duplicate_clients)} phones got several client ids "
+                         f"({sum(self.duplicate_clients.values())} clients in total)")
+        if self.unique_violations:
+            lines.append(f"RACE: {self.unique_violations} RPC calls failed with unique_violation ({UNIQUE_VIOLATION})")
+        if not self.duplicate_clients and not self.unique_violations:
+            lines.append("race check: one client id per phone, no unique violations")
+        if self.browser:
+            lines.append(format_summary("browser: continue -> step 2", summarize(s.continue_ms for s in self.browser if s.continue_ms is not None)))
+            lines.append(format_summary("browser: submit -> success", summarize(s.submit_ms for s in self.browser if s.submit_ms is not None)))
+            lines += [f"  browser ERROR {s.error}" for s in self.browser if s.error]
+        if self.cleanup:
+            lines.append(f"cleanup: {self.cleanup}")
+        return "\n".join(lines)
+
+
+def make_leads(count: int, repeat: int, run: str) -> List[Lead]:
+    """``count`` leads; each run of ``repeat`` consecutive ones shares a phone."""
+    leads = []
+    for seq in range(count):
+        group = seq // max(1, repeat)
+        service, priority = SERVICES[seq % len(SERVICES)]
+        leads.append(Lead(seq, f"{TAG}-{run}-{seq}", f"55{run}{group:06d}", ORIGINS[seq % len(ORIGINS)],
+                          service, priority))
+    return leads
+
+
+def order_row(lead: Lead) -> dict:
+    """The ``orders`` insert of ``submitLead``/``handleFinalSubmit``."""
+    return {
+        "client_id": lead.client_id,
+        "client_name": lead.name,
+        "service_type": lead.service,
+        "description": f"Solicitação via Landing Page. Serviços: {lead.service}. ",
+        "status": "nova",
+        "priority": lead.priority,
+        "origin": lead.origin,
+    }
+
+
+def _error(stage: str, status: int, body: bytes) -> str:
+    try:
+        code = json.loads(body).get("code") or ""
+    except (ValueError, AttributeError):
+        code = ""
+    return f"{stage} {status} {code}".strip()
+
+
+class LeadClient:
+    """Sends leads the way the Landing page does, with the anon key."""
+
+    def __init__(self, session, url: str, key: str):
+        self.session = session
+        self.base = f"{url}/rest/v1"
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}", "Content-Type": "application/json"}
+
+    async def submit(self, lead: Lead) -> Lead:
+        start = time.perf_counter()
+        args = {"p_name": lead.name, "p_phone": lead.phone, "p_type": "pf", "p_status": "active"}
+        try:
+            async with self.session.post(f"{self.base}/rpc/{RPC}", headers=self.headers, json=args) as response:
+                body = await response.read()
+            lead.rpc_ms = (time.perf_counter() - start) * 1000
+            if response.status >= 300:
+                lead.error = _error("rpc", response.status, body)
+                return lead
+            lead.client_id = json.loads(body)
+            if not lead.client_id:
+                lead.error = "rpc returned no client id"
+                return lead
+            mark = time.perf_counter()
+            async with self.session.post(f"{self.base}/orders", json=[order_row(lead)],
+                                         headers={**self.headers, "Prefer": "return=minimal"}) as response:
+                body = await response.read()
+            lead.insert_ms = (time.perf_counter() - mark) * 1000
+            if response.status >= 300:
+                lead.error = _error("insert", response.status, body)
+                return lead
+            lead.total_ms = (time.perf_counter() - start) * 1000
+        except Exception as exc:  # noqa: BLE001 - a failed lead is a data point
+            lead.error = f"{type(exc).__name__}: {exc}"
+        return lead
+
+    async def cleanup(self, run: str) -> str:
+        """Delete this run's orders, then its clients."""
+        removed = []
+        for table, column in (("orders", "client_name"), ("clients", "name")):
+            async with self.session.delete(f"{self.base}/{table}?{column}=like.{TAG}-{run}-*",
+                                           headers={**self.headers, "Prefer": "return=minimal"}) as response:
+                if response.status >= 300:
+                    return f"DELETE {table} -> {response.status} {(await response.text())[:200]}"
+            removed.append(table)
+        return f"deleted {TAG}-{run}-* from {' and '.join(removed)}"
+
+
+def race_check(leads: Sequence[Lead]) -> tuple:
+    """``({phone: distinct client ids}, unique violations)`` over the RPC results."""
+    ids: Dict[str, set] = {}
+    for lead in leads:
+        if lead.client_id:
+            ids.setdefault(lead.phone, set()).add(lead.client_id)
+    duplicates = {phone: len(found) for phone, found in ids.items() if len(found) > 1}
+    violations = sum(1 for lead in leads if lead.error and lead.error.startswith("rpc") and UNIQUE_VIOLATION in lead.error)
+    return duplicates, violations
+
+
+async def fire(client: LeadClient, leads: Sequence[Lead], concurrency: int, rate: Optional[float] = None) -> float:
+    """Submit ``leads`` (closed loop, or open loop at ``rate``); returns wall seconds."""
+    slots = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+
+    async def one(lead: Lead) -> None:
+        if rate:
+            await asyncio.sleep(max(0.0, start + lead.seq / rate - time.perf_counter()))
+        async with slots:
+            await client.submit(lead)
+
+    await asyncio.gather(*(one(lead) for lead in leads))
+    return time.perf_counter() - start
+
+
+async def sample_browser(pool, samples: int, run: str, stop: asyncio.Event) -> List[BrowserSample]:
+    """Submit the Landing quick quote ``samples`` times while the load runs."""
+    from .locators import locate
+
+    out = []
+    async with pool.context() as context:
+        await context.add_init_script(_NO_POPUP_JS)
+        page = await context.new_page()
+        alerts: List[str] = []
+
+        async def on_dialog(dialog) -> None:
+            alerts.append(dialog.message)
+            await dialog.dismiss()
+
+        page.on("dialog", on_dialog)
+        for i in range(samples):
+            if stop.is_set():
+                break
+            sample = BrowserSample()
+            try:
+                await page.goto(BASE_URL + "/", wait_until="domcontentloaded")
+                await locate(page, "landing.lead.name").fill(f"{TAG}-{run}-browser-{i}")
+                await locate(page, "landing.lead.whatsapp").fill(f"55{run}9{i:05d}")
+                start = time.perf_counter()
+                await locate(page, "landing.lead.continue").click()
+                await locate(page, "landing.lead.service", name="Portão Automático").wait_for(timeout=30000)
+                sample.continue_ms = (time.perf_counter() - start) * 1000
+                await locate(page, "landing.lead.service", name="Portão Automático").click()
+                start = time.perf_counter()
+                await locate(page, "landing.lead.submit").click()
+                await locate(page, "landing.lead.success").wait_for(timeout=30000)
+                sample.submit_ms = (time.perf_counter() - start) * 1000
+            except Exception as exc:  # noqa: BLE001 - report and keep sampling
+                sample.error = alerts.pop() if alerts else f"{type(exc).__name__}: {str(exc).splitlines()[0]}"
+            out.append(sample)
+    return out
+
+
+async def run(leads: int, concurrency: int, repeat: int, rate: Optional[float] = None, browser_samples: int = 0,
+              keep: bool = False, headless: bool = True, url: str = DEFAULT_URL, key: str = DEFAULT_KEY) -> LoadReport:
+    import aiohttp
+
+    url = url.rstrip("/")
+    tag = f"{int(time.time()) % 100000:05d}"
+    batch = make_leads(leads, repeat, tag)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        client = LeadClient(session, url, key)
+        samples: List[BrowserSample] = []
+        if browser_samples:
+            from .pool import BrowserPool
+
+            stop = asyncio.Event()
+            async with BrowserPool(workers=1, headless=headless) as pool:
+                sampler = asyncio.ensure_future(sample_browser(pool, browser_samples, tag, stop))
+                wall = await fire(client, batch, concurrency, rate)
+                stop.set()
+                samples = await sampler
+        else:
+            wall = await fire(client, batch, concurrency, rate)
+        cleanup = None if keep else await client.cleanup(tag)
+
+    ok = [lead for lead in batch if lead.error is None]
+    duplicates, violations = race_check(batch)
+    return LoadReport(
+        leads=leads, concurrency=concurrency, rate=rate, wall_s=wall, ok=len(ok),
+        throughput=len(ok) / wall if wall else 0.0,
+        error_rate=(leads - len(ok)) / leads if leads else 0.0,
+        rpc=summarize(lead.rpc_ms for lead in batch if lead.rpc_ms is not None),
+        insert=summarize(lead.insert_ms for lead in batch if lead.insert_ms is not None),
+        total=summarize(lead.total_ms for lead in ok),
+        errors=dict(Counter(lead.error for lead in batch if lead.error)),
+        duplicate_clients=duplicates, unique_violations=violations, browser=samples, cleanup=cleanup,
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Fire concurrent Landing lead submissions at the RPC and orders insert.")
+    parser.add_argument("--url", default=DEFAULT_URL,
+                        help=f"Supabase URL to load (default: $TESTSPRITE_SUPABASE_URL or the stand-in, {STANDIN_URL})")
+    parser.add_argument("--key", default=DEFAULT_KEY, help="anon key for --url (default: $TESTSPRITE_SUPABASE_KEY or 'standin')")
+    parser.add_argument("--leads", type=int, default=1000, help="submissions to send (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=100, help="submissions in flight (default: 100)")
+    parser.add_argument("--rate", type=float, help="open loop: start this many leads per second")
+    parser.add_argument("--repeat", type=int, default=4, help="consecutive submissions sharing a phone (default: 4)")
+    parser.add_argument("--browser-samples", type=int, default=0, help="real form submissions to time during the load")
+    parser.add_argument("--max-error-rate", type=float, default=DEFAULT_MAX_ERROR_RATE, help="fail above this error rate (default: 0.01)")
+    parser.add_argument("--keep", action="store_true", help="leave the LOAD-* clients and orders in place")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    report = asyncio.run(run(args.leads, args.concurrency, args.repeat, args.rate, args.browser_samples,
+                             args.keep, headless=not args.headed, url=args.url, key=args.key))
+    print(report.format())
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(asdict(report), fh, indent=2)
+    failed = report.error_rate > args.max_error_rate or report.duplicate_clients or report.unique_violations
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
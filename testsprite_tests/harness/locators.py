@@ -0,0 +1,274 @@
+"""Central registry of stable locators for the TestSprite cases.
+
+The generated cases used absolute XPaths (``html/body/div/div/...``) that
+walk the whole DOM and break silently on any layout change. Instead, every
+element a case touches is registered here under a ``<page>.<element>`` key
+and located by role, label, placeholder, test id or a short anchored CSS
+selector::
+
+    from harness.locators import locate
+
+    await ready.click(locate(page, "nav.inventory"))
+    await ready.click(locate(page, "inventory.category", name="VIDEOMONITORAMENTO"))
+
+Resolved ``Locator`` objects are cached per page. ``python -m
+harness.locators`` lints the TC files for leftover absolute XPaths.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import weakref
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import TESTS_DIR
+
+
+def _xpath_literal(text: str) -> str:
+    if "'" not in text:
+        return f"'{text}'"
+    if '"' not in text:
+        return f'"{text}"'
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in text.split("'")) + ")"
+
+
+@dataclass(frozen=True)
+class Target:
+    """How to find one element; ``value``/``name`` may hold ``{param}`` fields."""
+
+    strategy: str
+    value: str
+    name: Optional[str] = None
+    exact: bool = False
+
+    def format(self, **params) -> "Target":
+        if not params:
+            return self
+        return replace(
+            self,
+            value=self.value.format(**params),
+            name=self.name.format(**params) if self.name is not None else None,
+        )
+
+    def resolve(self, root):
+        if self.strategy == "role":
+            return root.get_by_role(self.value, name=self.name, exact=self.exact)
+        if self.strategy == "label":
+            return root.get_by_label(self.value, exact=self.exact)
+        if self.strategy == "placeholder":
+            return root.get_by_placeholder(self.value, exact=self.exact)
+        if self.strategy == "text":
+            return root.get_by_text(self.value, exact=self.exact)
+        if self.strategy == "test_id":
+            return root.get_by_test_id(self.value)
+        if self.strategy == "css":
+            return root.locator(self.value)
+        if self.strategy == "field":
+            # Form control following a <label> that is not linked via htmlFor.
+            return root.locator(
+                f"xpath=//label[normalize-space()={_xpath_literal(self.value)}]"
+                "/following::*[self::input or self::textarea or self::select][1]"
+            )
+        raise ValueError(f"unknown locator strategy {self.strategy!r}")
+
+
+def role(role_name: str, name: Optional[str] = None, exact: bool = False) -> Target:
+    return Target("role", role_name, name, exact)
+
+
+def label(text: str, exact: bool = False) -> Target:
+    return Target("label", text, exact=exact)
+
+
+def placeholder(text: str, exact: bool = False) -> Target:
+    return Target("placeholder", text, exact=exact)
+
+
+def text(value: str, exact: bool = False) -> Target:
+    return Target("text", value, exact=exact)
+
+
+def test_id(value: str) -> Target:
+    return Target("test_id", value)
+
+
+def css(selector: str) -> Target:
+    return Target("css", selector)
+
+
+def field(label_text: str) -> Target:
+    return Target("field", label_text)
+
+
+REGISTRY: Dict[str, Target] = {
+    # Admin sidebar. Linked by route so renamed labels ("Estoque" vs
+    # "Patrimônio" between the two dashboard themes) do not matter.
+    "nav.dashboard": css("aside a[href='/dashboard']"),
+    "nav.orders": css("aside a[href='/orders']"),
+    "nav.quotes": css("aside a[href='/quotes']"),
+    "nav.agenda": css("aside a[href='/agenda']"),
+    "nav.clients": css("aside a[href='/clients']"),
+    "nav.inventory": css("aside a[href='/inventory']"),
+    "nav.communication": css("aside a[href='/communication']"),
+    "nav.settings": css("aside a[href='/settings']"),
+    # Command-center top bar.
+    "topbar.search": placeholder("Busca global"),
+    "topbar.create_order": role("button", "Criar OS"),
+    "topbar.user": test_id("topbar-user"),
+    # Shared widgets.
+    "modal.close": role("button", "Fechar", exact=True),
+    "dashboard.activity_item": test_id("activity-item"),
+    "agenda.day": test_id("agenda-day"),
+    # Inventory.
+    "inventory.search": placeholder("PESQUISAR HARDWARE"),
+    "inventory.category": role("button", "{name}"),
+    "inventory.category.all": role("button", "Todos", exact=True),
+    "inventory.edit": role("button", "Editar", exact=True),
+    "inventory.form.quantity": field("Carga Inicial"),
+    "inventory.form.submit": role("button", "Validar Ativo"),
+    # /orders/new.
+    "create_order.client": label("Cliente"),
+    "create_order.service_type": label("Tipo de Serviço"),
+    "create_order.description": label("Descrição do Problema/Serviço"),
+    "create_order.technician": label("Técnico Atribuído"),
+    "create_order.priority": label("Prioridade"),
+    "create_order.save": role("button", "Salvar Ordem"),
+    "create_order.done.list": role("button", "Ver Lista de Ordens"),
+    # /orders/:id.
+    "orders.detail.signature": role("img", "Assinatura", exact=True),
+    # /clients and its create/edit modal.
+    "clients.new": role("button", "Cadastrar Novo"),
+    "clients.form.type": role("button", "{name}"),
+    "clients.form.document": placeholder("00.000.000/0000-00"),
+    "clients.form.name": placeholder("NOME OU RAZÃO SOCIAL"),
+    "clients.form.street": placeholder("Av. Paulista"),
+    "clients.form.city": placeholder("São Paulo", exact=True),
+    "clients.form.cancel": role("button", "Abortar"),
+    # /settings and the Agenda Boa import modal.
+    "settings.import": role("button", "Importar Agenda Boa"),
+    "import.file": css("input[type='file'][accept='.csv']"),
+    "import.submit": role("button", "registros"),
+    "import.done": text("Importação Concluída!"),
+    # /communication (admin chat).
+    "communication.contact": text("{name}", exact=True),
+    "communication.input": placeholder("Mensagem...", exact=True),
+    # Print previews (/orders/:id/print, /quotes/:id/print-config, /invoices/:id/print-config).
+    "print.paper": css(".quote-print-container"),
+    "print.invoice.paper": test_id("invoice-paper"),
+    "print.loading": text("Carregando...", exact=True),
+    # /login.
+    "login.username": css("form input[type='text']"),
+    "login.password": css("form input[type='password']"),
+    "login.remember": label("Lembrar de mim"),
+    "login.submit": css("form button[type='submit']"),
+    "login.request_quote": role("link", "Solicite uma proposta"),
+    # Technician mobile app (/mobile/*).
+    "mobile.login.username": placeholder("USUÁRIO", exact=True),
+    "mobile.login.password": placeholder("SENHA", exact=True),
+    "mobile.login.submit": css("form button[type='submit']"),
+    "mobile.tab": role("button", "{name}", exact=True),
+    "mobile.order_card": test_id("mobile-order-card"),
+    "mobile.order.checkin_notes": placeholder("Relate as condições iniciais"),
+    "mobile.order.checkin": role("button", "REGISTRAR CHECK-IN"),
+    "mobile.order.photo": css("input[type='file'][accept^='image']"),
+    "mobile.order.report": placeholder("Relate o que foi feito"),
+    "mobile.order.sign": role("button", "Assinar"),
+    "mobile.order.finish": role("button", "Finalizar Ordem"),
+    "mobile.signature.pad": css("canvas"),
+    "mobile.signature.confirm": role("button", "Confirmar", exact=True),
+    "mobile.chat.input": placeholder("Digite...", exact=True),
+    # Client portal (/client/*).
+    "client.chat.conversation": role("button", "Administrador Alfredo"),
+    "client.chat.input": placeholder("Escreva sua mensagem..."),
+    # Public landing page.
+    "landing.login": css("header a[href='/login']"),
+    "landing.nav.home": css("header a[href='#home']"),
+    "landing.nav.services": css("header a[href='#servicos']"),
+    "landing.nav.about": css("header a[href='#sobre']"),
+    "landing.lead.name": placeholder("Ex: João Silva"),
+    "landing.lead.whatsapp": placeholder("(81) 98841-7003"),
+    "landing.lead.continue": role("button", "Continuar Orçamento"),
+    "landing.lead.service": role("button", "{name}", exact=True),
+    "landing.lead.submit": role("button", "Peça um Orçamento Rápido"),
+    "landing.lead.success": text("Solicitação enviada com sucesso!"),
+    "landing.footer.home": css("footer a[href='#home']"),
+}
+
+
+class Locators:
+    """Per-page cache of resolved registry entries."""
+
+    def __init__(self, page, registry: Dict[str, Target] = REGISTRY):
+        self.page = page
+        self.registry = registry
+        self._cache: Dict[Tuple[str, tuple], object] = {}
+
+    def get(self, key: str, **params):
+        cache_key = (key, tuple(sorted(params.items())))
+        locator = self._cache.get(cache_key)
+        if locator is None:
+            try:
+                target = self.registry[key]
+            except KeyError:
+                raise KeyError(f"unknown locator {key!r}; add it to harness.locators.REGISTRY") from None
+            locator = self._cache[cache_key] = target.format(**params).resolve(self.page)
+        return locator
+
+    __getitem__ = get
+
+
+_per_page: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def locators_for(page) -> Locators:
+    """The :class:`Locators` cache bound to ``page`` (created on first use)."""
+    locators = _per_page.get(page)
+    if locators is None:
+        locators = _per_page[page] = Locators(page)
+    return locators
+
+
+def locate(page, key: str, **params):
+    """Shorthand for ``locators_for(page).get(key, **params)``."""
+    return locators_for(page).get(key, **params)
+
+
+# ``xpath=html/...`` or ``xpath=/html/...``; anchored ``//label[...]`` is fine.
+ABSOLUTE_XPATH = re.compile(r"""xpath=(?:/?html\b|/(?!/))""")
+
+
+def lint(paths: Optional[List[Path]] = None) -> List[Tuple[Path, int, str]]:
+    """Return ``(path, line number, line)`` for every absolute XPath in ``paths``."""
+    if paths is None:
+        paths = sorted(TESTS_DIR.glob("TC*.py"))
+    findings = []
+    for path in paths:
+        with open(path, encoding="utf-8") as fh:
+            for lineno, line in enumerate(fh, 1):
+                if ABSOLUTE_XPATH.search(line):
+                    findings.append((path, lineno, line.strip()))
+    return findings
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Lint TC files for absolute XPath locators.")
+    parser.add_argument("files", nargs="*", type=Path, help="files to check (default: all TC*.py)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    findings = lint(args.files or None)
+    for path, lineno, line in findings:
+        print(f"{path.name}:{lineno}: absolute XPath: {line}")
+    if findings:
+        print(f"\n{len(findings)} absolute XPath(s); register a stable locator in harness.locators.REGISTRY", file=sys.stderr)
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Page-load metrics for the dashboard performance case (TC001).
+
+Each sample navigates to a URL and records, relative to navigation start:
+
+* Navigation Timing (TTFB, DOMContentLoaded, load event),
+* paint timings (first paint, first contentful paint),
+* Largest Contentful Paint,
+* time until every KPI label (e.g. ``OS ATIVAS``) is visible in the DOM.
+
+Cold samples clear the HTTP cache through CDP before navigating; warm
+samples reuse it. :func:`check_budgets` compares percentiles against
+latency budgets and returns the violations; :func:`record` stores every
+sample with the running case's results.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from . import results
+from .stats import format_summary, summarize
+
+DASHBOARD_KPIS = ("OS ATIVAS", "FUNIL OPERACIONAL")
+
+# {phase: {metric: max p95 in ms}}. TC001 promises a 3-4 s dashboard.
+DEFAULT_BUDGETS: Dict[str, Dict[str, float]] = {
+    "cold": {"time_to_kpi": 4000, "lcp": 4000, "fcp": 2500},
+    "warm": {"time_to_kpi": 3000, "lcp": 3000, "fcp": 1500},
+}
+BUDGET_PERCENTILE = "p95"
+
+# Buffered observer so LCP entries emitted before we ask are not lost.
+_LCP_INIT_SCRIPT = """
+window.__lcp = 0;
+try {
+  new PerformanceObserver((list) => {
+    for (const e of list.getEntries()) window.__lcp = Math.max(window.__lcp, e.startTime);
+  }).observe({ type: 'largest-contentful-paint', buffered: true });
+} catch (e) {}
+"""
+
+_KPI_VISIBLE_JS = """
+(texts) => {
+  const body = document.body ? document.body.innerText.toUpperCase() : '';
+  return texts.every((t) => body.includes(t.toUpperCase())) ? performance.now() : false;
+}
+"""
+
+_TIMINGS_JS = """
+() => {
+  const nav = performance.getEntriesByType('navigation')[0];
+  const paint = Object.fromEntries(performance.getEntriesByType('paint').map((p) => [p.name, p.startTime]));
+  return {
+    ttfb: nav ? nav.responseStart : null,
+    dom_content_loaded: nav ? nav.domContentLoadedEventEnd : null,
+    load: nav ? nav.loadEventEnd : null,
+    fp: paint['first-paint'] ?? null,
+    fcp: paint['first-contentful-paint'] ?? null,
+    lcp: window.__lcp || null,
+  };
+}
+"""
+
+METRICS = ("ttfb", "dom_content_loaded", "load", "fp", "fcp", "lcp", "time_to_kpi")
+
+
+@dataclass
+class LoadSample:
+    phase: str
+    ttfb: Optional[float] = None
+    dom_content_loaded: Optional[float] = None
+    load: Optional[float] = None
+    fp: Optional[float] = None
+    fcp: Optional[float] = None
+    lcp: Optional[float] = None
+    time_to_kpi: Optional[float] = None
+
+
+@dataclass
+class LoadReport:
+    url: str
+    samples: List[LoadSample] = field(default_factory=list)
+
+    def values(self, phase: str, metric: str) -> List[float]:
+        return [getattr(s, metric) for s in self.samples if s.phase == phase and getattr(s, metric) is not None]
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        phases = sorted({s.phase for s in self.samples})
+        return {p: {m: summarize(self.values(p, m)) for m in METRICS} for p in phases}
+
+    def format(self) -> str:
+        lines = [f"Load metrics for {self.url}"]
+        for phase, metrics in self.summary().items():
+            lines.append(f"[{phase}]")
+            lines.extend("  " + format_summary(m, s) for m, s in metrics.items())
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps({"url": self.url, "samples": [asdict(s) for s in self.samples], "summary": self.summary()}, indent=2)
+
+
+async def sample(page, url: str, phase: str, kpi_texts: Sequence[str] = DASHBOARD_KPIS, timeout_ms: int = 30000, cdp=None) -> LoadSample:
+    """Navigate to ``url`` once and return its timings (ms from navigation start)."""
+    if phase == "cold":
+        cdp = cdp or await page.context.new_cdp_session(page)
+        await cdp.send("Network.clearBrowserCache")
+    await page.goto(url, wait_until="commit", timeout=timeout_ms)
+    handle = await page.wait_for_function(_KPI_VISIBLE_JS, arg=list(kpi_texts), timeout=timeout_ms, polling="raf")
+    time_to_kpi = await handle.json_value()
+    await page.wait_for_load_state("load", timeout=timeout_ms)
+    timings = await page.evaluate(_TIMINGS_JS)
+    return LoadSample(phase=phase, time_to_kpi=time_to_kpi, **timings)
+
+
+async def collect(page, url: str, cold_runs: int = 5, warm_runs: int = 5, kpi_texts: Sequence[str] = DASHBOARD_KPIS, timeout_ms: int = 30000) -> LoadReport:
+    """Run ``cold_runs`` cache-cleared loads followed by ``warm_runs`` cached loads."""
+    await page.add_init_script(_LCP_INIT_SCRIPT)
+    cdp = await page.context.new_cdp_session(page)
+    report = LoadReport(url=url)
+    for _ in range(cold_runs):
+        report.samples.append(await sample(page, url, "cold", kpi_texts, timeout_ms, cdp))
+    for _ in range(warm_runs):
+        report.samples.append(await sample(page, url, "warm", kpi_texts, timeout_ms))
+    return report
+
+
+def record(report: LoadReport) -> None:
+    """Add each sample to the running case as ``load.<phase>.<metric>``."""
+    for s in report.samples:
+        for metric in METRICS:
+            value = getattr(s, metric)
+            if value is not None:
+                results.record_metric(f"load.{s.phase}.{metric}", value)
+
+
+def load_budgets() -> Dict[str, Dict[str, float]]:
+    """``DEFAULT_BUDGETS`` overlaid with the JSON file in ``TESTSPRITE_BUDGETS``."""
+    budgets = {phase: dict(metrics) for phase, metrics in DEFAULT_BUDGETS.items()}
+    path = os.environ.get("TESTSPRITE_BUDGETS")
+    if path:
+        with open(path, encoding="utf-8") as fh:
+            for phase, metrics in json.load(fh).items():
+                budgets.setdefault(phase, {}).update(metrics)
+    return budgets
+
+
+def check_budgets(report: LoadReport, budgets: Optional[Dict[str, Dict[str, float]]] = None, pct: str = BUDGET_PERCENTILE) -> List[str]:
+    """Return one message per metric whose ``pct`` exceeds its budget."""
+    budgets = load_budgets() if budgets is None else budgets
+    summary = report.summary()
+    violations = []
+    for phase, metrics in budgets.items():
+        for metric, limit in metrics.items():
+            observed = summary.get(phase, {}).get(metric, {}).get(pct)
+            if observed is None:
+                violations.append(f"{phase} {metric}: no samples")
+            elif observed > limit:
+                violations.append(f"{phase} {metric} {pct}={observed:.0f}ms > budget {limit:.0f}ms")
+    return violations
@@ -0,0 +1,258 @@
+"""Technician mobile scenario under device, CPU and network throttling.
+
+TC005 runs at a desktop viewport on a full-speed connection and never goes
+offline. This stage emulates a mid-range Android phone instead:
+
+* a phone viewport with touch and a mobile user agent (:data:`DEVICES`),
+* CPU slowdown over CDP (``Emulation.setCPUThrottlingRate``, 4x default),
+* 3G / slow-4G / 4G network presets (``Network.emulateNetworkConditions``)
+  with the same latency and bandwidth as :mod:`harness.standin.profiles`,
+* a real ``context.set_offline(True)`` window, throttled again once back
+  online.
+
+It logs in as the technician (``TESTSPRITE_TECHNICIAN_USER``/``_PASSWORD``)
+and reports, per network preset:
+
+* time-to-interactive of ``/mobile/dashboard`` and ``/mobile/order/<id>``
+  (``MobileLayout`` and ``MobileOrderDetail``): the end of the last long
+  task before a ``--quiet-ms`` window with no long task and no Supabase
+  request in flight, but not before hydration,
+* resync after the offline window: how long until the realtime websocket
+  reconnects, and until an order edit made while the phone was offline is
+  on screen. A resync that never happens is reported as missing.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.mobile --network slow-4g,3g --offline-s 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from .auth import credentials
+from .config import BASE_URL, supabase_settings
+from .locators import locate
+from .readiness import Readiness
+from .standin.profiles import PROFILES
+
+DEVICES: Dict[str, dict] = {
+    # Galaxy A-series class phone.
+    "mid-android": {
+        "viewport": {"width": 412, "height": 915},
+        "device_scale_factor": 2.625,
+        "is_mobile": True,
+        "has_touch": True,
+        "user_agent": "Mozilla/5.0 (Linux; Android 13; SM-A145M) AppleWebKit/537.36 "
+                      "(KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36",
+    },
+    "small-android": {
+        "viewport": {"width": 360, "height": 640},
+        "device_scale_factor": 2,
+        "is_mobile": True,
+        "has_touch": True,
+        "user_agent": "Mozilla/5.0 (Linux; Android 11; moto e(7)) AppleWebKit/537.36 "
+                      "(KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36",
+    },
+}
+NETWORKS = ("none", "4g", "slow-4g", "3g")
+# Mobile uplinks are roughly half the downlink in these presets.
+UPLOAD_RATIO = 0.5
+
+DEFAULT_CPU_RATE = 4.0
+DEFAULT_QUIET_MS = 5000
+DEFAULT_OFFLINE_S = 15.0
+DEFAULT_BUDGETS = {"tti_ms": 8000, "resync_ms": 10000}
+
+_PROBE_INIT_SCRIPT = """
+window.__mobile = { longtasks: [], hydratedAt: null };
+try {
+  new PerformanceObserver((list) => {
+    for (const e of list.getEntries()) window.__mobile.longtasks.push(e.startTime + e.duration);
+  }).observe({ type: 'longtask', buffered: true });
+} catch (e) {}
+new MutationObserver(() => {
+  if (window.__mobile.hydratedAt === null && document.documentElement.dataset.hydrated === 'true') {
+    window.__mobile.hydratedAt = performance.now();
+  }
+}).observe(document.documentElement, { attributes: true, attributeFilter: ['data-hydrated'] });
+"""
+
+_STATE_JS = "() => ({ now: performance.now(), hydratedAt: window.__mobile.hydratedAt, lastLongTask: Math.max(0, ...window.__mobile.longtasks) })"
+
+
+@dataclass
+class MobileResult:
+    device: str
+    network: str
+    cpu_rate: float
+    tti_ms: Dict[str, Optional[float]] = field(default_factory=dict)
+    offline_s: float = 0.0
+    ws_reconnect_ms: Optional[float] = None
+    resync_ms: Optional[float] = None
+    violations: List[str] = field(default_factory=list)
+
+    def format(self) -> str:
+        def ms(v):
+            return f"{v:8.0f}ms" if v is not None else "   never"
+        lines = [f"{self.device} / {self.network} / {self.cpu_rate:g}x CPU"]
+        lines += [f"  TTI {path:<28} {ms(v)}" for path, v in self.tti_ms.items()]
+        lines.append(f"  after {self.offline_s:g}s offline: websocket back {ms(self.ws_reconnect_ms)}, "
+                     f"offline edit on screen {ms(self.resync_ms)}")
+        lines += [f"  BUDGET: {v}" for v in self.violations]
+        return "\n".join(lines)
+
+
+def network_conditions(name: str, offline: bool = False) -> dict:
+    """CDP ``Network.emulateNetworkConditions`` params for a preset."""
+    profile = PROFILES[name]
+    down = profile.bandwidth_kbps * 1000 / 8 if profile.bandwidth_kbps else -1
+    return {
+        "offline": offline,
+        "latency": profile.latency_ms,
+        "downloadThroughput": down,
+        "uploadThroughput": down * UPLOAD_RATIO if down > 0 else -1,
+    }
+
+
+async def throttle(context, page, network: str, cpu_rate: float):
+    """Apply CPU and network throttling to ``page``; returns the CDP session."""
+    session = await context.new_cdp_session(page)
+    await session.send("Emulation.setCPUThrottlingRate", {"rate": cpu_rate})
+    await session.send("Network.enable")
+    await session.send("Network.emulateNetworkConditions", network_conditions(network))
+    return session
+
+
+async def time_to_interactive(page, ready: Readiness, quiet_ms: float = DEFAULT_QUIET_MS, timeout_ms: float = 60000) -> Optional[float]:
+    """TTI of the current navigation in ms since navigation start, or None on timeout."""
+    deadline = time.monotonic() + timeout_ms / 1000
+    while time.monotonic() < deadline:
+        state = await page.evaluate(_STATE_JS)
+        if state["hydratedAt"] is not None and not ready.inflight:
+            settled = max(state["hydratedAt"], state["lastLongTask"])
+            if state["now"] - settled >= quiet_ms:
+                return settled
+        await asyncio.sleep(0.25)
+    return None
+
+
+async def technician_login(page, ready: Readiness) -> None:
+    user, password = credentials("technician")
+    await ready.goto(f"{BASE_URL}/mobile/login", wait_until="commit")
+    await ready.fill(locate(page, "mobile.login.username"), user)
+    await ready.fill(locate(page, "mobile.login.password"), password)
+    await ready.click(locate(page, "mobile.login.submit"))
+    await page.wait_for_url(re.compile(r"/mobile/dashboard"), timeout=60000)
+
+
+async def load(page, ready: Readiness, path: str, quiet_ms: float) -> Optional[float]:
+    await page.goto(BASE_URL + path, wait_until="commit", timeout=60000)
+    return await time_to_interactive(page, ready, quiet_ms)
+
+
+async def run_profile(pool, device: str, network: str, cpu_rate: float = DEFAULT_CPU_RATE,
+                      offline_s: float = DEFAULT_OFFLINE_S, quiet_ms: float = DEFAULT_QUIET_MS,
+                      budgets: Optional[Dict[str, float]] = None) -> MobileResult:
+    budgets = DEFAULT_BUDGETS if budgets is None else budgets
+    result = MobileResult(device, network, cpu_rate, offline_s=offline_s)
+    async with pool.context() as writer_ctx, pool.context(**DEVICES[device]) as context:
+        page = await context.new_page()
+        await page.add_init_script(_PROBE_INIT_SCRIPT)
+        ready = Readiness(page, timeout_ms=60000)
+        await technician_login(page, ready)
+        session = await throttle(context, page, network, cpu_rate)
+
+        result.tti_ms["/mobile/dashboard"] = await load(page, ready, "/mobile/dashboard", quiet_ms)
+        card = locate(page, "mobile.order_card").first
+        await card.wait_for(timeout=30000)
+        await card.click()
+        await page.wait_for_url(re.compile(r"/mobile/order/"), timeout=30000)
+        order_id = page.url.rstrip("/").rsplit("/", 1)[-1]
+        result.tti_ms["/mobile/order/<id>"] = await load(page, ready, f"/mobile/order/{order_id}", quiet_ms)
+
+        # Edit the open order from the backoffice while the phone is offline.
+        url, key = supabase_settings()
+        headers = {"apikey": key, "Authorization": f"Bearer {key}", "Content-Type": "application/json"}
+        rest = f"{url}/rest/v1/orders?id=eq.{order_id}"
+        original = (await (await writer_ctx.request.get(rest + "&select=client_name", headers=headers)).json())[0]["client_name"]
+        marker = f"{original} (sync {int(time.time()) % 100000})"
+        reconnected = asyncio.get_running_loop().create_future()
+
+        def on_websocket(ws):
+            if "/realtime/" in ws.url and not reconnected.done():
+                reconnected.set_result(time.perf_counter())
+
+        try:
+            await context.set_offline(True)
+            await writer_ctx.request.patch(rest, headers=headers, data=json.dumps({"client_name": marker}))
+            await asyncio.sleep(offline_s)
+            page.on("websocket", on_websocket)
+            back_online = time.perf_counter()
+            await context.set_offline(False)
+            # set_offline resets the page's network conditions; throttle again.
+            await session.send("Network.emulateNetworkConditions", network_conditions(network))
+            try:
+                await page.get_by_text(marker).first.wait_for(timeout=budgets["resync_ms"] * 3)
+                result.resync_ms = (time.perf_counter() - back_online) * 1000
+            except Exception:  # noqa: BLE001 - never resynced is a result, not a crash
+                pass
+            if reconnected.done():
+                result.ws_reconnect_ms = (reconnected.result() - back_online) * 1000
+        finally:
+            await writer_ctx.request.patch(rest, headers=headers, data=json.dumps({"client_name": original}))
+
+    for path, tti in result.tti_ms.items():
+        if tti is None or tti > budgets["tti_ms"]:
+            result.violations.append(f"TTI {path} {'never reached' if tti is None else f'{tti:.0f}ms'} > {budgets['tti_ms']:.0f}ms")
+    if result.resync_ms is None or result.resync_ms > budgets["resync_ms"]:
+        observed = "never" if result.resync_ms is None else f"{result.resync_ms:.0f}ms"
+        result.violations.append(f"resync {observed} > {budgets['resync_ms']:.0f}ms")
+    return result
+
+
+async def run(device: str, networks: Sequence[str], cpu_rate: float, offline_s: float, quiet_ms: float,
+              headless: bool = True) -> List[MobileResult]:
+    from .pool import BrowserPool
+
+    async with BrowserPool(workers=2, headless=headless) as pool:
+        return [await run_profile(pool, device, n, cpu_rate, offline_s, quiet_ms) for n in networks]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Technician mobile scenario under CPU/network throttling and offline windows.")
+    parser.add_argument("--device", choices=sorted(DEVICES), default="mid-android", help="emulated phone (default: mid-android)")
+    parser.add_argument("--network", default="slow-4g,3g", help=f"comma-separated presets from {', '.join(NETWORKS)} (default: slow-4g,3g)")
+    parser.add_argument("--cpu", type=float, default=DEFAULT_CPU_RATE, help="CPU slowdown factor (default: 4)")
+    parser.add_argument("--offline-s", type=float, default=DEFAULT_OFFLINE_S, help="length of the offline window (default: 15)")
+    parser.add_argument("--quiet-ms", type=float, default=DEFAULT_QUIET_MS, help="quiet window that ends TTI (default: 5000)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    networks = [n for n in args.network.split(",") if n]
+    unknown = set(networks) - set(NETWORKS)
+    if unknown:
+        print(f"unknown network presets: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+    results = asyncio.run(run(args.device, networks, args.cpu, args.offline_s, args.quiet_ms, headless=not args.headed))
+    for result in results:
+        print(result.format())
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump([asdict(r) for r in results], fh, indent=2)
+    return 1 if any(r.violations for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
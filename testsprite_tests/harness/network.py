@@ -0,0 +1,302 @@
+"""Network capture for the app's initial hydration.
+
+``AppContext.fetchData`` issues one ``select('*')`` per table on login. This
+module records every Supabase request made until the page is hydrated
+(``<html data-hydrated="true">`` plus network idle) and reports, per
+endpoint: request count, rows returned, decoded and on-the-wire bytes, TTFB
+and duration. :func:`check_budgets` gates total bytes, request count and
+hydration time against absolute budgets and, optionally, against a saved
+baseline so over-fetching regressions fail loudly.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.network --runs 3 --save-baseline tmp/network-baseline.json
+    python -m harness.network --runs 3 --baseline tmp/network-baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, urlparse
+
+from .config import BASE_URL
+from .readiness import SUPABASE_PATHS, Readiness
+from .stats import format_summary, summarize
+
+# Totals for one hydration of /dashboard (median over runs).
+DEFAULT_BUDGETS: Dict[str, float] = {
+    "bytes": 5 * 1024 * 1024,
+    "requests": 40,
+    "hydration_ms": 4000,
+}
+# Allowed growth over a saved baseline before the gate fails.
+DEFAULT_TOLERANCE = 0.10
+
+# Same marker as readiness.HYDRATED_SELECTOR, but returns when it was set.
+_HYDRATED_AT_JS = "() => document.documentElement.dataset.hydrated === 'true' ? performance.now() : false"
+
+
+@dataclass
+class RequestSample:
+    endpoint: str
+    method: str
+    status: int
+    url: str
+    rows: Optional[int] = None
+    bytes: int = 0
+    transfer_bytes: int = 0
+    ttfb: Optional[float] = None
+    duration: Optional[float] = None
+    embeds: int = 0
+
+
+@dataclass
+class HydrationRun:
+    url: str
+    hydration_ms: Optional[float] = None
+    requests: List[RequestSample] = field(default_factory=list)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(r.bytes for r in self.requests)
+
+    @property
+    def total_transfer(self) -> int:
+        return sum(r.transfer_bytes for r in self.requests)
+
+    @property
+    def total_rows(self) -> int:
+        return sum(r.rows or 0 for r in self.requests)
+
+
+def endpoint_of(url: str) -> str:
+    """Group key for a Supabase URL: ``rest:orders``, ``rpc:fn``, ``auth:user``..."""
+    path = urlparse(url).path
+    for prefix, kind in (("/rest/v1/rpc/", "rpc"), ("/rest/v1/", "rest"), ("/auth/v1/", "auth"), ("/storage/v1/", "storage")):
+        if prefix in path:
+            return f"{kind}:{path.split(prefix, 1)[1].split('/', 1)[0]}"
+    return path
+
+
+def _rows_from_range(header: Optional[str]) -> Optional[int]:
+    # PostgREST: "0-99/*" or "0-99/1234"; "*/0" for an empty result.
+    if not header:
+        return None
+    span = header.split("/", 1)[0]
+    if span == "*":
+        return 0
+    lo, _, hi = span.partition("-")
+    try:
+        return int(hi) - int(lo) + 1
+    except ValueError:
+        return None
+
+
+class NetworkCapture:
+    """Records Supabase requests finished on ``page`` while active."""
+
+    def __init__(self, page, paths: Sequence[str] = SUPABASE_PATHS):
+        self.page = page
+        self.paths = tuple(paths)
+        self.samples: List[RequestSample] = []
+        self._pending: set = set()
+        self._active = False
+        page.on("requestfinished", self._on_finished)
+
+    def start(self) -> None:
+        self.samples = []
+        self._active = True
+
+    async def stop(self) -> List[RequestSample]:
+        self._active = False
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        return self.samples
+
+    def _on_finished(self, request) -> None:
+        if not self._active or request.method == "OPTIONS" or not any(p in request.url for p in self.paths):
+            return
+        task = asyncio.ensure_future(self._record(request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _record(self, request) -> None:
+        response = await request.response()
+        if response is None:
+            return
+        timing = request.timing
+        sizes = await request.sizes()
+        body = await response.body()
+        rows = _rows_from_range(await response.header_value("content-range"))
+        if rows is None and body[:1] in (b"[", b"{"):
+            try:
+                data = json.loads(body)
+                rows = len(data) if isinstance(data, list) else 1
+            except ValueError:
+                pass
+        select = parse_qs(urlparse(request.url).query).get("select", [""])[0]
+        self.samples.append(RequestSample(
+            endpoint=endpoint_of(request.url),
+            method=request.method,
+            status=response.status,
+            url=request.url,
+            rows=rows,
+            bytes=len(body),
+            transfer_bytes=sizes["responseBodySize"] + sizes["responseHeadersSize"],
+            ttfb=timing["responseStart"] - timing["requestStart"] if timing["responseStart"] >= 0 else None,
+            duration=timing["responseEnd"] if timing["responseEnd"] >= 0 else None,
+            embeds=select.count("("),
+        ))
+
+
+async def capture_hydration(page, url: str, timeout_ms: int = 30000) -> HydrationRun:
+    """Load ``url`` in ``page`` and capture Supabase traffic until hydrated."""
+    capture = NetworkCapture(page)
+    ready = Readiness(page, timeout_ms=timeout_ms)
+    capture.start()
+    await page.goto(url, wait_until="commit", timeout=timeout_ms)
+    handle = await page.wait_for_function(_HYDRATED_AT_JS, timeout=timeout_ms, polling="raf")
+    hydration_ms = await handle.json_value()
+    await ready.network_idle()
+    return HydrationRun(url=url, hydration_ms=hydration_ms, requests=await capture.stop())
+
+
+@dataclass
+class HydrationReport:
+    runs: List[HydrationRun] = field(default_factory=list)
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        return {
+            "bytes": summarize(r.total_bytes for r in self.runs),
+            "transfer_bytes": summarize(r.total_transfer for r in self.runs),
+            "rows": summarize(r.total_rows for r in self.runs),
+            "requests": summarize(len(r.requests) for r in self.runs),
+            "hydration_ms": summarize(r.hydration_ms for r in self.runs if r.hydration_ms is not None),
+        }
+
+    def by_endpoint(self) -> Dict[str, Dict[str, float]]:
+        """Per-endpoint averages per run, sorted by decoded bytes."""
+        n = max(1, len(self.runs))
+        groups: Dict[str, List[RequestSample]] = {}
+        for run in self.runs:
+            for s in run.requests:
+                groups.setdefault(s.endpoint, []).append(s)
+        table = {}
+        for endpoint, samples in groups.items():
+            total_bytes = sum(s.bytes for s in samples) / n
+            rows = sum(s.rows or 0 for s in samples) / n
+            table[endpoint] = {
+                "requests": len(samples) / n,
+                "rows": rows,
+                "bytes": total_bytes,
+                "transfer_bytes": sum(s.transfer_bytes for s in samples) / n,
+                "bytes_per_row": total_bytes / rows if rows else 0.0,
+                "embeds": max(s.embeds for s in samples),
+                "ttfb_p50": summarize(s.ttfb for s in samples if s.ttfb is not None).get("p50", 0.0),
+                "duration_p50": summarize(s.duration for s in samples if s.duration is not None).get("p50", 0.0),
+            }
+        return dict(sorted(table.items(), key=lambda kv: kv[1]["bytes"], reverse=True))
+
+    def format(self) -> str:
+        lines = [
+            f"{'endpoint':<28} {'reqs':>5} {'rows':>8} {'KiB':>9} {'wire KiB':>9} {'B/row':>7} {'ttfb':>7} {'dur':>7}",
+        ]
+        for endpoint, e in self.by_endpoint().items():
+            lines.append(
+                f"{endpoint:<28} {e['requests']:5.1f} {e['rows']:8.0f} {e['bytes'] / 1024:9.1f} "
+                f"{e['transfer_bytes'] / 1024:9.1f} {e['bytes_per_row']:7.0f} {e['ttfb_p50']:7.1f} {e['duration_p50']:7.1f}"
+            )
+        lines.append("")
+        for name, summary in self.totals().items():
+            lines.append(format_summary(name, summary, unit="ms" if name == "hydration_ms" else ""))
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "totals": self.totals(),
+            "endpoints": self.by_endpoint(),
+            "runs": [asdict(r) for r in self.runs],
+        }, indent=2)
+
+
+def load_budgets() -> Dict[str, float]:
+    """``DEFAULT_BUDGETS`` overlaid with the JSON file in ``TESTSPRITE_NETWORK_BUDGETS``."""
+    budgets = dict(DEFAULT_BUDGETS)
+    path = os.environ.get("TESTSPRITE_NETWORK_BUDGETS")
+    if path:
+        with open(path, encoding="utf-8") as fh:
+            budgets.update(json.load(fh))
+    return budgets
+
+
+def check_budgets(report: HydrationReport, budgets: Optional[Dict[str, float]] = None,
+                  baseline: Optional[dict] = None, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Return one message per total (median over runs) over budget or baseline."""
+    budgets = load_budgets() if budgets is None else budgets
+    totals = report.totals()
+    violations = []
+    for metric, limit in budgets.items():
+        observed = totals.get(metric, {}).get("p50")
+        if observed is None:
+            violations.append(f"{metric}: no samples")
+        elif observed > limit:
+            violations.append(f"{metric} p50={observed:.0f} > budget {limit:.0f}")
+    if baseline:
+        for metric, summary in baseline.get("totals", {}).items():
+            before, after = summary.get("p50"), totals.get(metric, {}).get("p50")
+            if before and after is not None and after > before * (1 + tolerance):
+                violations.append(f"{metric} p50={after:.0f} regressed {100 * (after / before - 1):.0f}% over baseline {before:.0f}")
+    return violations
+
+
+async def profile(url: str, runs: int = 3, role: str = "admin", headless: bool = True) -> HydrationReport:
+    """Hydrate ``url`` ``runs`` times, each in a fresh logged-in context."""
+    from .pool import BrowserPool
+
+    report = HydrationReport()
+    async with BrowserPool(workers=1, headless=headless) as pool:
+        for _ in range(runs):
+            async with pool.context(role=role) as context:
+                page = await context.new_page()
+                report.runs.append(await capture_hydration(page, url))
+    return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Profile Supabase traffic during app hydration.")
+    parser.add_argument("--path", default="/dashboard", help="app route to load (default: /dashboard)")
+    parser.add_argument("--runs", type=int, default=3, help="fresh-context loads to sample (default: 3)")
+    parser.add_argument("--role", default="admin", help="cached login role (default: admin)")
+    parser.add_argument("--baseline", help="fail when totals grow beyond --tolerance over this report")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed growth over baseline (default: 0.10)")
+    parser.add_argument("--save-baseline", help="write this run's report as the new baseline")
+    parser.add_argument("--json", help="write the full report to this file")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    report = asyncio.run(profile(BASE_URL + args.path, args.runs, args.role, headless=not args.headed))
+    print(report.format())
+    for path in filter(None, (args.json, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(report.to_json())
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    violations = check_budgets(report, baseline=baseline, tolerance=args.tolerance)
+    for v in violations:
+        print(f"BUDGET: {v}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
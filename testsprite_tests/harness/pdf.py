@@ -0,0 +1,328 @@
+"""Batch PDF renderer for service orders, quotes and invoices.
+
+``ServiceOrderPrintConfig.tsx`` (``/orders/:id/print``) and
+``QuotePrintConfig.tsx`` (``/quotes/:id/print-config``) preview a report and
+leave the PDF to ``window.print()``. So does the downloader's
+``InvoicePrintConfig.tsx`` (``/invoices/:id/print-config``). This module
+renders those same pages to PDF with Playwright's ``page.pdf()``, which
+applies the pages' ``@media print`` rules like the print dialog does.
+Documents are spread over ``--workers`` admin contexts. That makes it a bulk
+export (``--month`` for month end) and a template benchmark.
+
+Each context hydrates ``AppContext`` once. With the default
+``--navigation spa``, each document after that is a client-side route
+change: a hop to a blank route unmounts the previous report, then the
+report's route is pushed. ``--navigation reload`` does a full ``goto`` per
+document, which includes a new ``fetchData``. Per document, the report
+records render time (route change until the paper is on screen with its
+fonts and images), ``page.pdf()`` time, size and page count. Reports that
+time out are listed. So are reports the app never loaded: PostgREST's
+``max-rows`` can leave them out of ``AppContext``. ``page.pdf()`` only works
+in headless Chromium. ``InvoicePaper`` still prints placeholder data, so
+invoices measure the template, not their own content::
+
+    python -m harness.pdf orders --month 2026-09 --workers 6
+    python -m harness.pdf quotes --limit 500 --no-save --json tmp/pdf-quotes.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .config import BASE_URL, TMP_DIR, supabase_settings
+from .locators import locate
+from .readiness import Readiness
+from .stats import format_summary, summarize
+
+PDF_DIR = TMP_DIR / "pdf"
+DEFAULT_WORKERS = 4
+DEFAULT_DOC_TIMEOUT_MS = 15000
+NAVIGATIONS = ("spa", "reload")
+# Not a route: AppLayout renders no page, so the previous report unmounts.
+BLANK_PATH = "/__pdf"
+PAGE_SIZE = 1000
+SLOWEST = 5
+
+# kind -> (table, print route, paper locator)
+KINDS: Dict[str, tuple] = {
+    "orders": ("orders", "/orders/{id}/print", "print.paper"),
+    "quotes": ("quotes", "/quotes/{id}/print-config", "print.paper"),
+    "invoices": ("invoices", "/invoices/{id}/print-config", "print.invoice.paper"),
+}
+
+DEFAULT_BUDGETS: Dict[str, float] = {
+    "doc_p95_ms": 3000,
+}
+
+# React Router's BrowserRouter follows popstate.
+_NAVIGATE_JS = "(path) => { history.pushState({}, '', path); dispatchEvent(new PopStateEvent('popstate')); }"
+
+_ASSETS_JS = """
+async () => {
+  await document.fonts.ready;
+  await Promise.all([...document.images].map((img) => img.complete ? null : img.decode().catch(() => null)));
+}
+"""
+
+_PAGE_OBJECT = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+@dataclass
+class DocResult:
+    kind: str
+    id: str
+    render_ms: Optional[float] = None
+    pdf_ms: Optional[float] = None
+    bytes: int = 0
+    pages: int = 0
+    path: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def total_ms(self) -> float:
+        return (self.render_ms or 0) + (self.pdf_ms or 0)
+
+
+@dataclass
+class BatchReport:
+    kind: str
+    navigation: str
+    workers: int
+    docs: int
+    wall_s: float = 0.0
+    render: Dict[str, float] = field(default_factory=dict)
+    pdf: Dict[str, float] = field(default_factory=dict)
+    total: Dict[str, float] = field(default_factory=dict)
+    size_kib: Dict[str, float] = field(default_factory=dict)
+    pages: int = 0
+    failed: List[DocResult] = field(default_factory=list)
+    slowest: List[DocResult] = field(default_factory=list)
+    violations: List[str] = field(default_factory=list)
+
+    @property
+    def docs_per_s(self) -> float:
+        done = self.docs - len(self.failed)
+        return done / self.wall_s if self.wall_s else 0.0
+
+    def format(self) -> str:
+        lines = [
+            f"{self.kind}: {self.docs - len(self.failed)}/{self.docs} PDFs, {self.pages} pages in {self.wall_s:.1f}s "
+            f"({self.docs_per_s:.1f} docs/s, {self.workers} contexts, {self.navigation} navigation)",
+            "  " + format_summary("render ms", self.render),
+            "  " + format_summary("page.pdf ms", self.pdf),
+            "  " + format_summary("document ms", self.total),
+            "  " + format_summary("size KiB", self.size_kib),
+        ]
+        lines += [f"  slow  {d.total_ms:7.0f}ms  {d.id}  ({d.pages} pages, {d.bytes / 1024:.0f} KiB)" for d in self.slowest]
+        lines += [f"  FAIL  {d.id}: {d.error}" for d in self.failed[:10]]
+        if len(self.failed) > 10:
+            lines.append(f"  ... and {len(self.failed) - 10} more failures")
+        lines += [f"  BUDGET: {v}" for v in self.violations]
+        return "\n".join(lines)
+
+
+def load_budgets() -> Dict[str, float]:
+    budgets = dict(DEFAULT_BUDGETS)
+    path = os.environ.get("TESTSPRITE_PDF_BUDGETS")
+    if path:
+        with open(path, encoding="utf-8") as fh:
+            budgets.update(json.load(fh))
+    return budgets
+
+
+def check_budgets(report: BatchReport, budgets: Dict[str, float]) -> List[str]:
+    violations = []
+    p95 = report.total.get("p95")
+    if p95 is None or p95 > budgets["doc_p95_ms"]:
+        violations.append(f"document p95 {'n/a' if p95 is None else f'{p95:.0f}ms'} > {budgets['doc_p95_ms']:g}ms")
+    if report.failed:
+        violations.append(f"{len(report.failed)} documents failed")
+    return violations
+
+
+def page_count(pdf: bytes) -> int:
+    return len(_PAGE_OBJECT.findall(pdf))
+
+
+def month_range(month: str) -> tuple:
+    """``YYYY-MM`` -> ISO dates of its first day and of the next month's."""
+    start = date.fromisoformat(f"{month}-01")
+    end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start.isoformat(), end.isoformat()
+
+
+async def document_ids(request, kind: str, month: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+    """Ids of ``kind``, newest first, paged past PostgREST's ``max-rows``."""
+    url, key = supabase_settings()
+    headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+    query = f"{url}/rest/v1/{KINDS[kind][0]}?select=id&order=created_at.desc,id.asc"
+    if month:
+        start, end = month_range(month)
+        query += f"&created_at=gte.{start}&created_at=lt.{end}"
+    ids: List[str] = []
+    while limit is None or len(ids) < limit:
+        size = PAGE_SIZE if limit is None else min(PAGE_SIZE, limit - len(ids))
+        response = await request.get(f"{query}&limit={size}&offset={len(ids)}", headers=headers)
+        if not response.ok:
+            raise RuntimeError(f"list {kind} -> {response.status} {await response.text()}")
+        rows = await response.json()
+        ids += [str(r["id"]) for r in rows]
+        if len(rows) < size:
+            break
+    return ids
+
+
+class Renderer:
+    """One context's page, turned into PDFs one document at a time."""
+
+    def __init__(self, page, kind: str, navigation: str = "spa", out_dir: Optional[Path] = None,
+                 timeout_ms: float = DEFAULT_DOC_TIMEOUT_MS):
+        self.page = page
+        self.kind = kind
+        self.navigation = navigation
+        self.out_dir = out_dir
+        self.timeout_ms = timeout_ms
+        self.ready = Readiness(page, timeout_ms=180000)
+        self.paper = locate(page, KINDS[kind][2]).first
+
+    async def start(self) -> None:
+        """Hydrate AppContext once for the SPA navigation."""
+        if self.navigation == "spa":
+            await self.page.goto(BASE_URL + BLANK_PATH, wait_until="commit")
+            await self.ready.settle()
+
+    async def render(self, doc_id: str) -> DocResult:
+        result = DocResult(self.kind, doc_id)
+        route = KINDS[self.kind][1].format(id=doc_id)
+        try:
+            if self.navigation == "spa":
+                await self.page.evaluate(_NAVIGATE_JS, BLANK_PATH)
+                await self.paper.wait_for(state="detached", timeout=self.timeout_ms)
+                start = time.perf_counter()
+                await self.page.evaluate(_NAVIGATE_JS, route)
+            else:
+                start = time.perf_counter()
+                await self.page.goto(BASE_URL + route, wait_until="commit")
+                await self.ready.settle()
+            try:
+                await self.paper.wait_for(timeout=self.timeout_ms)
+            except Exception:  # noqa: BLE001 - report why the paper never showed
+                loading = await locate(self.page, "print.loading").count()
+                result.error = "not loaded by the app (PostgREST max-rows?)" if loading else "timed out waiting for the report"
+                return result
+            await self.page.evaluate(_ASSETS_JS)
+            rendered = time.perf_counter()
+            pdf = await self.page.pdf(prefer_css_page_size=True, print_background=True)
+            result.pdf_ms = (time.perf_counter() - rendered) * 1000
+            result.render_ms = (rendered - start) * 1000
+        except Exception as exc:  # noqa: BLE001 - one bad document must not stop the batch
+            result.error = str(exc).splitlines()[0]
+            return result
+        result.bytes = len(pdf)
+        result.pages = page_count(pdf)
+        if self.out_dir is not None:
+            path = self.out_dir / f"{doc_id}.pdf"
+            path.write_bytes(pdf)
+            result.path = str(path)
+        return result
+
+
+async def render_batch(pool, kind: str, ids: Sequence[str], navigation: str = "spa", out_dir: Optional[Path] = None,
+                       timeout_ms: float = DEFAULT_DOC_TIMEOUT_MS) -> Tuple[BatchReport, List[DocResult]]:
+    """Render ``ids`` over the pool's contexts, all pulling from one queue."""
+    if out_dir is not None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+    queue: asyncio.Queue = asyncio.Queue()
+    for doc_id in ids:
+        queue.put_nowait(doc_id)
+    results: List[DocResult] = []
+
+    async def worker() -> None:
+        async with pool.context(role="admin") as context:
+            renderer = Renderer(await context.new_page(), kind, navigation, out_dir, timeout_ms)
+            await renderer.start()
+            while not queue.empty():
+                results.append(await renderer.render(queue.get_nowait()))
+                if len(results) % 100 == 0:
+                    print(f"{kind}: {len(results)}/{len(ids)}", file=sys.stderr, flush=True)
+
+    report = BatchReport(kind, navigation, min(pool.workers, len(ids)), len(ids))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(report.workers)))
+    report.wall_s = time.perf_counter() - start
+
+    done = [r for r in results if r.error is None]
+    report.failed = [r for r in results if r.error is not None]
+    report.render = summarize(r.render_ms for r in done)
+    report.pdf = summarize(r.pdf_ms for r in done)
+    report.total = summarize(r.total_ms for r in done)
+    report.size_kib = summarize(r.bytes / 1024 for r in done)
+    report.pages = sum(r.pages for r in done)
+    report.slowest = sorted(done, key=lambda r: -r.total_ms)[:SLOWEST]
+    return report, results
+
+
+async def run(kind: str, ids: Sequence[str], month: Optional[str] = None, limit: Optional[int] = None,
+              workers: int = DEFAULT_WORKERS, navigation: str = "spa", out_dir: Optional[Path] = None,
+              timeout_ms: float = DEFAULT_DOC_TIMEOUT_MS) -> Tuple[BatchReport, List[DocResult]]:
+    from .pool import BrowserPool
+
+    # page.pdf() is headless-only.
+    async with BrowserPool(workers=workers, headless=True) as pool:
+        if not ids:
+            async with pool.context() as lister:
+                ids = await document_ids(lister.request, kind, month, limit)
+        if not ids:
+            raise RuntimeError(f"no {kind} to render" + (f" in {month}" if month else ""))
+        return await render_batch(pool, kind, ids, navigation, out_dir, timeout_ms)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Render service orders, quotes or invoices to PDF in bulk with page.pdf().")
+    parser.add_argument("kind", choices=sorted(KINDS), help="document type")
+    parser.add_argument("ids", nargs="*", help="document ids (default: all, newest first)")
+    parser.add_argument("--month", help="only documents created in this month (YYYY-MM)")
+    parser.add_argument("--limit", type=int, help="render at most this many documents")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"browser contexts (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--navigation", choices=NAVIGATIONS, default="spa", help="route change per document, or a full reload (default: spa)")
+    parser.add_argument("--doc-timeout-ms", type=float, default=DEFAULT_DOC_TIMEOUT_MS, help="wait for each report (default: 15000)")
+    parser.add_argument("--out", type=Path, default=PDF_DIR, help="output directory; files go to <out>/<kind>/<id>.pdf (default: tmp/pdf)")
+    parser.add_argument("--no-save", action="store_true", help="benchmark only, do not write the PDFs")
+    parser.add_argument("--json", help="write the report and per-document results to this file")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.month and not re.fullmatch(r"\d{4}-\d{2}", args.month):
+        print(f"--month must be YYYY-MM, got {args.month!r}", file=sys.stderr)
+        return 2
+    out_dir = None if args.no_save else args.out / args.kind
+    try:
+        report, results = asyncio.run(run(args.kind, args.ids, args.month, args.limit, args.workers, args.navigation,
+                                          out_dir, args.doc_timeout_ms))
+    except RuntimeError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    report.violations = check_budgets(report, load_budgets())
+    print(report.format())
+    if out_dir is not None:
+        print(f"PDFs written to {out_dir}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"report": asdict(report), "documents": [asdict(r) for r in results]}, fh, indent=2)
+    return 1 if report.violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
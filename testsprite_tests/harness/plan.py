@@ -0,0 +1,362 @@
+"""Compile ``testsprite_frontend_test_plan.json`` entries into step graphs.
+
+The plan describes each case as natural-language ``action``/``assertion``
+steps. Instead of hand-writing one more ``TC0*.py`` script per entry, every
+step is compiled into a short list of :class:`Op` records (``goto``,
+``click``, ``fill``, ``expect_visible``...) that :mod:`harness.engine` runs
+with the shared readiness, locator and budget machinery.
+
+A step is compiled from, in order of precedence:
+
+* an explicit ``"ops": [...]`` list on the step in the plan JSON,
+* the first entry of :data:`RULES` whose pattern matches its description.
+
+A step that matches neither fails compilation with a message naming it, so
+a new plan entry never runs half-mapped.
+
+While compiling, each op gets the ids of the ops it depends on. Assertions
+only depend on the last mutating op, so consecutive assertions run
+concurrently; the next mutating op waits for all of them. Opening a tab
+(its first ``goto`` with no ``$variables``) depends on nothing and overlaps
+with the rest of the case.
+
+Compiled plans are cached under ``tmp/plans/`` keyed by a hash of the plan
+entry and the rule table, so editing either recompiles only what changed.
+
+Variables are expanded with :func:`substitute`, which leaves any ``$`` that
+is not a known variable alone, so URL patterns can end in an anchor. ``python
+-m harness.plan`` also runs :func:`check_rules` over the rule table and fails
+on a rule that would only break at run time.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.plan              # compile every entry that maps
+    python -m harness.plan TC008 -v     # print TC008's op graph
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import TESTS_DIR, TMP_DIR
+
+PLAN_PATH = TESTS_DIR / "testsprite_frontend_test_plan.json"
+CACHE_DIR = TMP_DIR / "plans"
+# Bump when the Op format or dependency rules change.
+COMPILER_VERSION = 1
+
+# Ops that only observe the page; everything else mutates it.
+READ_KINDS = frozenset({"expect_visible", "expect_value", "expect_url"})
+KINDS = READ_KINDS | {"goto", "click", "fill", "select", "upload", "draw", "login", "geolocation", "remember"}
+# Always defined by the engine: a token unique to the run, for created records.
+BUILTIN_VARS = frozenset({"run"})
+
+_VAR = re.compile(r"\$\{?([A-Za-z_][A-Za-z0-9_]*)\}?")
+
+
+class PlanError(ValueError):
+    """A plan entry could not be compiled."""
+
+
+@dataclass
+class Op:
+    id: str
+    kind: str
+    args: Dict[str, object] = field(default_factory=dict)
+    tab: str = "main"
+    deps: List[str] = field(default_factory=list)
+    step: int = 0
+
+    @property
+    def reads(self) -> bool:
+        return self.kind in READ_KINDS
+
+    def variables(self) -> List[str]:
+        return sorted({m.group(1) for v in self.args.values() if isinstance(v, str) for m in _VAR.finditer(v)})
+
+    def describe(self) -> str:
+        args = " ".join(f"{k}={v!r}" for k, v in self.args.items())
+        deps = f" <- {','.join(self.deps)}" if self.deps else ""
+        return f"{self.id:<5} [{self.tab}] {self.kind} {args}{deps}"
+
+
+@dataclass
+class CompiledPlan:
+    case_id: str
+    title: str
+    digest: str
+    role: Optional[str] = "admin"
+    ops: List[Op] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CompiledPlan":
+        ops = [Op(**op) for op in data.pop("ops")]
+        return cls(ops=ops, **data)
+
+    def layers(self) -> List[List[Op]]:
+        """Ops grouped by depth in the dependency graph (for display)."""
+        depth: Dict[str, int] = {}
+        for op in self.ops:
+            depth[op.id] = 1 + max((depth[d] for d in op.deps), default=-1)
+        grouped: Dict[int, List[Op]] = {}
+        for op in self.ops:
+            grouped.setdefault(depth[op.id], []).append(op)
+        return [grouped[d] for d in sorted(grouped)]
+
+
+def _op(kind: str, tab: str = "main", **args) -> dict:
+    return {"kind": kind, "tab": tab, "args": args}
+
+
+# (description pattern, ops). Patterns are matched case-insensitively with
+# re.search; ops are plain dicts so the table hashes into the cache key.
+RULES: List[Tuple[str, List[dict]]] = [
+    # TC006 - CNPJ lookup in the client modal (BrasilAPI).
+    (r"create a new client .*valid cnpj", [
+        _op("goto", path="/clients"),
+        _op("click", key="clients.new"),
+        _op("click", key="clients.form.type", params={"name": "Corporativo"}),
+        _op("fill", key="clients.form.document", value="19131243000197", await_response="/api/cnpj/v1/"),
+    ]),
+    (r"company name, address.* automatically filled", [
+        _op("expect_value", key="clients.form.name", nonempty=True),
+        _op("expect_value", key="clients.form.street", nonempty=True),
+        _op("expect_value", key="clients.form.city", nonempty=True),
+    ]),
+    (r"invalid or non-existent cnpj", [
+        _op("click", key="clients.form.cancel"),
+        _op("click", key="clients.new"),
+        _op("click", key="clients.form.type", params={"name": "Corporativo"}),
+        _op("fill", key="clients.form.document", value="00000000000000", await_response="/api/cnpj/v1/"),
+    ]),
+    # The app only logs a failed lookup, so "no auto-fill" is what we can see.
+    (r"auto-fill does not occur", [
+        _op("expect_value", key="clients.form.name", equals=""),
+        _op("expect_value", key="clients.form.city", equals=""),
+    ]),
+    # TC008 - create an order from /orders/new.
+    (r"create a client and service order with valid details", [
+        _op("goto", path="/orders/new"),
+        _op("select", key="create_order.client", index=1),
+        _op("remember", var="client", key="create_order.client", attr="selected_text"),
+        _op("fill", key="create_order.service_type", value="Manutenção Preventiva"),
+        _op("fill", key="create_order.description", value="Plano de teste $run"),
+        _op("select", key="create_order.technician", index=1),
+        _op("click", key="create_order.save"),
+        _op("click", key="create_order.done.list"),
+    ]),
+    # New orders start as 'nova', listed as "Lançada".
+    (r"new service order appears in the service order listing", [
+        _op("expect_url", pattern=r"/orders$"),
+        _op("expect_visible", text="$client"),
+        _op("expect_visible", text="Lançada"),
+    ]),
+    # TC011 - technician flow on /mobile, checked from the backoffice tab.
+    (r"technician navigates to assigned service order", [
+        _op("geolocation", latitude=-8.05, longitude=-34.9),
+        _op("login", role="technician", form="mobile.login", path="/mobile/login", url=r"/mobile/dashboard"),
+        _op("click", key="mobile.tab", params={"name": "Novas"}),
+        _op("click", key="mobile.order_card"),
+        _op("remember", var="order_id", url=r"/mobile/order/([^/?#]+)"),
+    ]),
+    (r"update order status sequentially", [
+        _op("fill", key="mobile.order.checkin_notes", value="Check-in $run"),
+        _op("click", key="mobile.order.checkin"),
+        _op("expect_visible", key="mobile.order.finish"),
+        _op("upload", key="mobile.order.photo", name="servico-$run.png"),
+        _op("fill", key="mobile.order.report", value="Relatório $run"),
+    ]),
+    (r"each status update is saved and reflected", [
+        _op("goto", tab="admin", path="/orders/$order_id"),
+        _op("expect_visible", tab="admin", text="Em Andamento"),
+    ]),
+    (r"capture client digital signature", [
+        _op("click", key="mobile.order.sign"),
+        _op("draw", key="mobile.signature.pad"),
+        _op("click", key="mobile.signature.confirm"),
+        _op("expect_visible", text="Assinatura Capturada"),
+        _op("click", key="mobile.order.finish"),
+        _op("expect_url", pattern=r"/mobile/dashboard"),
+    ]),
+    (r"signature is securely stored and associated", [
+        _op("goto", tab="admin", path="/orders/$order_id"),
+        _op("expect_visible", tab="admin", text="Concluída"),
+        _op("expect_visible", tab="admin", key="orders.detail.signature"),
+    ]),
+]
+
+
+# Args holding regular expressions; a trailing ``$`` there is an anchor.
+PATTERN_ARGS = frozenset({"pattern", "url"})
+
+
+def substitute(value, variables: Dict[str, object]):
+    """Expand ``$name``/``${name}`` for names in ``variables``; any other ``$`` is kept."""
+    if not isinstance(value, str):
+        return value
+    return _VAR.sub(lambda m: str(variables[m.group(1)]) if m.group(1) in variables else m.group(0), value)
+
+
+def check_rules(rules=RULES) -> List[str]:
+    """Problems in ``rules`` that would only surface at run time."""
+    errors = []
+    for pattern, ops in rules:
+        try:
+            re.compile(pattern)
+        except re.error as exc:
+            errors.append(f"rule {pattern!r}: bad pattern: {exc}")
+        for n, spec in enumerate(ops, 1):
+            where = f"rule {pattern!r} op {n} ({spec.get('kind')})"
+            if spec.get("kind") not in KINDS:
+                errors.append(f"{where}: unknown op kind")
+            args = dict(spec.get("args", {}))
+            args.update({f"params.{k}": v for k, v in (args.pop("params", None) or {}).items()})
+            op = Op(id="check", kind=spec.get("kind", ""), args=args)
+            sample = {name: "x" for name in op.variables()}
+            for key, value in args.items():
+                try:
+                    expanded = substitute(value, sample)
+                    if key in PATTERN_ARGS and isinstance(expanded, str):
+                        re.compile(expanded)
+                except (KeyError, ValueError, re.error) as exc:
+                    errors.append(f"{where}: {key}={value!r}: {exc}")
+    return errors
+
+
+def _canonical(value) -> bytes:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")
+
+
+def digest(entry: dict, rules=RULES) -> str:
+    """Cache key for ``entry`` compiled with ``rules``."""
+    h = hashlib.sha256()
+    h.update(_canonical({"version": COMPILER_VERSION, "rules": rules}))
+    h.update(_canonical(entry))
+    return h.hexdigest()
+
+
+def _step_ops(case_id: str, index: int, step: dict, rules) -> List[dict]:
+    if "ops" in step:
+        return step["ops"]
+    description = step.get("description", "")
+    for pattern, ops in rules:
+        if re.search(pattern, description, re.IGNORECASE):
+            return ops
+    raise PlanError(
+        f"{case_id} step {index}: no rule for {description!r}; "
+        "add one to harness.plan.RULES or give the step an \"ops\" list"
+    )
+
+
+def compile_entry(entry: dict, rules=RULES) -> CompiledPlan:
+    """Compile one plan entry into a :class:`CompiledPlan` with dependencies."""
+    case_id = entry["id"]
+    plan = CompiledPlan(case_id=case_id, title=entry.get("title", ""), digest=digest(entry, rules),
+                        role=entry.get("role", "admin"))
+    last_write: Optional[str] = None
+    open_reads: List[str] = []
+    opened: Dict[str, Optional[str]] = {}
+    defined = set(BUILTIN_VARS)
+    for index, step in enumerate(entry.get("steps", []), 1):
+        for n, spec in enumerate(_step_ops(case_id, index, step, rules), 1):
+            op = Op(id=f"s{index}.{n}", kind=spec["kind"],
+                    args=dict(spec.get("args", {})), tab=spec.get("tab", "main"), step=index)
+            if op.kind not in KINDS:
+                raise PlanError(f"{case_id} {op.id}: unknown op kind {op.kind!r}")
+            missing = [v for v in op.variables() if v not in defined]
+            if missing:
+                raise PlanError(f"{case_id} {op.id}: ${missing[0]} is used before any op remembers it")
+            if op.kind == "remember":
+                defined.add(op.args["var"])
+            tab_open = opened.get(op.tab)
+            if op.tab not in opened and op.kind == "goto" and not op.variables():
+                opened[op.tab] = op.id
+            elif op.reads:
+                op.deps = [d for d in (last_write, tab_open) if d]
+                open_reads.append(op.id)
+            else:
+                op.deps = list(dict.fromkeys(d for d in (last_write, tab_open, *open_reads) if d))
+                last_write, open_reads = op.id, []
+                opened.setdefault(op.tab, None)
+            plan.ops.append(op)
+    if not plan.ops:
+        raise PlanError(f"{case_id}: plan entry has no steps")
+    return plan
+
+
+def load_entries(path: Path = PLAN_PATH) -> List[dict]:
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def compiled(entry: dict, cache_dir: Path = CACHE_DIR, rules=RULES) -> CompiledPlan:
+    """``compile_entry`` through the on-disk cache."""
+    key = digest(entry, rules)
+    path = cache_dir / f"{entry['id']}-{key[:16]}.json"
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return CompiledPlan.from_dict(json.load(fh))
+    except (FileNotFoundError, ValueError, TypeError, KeyError):
+        pass
+    plan = compile_entry(entry, rules)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for stale in cache_dir.glob(f"{entry['id']}-*.json"):
+        stale.unlink(missing_ok=True)
+    path.write_text(json.dumps(plan.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+    return plan
+
+
+def compile_plan(selected: Optional[List[str]] = None, path: Path = PLAN_PATH) -> Tuple[List[CompiledPlan], List[str]]:
+    """Compile the selected entries; returns ``(plans, errors)``."""
+    wanted = {s.upper() for s in selected} if selected else None
+    plans, errors = [], []
+    for entry in load_entries(path):
+        if wanted is not None and entry["id"] not in wanted:
+            continue
+        try:
+            plans.append(compiled(entry))
+        except PlanError as exc:
+            errors.append(str(exc))
+    return plans, errors
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compile the TestSprite test plan into step graphs.")
+    parser.add_argument("cases", nargs="*", help="case ids to compile (default: all)")
+    parser.add_argument("--plan", type=Path, default=PLAN_PATH, help="plan JSON (default: testsprite_frontend_test_plan.json)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print each compiled op graph")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    broken = check_rules()
+    for error in broken:
+        print(f"bad rule: {error}", file=sys.stderr)
+    plans, errors = compile_plan(args.cases or None, args.plan)
+    for plan in plans:
+        layers = plan.layers()
+        print(f"{plan.case_id}  {len(plan.ops)} ops in {len(layers)} layers  {plan.digest[:12]}  {plan.title}")
+        if args.verbose:
+            for depth, layer in enumerate(layers):
+                for op in layer:
+                    print(f"  {depth:>2}  {op.describe()}")
+    for error in errors:
+        print(f"unmapped: {error}", file=sys.stderr)
+    # Unmapped entries are expected while cases still live in TC files; only
+    # an explicitly requested case that fails to compile is an error.
+    return 1 if broken or (errors and args.cases) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
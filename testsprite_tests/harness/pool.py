@@ -0,0 +1,122 @@
+"""One browser, many isolated contexts.
+
+``BrowserPool`` launches a single Chromium instance and leases a fresh
+``BrowserContext`` to each test coroutine. The number of concurrent leases
+is capped by ``workers`` so the suite can run in parallel without
+oversubscribing the host. Chromium runs with TestSprite's
+``--single-process`` flags unless ``mode="multi"`` (or
+``TESTSPRITE_BROWSER_MODE=multi``) selects its normal process model.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from playwright import async_api
+
+from .auth import ensure_storage_state
+from .budget import Budget, activate, active
+from .config import DEFAULT_BROWSER_MODE, DEFAULT_TIMEOUT_MS, launch_args as mode_args
+
+
+class BrowserPool:
+    """Shared browser that hands out isolated contexts to concurrent tests."""
+
+    def __init__(self, workers: int = 4, headless: bool = True, launch_args: Optional[list] = None,
+                 mode: Optional[str] = None, setup: Optional[Callable[[async_api.BrowserContext], Awaitable[None]]] = None):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.workers = workers
+        self.headless = headless
+        # ``mode`` picks a harness.config.BROWSER_MODES entry; explicit args win.
+        self.launch_args = list(launch_args) if launch_args is not None else mode_args(mode or DEFAULT_BROWSER_MODE)
+        # Awaited with every leased context before the test gets it (routes, init scripts).
+        self.setup = setup
+        self._pw = None
+        self._browser = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def start(self) -> "BrowserPool":
+        self._pw = await async_api.async_playwright().start()
+        self._browser = await self._pw.chromium.launch(headless=self.headless, args=self.launch_args)
+        self._slots = asyncio.Semaphore(self.workers)
+        return self
+
+    async def close(self) -> None:
+        if self._browser:
+            await self._browser.close()
+            self._browser = None
+        if self._pw:
+            await self._pw.stop()
+            self._pw = None
+
+    async def __aenter__(self) -> "BrowserPool":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    @property
+    def browser(self):
+        if self._browser is None:
+            raise RuntimeError("BrowserPool has not been started")
+        return self._browser
+
+    async def cpu_time(self) -> Optional[float]:
+        """CPU seconds used so far by the browser's live processes.
+
+        Only attributable to one case when the pool has a single slot;
+        processes that already exited are not counted.
+        """
+        try:
+            session = await self.browser.new_browser_cdp_session()
+            info = await session.send("SystemInfo.getProcessInfo")
+            await session.detach()
+        except async_api.Error:
+            return None
+        return sum(p.get("cpuTime", 0.0) for p in info["processInfo"])
+
+    @asynccontextmanager
+    async def context(self, role: Optional[str] = None, **context_options) -> AsyncIterator[async_api.BrowserContext]:
+        """Lease a fresh context; blocks while all worker slots are busy.
+
+        With ``role`` set, the context starts from that role's cached
+        storage state (see :mod:`harness.auth`) and is already logged in.
+        """
+        if self._slots is None:
+            raise RuntimeError("BrowserPool has not been started")
+        async with self._slots:
+            if role is not None:
+                context_options.setdefault("storage_state", str(await ensure_storage_state(self.browser, role)))
+            context = await self.browser.new_context(**context_options)
+            context.set_default_timeout(DEFAULT_TIMEOUT_MS)
+            try:
+                if self.setup is not None:
+                    await self.setup(context)
+                yield context
+            finally:
+                await context.close()
+
+
+@asynccontextmanager
+async def open_context(
+    context: Optional[async_api.BrowserContext] = None,
+    role: Optional[str] = None,
+    **context_options,
+) -> AsyncIterator[async_api.BrowserContext]:
+    """Yield ``context`` if given, otherwise a standalone browser's context.
+
+    Lets each TC file accept a leased context from the runner while still
+    working when executed directly as a script; standalone runs also start
+    the default case budget (:mod:`harness.budget`).
+    """
+    if context is not None:
+        yield context
+        return
+    if active() is None:
+        activate(Budget())
+    async with BrowserPool(workers=1) as pool:
+        async with pool.context(role=role, **context_options) as own:
+            yield own
@@ -0,0 +1,274 @@
+"""Heap and long-task profiler for AppContext under realtime churn.
+
+``AppContext`` holds every table in React state and ``handleRealtimeUpdate``
+rebuilds the affected array on each change event. This module loads a view,
+then drives ``--updates`` PATCHes of one row through PostgREST (so they come
+back as realtime events) while it samples:
+
+* JS heap usage (CDP ``Runtime.getHeapUsage``) every ``--interval-ms``,
+* Long Tasks (``PerformanceObserver``, tasks over 50 ms on the main thread),
+* a Chromium performance trace of the whole scenario, which DevTools and
+  Perfetto open as a flame chart,
+* optionally, a ``.heapsnapshot`` after the updates.
+
+Row counts come from whatever the database holds, so seed a tier first
+(``python -m harness.seed --tier 10k`` or ``harness.standin --seed-tier``)
+and compare reports across tiers to see how the heap scales::
+
+    python -m harness.profiler orders --updates 200
+    python -m harness.profiler dashboard inventory --updates 500 --rate 20 --heap-snapshot
+
+Artifacts are written to ``tmp/profiles/<scenario>.*``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .config import BASE_URL, TMP_DIR, supabase_settings
+from .fanout import TABLES, RestWriter
+from .readiness import Readiness
+from .stats import format_summary, summarize
+
+PROFILE_DIR = TMP_DIR / "profiles"
+TRACE_CATEGORIES = [
+    "devtools.timeline",
+    "disabled-by-default-devtools.timeline",
+    "disabled-by-default-devtools.timeline.frame",
+    "v8.execute",
+    "disabled-by-default-v8.cpu_profiler",
+    "blink.user_timing",
+]
+
+# name -> (route, table whose rows are rewritten)
+SCENARIOS: Dict[str, tuple] = {
+    "orders": ("/orders", "orders"),
+    "inventory": ("/inventory", "inventory"),
+    "dashboard": ("/dashboard", "orders"),
+}
+
+_LONGTASK_INIT_SCRIPT = """
+window.__longtasks = [];
+try {
+  new PerformanceObserver((list) => {
+    for (const e of list.getEntries()) window.__longtasks.push([e.startTime, e.duration]);
+  }).observe({ type: 'longtask', buffered: true });
+} catch (e) {}
+"""
+
+
+@dataclass
+class HeapSample:
+    t_ms: float
+    phase: str
+    used: int
+    total: int
+
+
+@dataclass
+class ScenarioReport:
+    scenario: str
+    path: str
+    table: str
+    rows: Optional[int]
+    updates: int
+    heap: List[HeapSample] = field(default_factory=list)
+    long_tasks: List[List[float]] = field(default_factory=list)
+    phases: Dict[str, float] = field(default_factory=dict)
+    trace: Optional[str] = None
+    heap_snapshot: Optional[str] = None
+
+    def peak(self, phase: Optional[str] = None) -> int:
+        return max((s.used for s in self.heap if phase in (None, s.phase)), default=0)
+
+    def last(self, phase: str) -> int:
+        samples = [s.used for s in self.heap if s.phase == phase]
+        return samples[-1] if samples else 0
+
+    def summary(self) -> dict:
+        durations = [d for _, d in self.long_tasks]
+        return {
+            "rows": self.rows,
+            "updates": self.updates,
+            "peak_heap": self.peak(),
+            "heap_after_hydrate": self.last("hydrate"),
+            "heap_after_updates": self.last("updates"),
+            "peak_heap_updates": self.peak("updates"),
+            "retained_by_updates": self.last("updates") - self.last("hydrate"),
+            "bytes_per_row": self.last("hydrate") / self.rows if self.rows else None,
+            "long_tasks": len(durations),
+            "long_task_ms": sum(durations),
+            "long_task": summarize(durations),
+            "phases_ms": self.phases,
+        }
+
+    def format(self) -> str:
+        s = self.summary()
+        mib = 1024 * 1024
+        lines = [
+            f"{self.scenario} ({self.path}, {self.rows if self.rows is not None else '?'} {self.table} rows, {self.updates} updates)",
+            f"  heap  peak {s['peak_heap'] / mib:7.1f} MiB | after hydrate {s['heap_after_hydrate'] / mib:7.1f} MiB"
+            f" | after updates {s['heap_after_updates'] / mib:7.1f} MiB | retained {s['retained_by_updates'] / mib:+7.1f} MiB",
+            f"  long tasks {s['long_tasks']} totalling {s['long_task_ms']:.0f} ms",
+            "  " + format_summary("long task duration", s["long_task"]),
+            "  phases " + "  ".join(f"{k} {v:.0f}ms" for k, v in self.phases.items()),
+        ]
+        for label, path in (("trace", self.trace), ("heap snapshot", self.heap_snapshot)):
+            if path:
+                lines.append(f"  {label}: {path}")
+        return "\n".join(lines)
+
+
+class HeapSampler:
+    """Polls CDP ``Runtime.getHeapUsage`` in the background."""
+
+    def __init__(self, session, interval_ms: float = 100):
+        self.session = session
+        self.interval = interval_ms / 1000
+        self.samples: List[HeapSample] = []
+        self.phase = "load"
+        self._start = time.perf_counter()
+        self._task: Optional[asyncio.Task] = None
+
+    async def sample(self) -> HeapSample:
+        usage = await self.session.send("Runtime.getHeapUsage")
+        s = HeapSample((time.perf_counter() - self._start) * 1000, self.phase, int(usage["usedSize"]), int(usage["totalSize"]))
+        self.samples.append(s)
+        return s
+
+    async def _loop(self) -> None:
+        while True:
+            await self.sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        # Always end on a reading taken after the last phase finished.
+        await self.sample()
+
+
+async def count_rows(request, table: str) -> Optional[int]:
+    url, key = supabase_settings()
+    response = await request.get(
+        f"{url}/rest/v1/{table}?select=id&limit=1",
+        headers={"apikey": key, "Authorization": f"Bearer {key}", "Prefer": "count=exact"},
+    )
+    total = (response.headers.get("content-range") or "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+async def write_heap_snapshot(session, path: Path) -> None:
+    chunks: List[str] = []
+    session.on("HeapProfiler.addHeapSnapshotChunk", lambda params: chunks.append(params["chunk"]))
+    await session.send("HeapProfiler.enable")
+    await session.send("HeapProfiler.collectGarbage")
+    await session.send("HeapProfiler.takeHeapSnapshot", {"reportProgress": False})
+    path.write_text("".join(chunks), encoding="utf-8")
+
+
+async def profile_scenario(pool, name: str, updates: int = 200, rate: float = 10.0, interval_ms: float = 100,
+                           heap_snapshot: bool = False, out_dir: Path = PROFILE_DIR) -> ScenarioReport:
+    """Run one scenario in a fresh logged-in context and return its report."""
+    path, table = SCENARIOS[name]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    async with pool.context() as writer_ctx, pool.context(role="admin") as context:
+        url, key = supabase_settings()
+        writer = RestWriter(writer_ctx.request, url, key)
+        probe = await writer.probe(table)
+        column = TABLES[table][2]
+        report = ScenarioReport(name, path, table, await count_rows(writer_ctx.request, table), updates)
+
+        page = await context.new_page()
+        await page.add_init_script(_LONGTASK_INIT_SCRIPT)
+        session = await context.new_cdp_session(page)
+        await session.send("Runtime.enable")
+        sampler = HeapSampler(session, interval_ms)
+        trace_path = out_dir / f"{name}.trace.json"
+        await pool.browser.start_tracing(page=page, path=str(trace_path), categories=TRACE_CATEGORIES)
+        sampler.start()
+        ready = Readiness(page, timeout_ms=60000)
+        try:
+            start = time.perf_counter()
+            await ready.goto(BASE_URL + path, wait_until="commit")
+            report.phases["hydrate"] = (time.perf_counter() - start) * 1000
+            sampler.phase = "hydrate"
+            await sampler.sample()
+
+            sampler.phase = "updates"
+            start = time.perf_counter()
+            for i in range(updates):
+                due = start + i / rate
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await writer.patch(table, {column: f"{probe[column]} #{i + 1}"})
+            await ready.network_idle()
+            report.phases["updates"] = (time.perf_counter() - start) * 1000
+        finally:
+            await sampler.stop()
+            await pool.browser.stop_tracing()
+            await writer.restore()
+        report.heap = sampler.samples
+        report.long_tasks = await page.evaluate("() => window.__longtasks || []")
+        report.trace = str(trace_path)
+        if heap_snapshot:
+            snapshot_path = out_dir / f"{name}.heapsnapshot"
+            await write_heap_snapshot(session, snapshot_path)
+            report.heap_snapshot = str(snapshot_path)
+        return report
+
+
+async def run(scenarios: Sequence[str], updates: int, rate: float, interval_ms: float, heap_snapshot: bool,
+              headless: bool = True) -> List[ScenarioReport]:
+    from .pool import BrowserPool
+
+    reports = []
+    # Scenarios run one after another so they do not share the CPU.
+    async with BrowserPool(workers=2, headless=headless) as pool:
+        for name in scenarios:
+            reports.append(await profile_scenario(pool, name, updates, rate, interval_ms, heap_snapshot))
+    return reports
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Profile JS heap and long tasks while AppContext absorbs realtime updates.")
+    parser.add_argument("scenarios", nargs="*", default=["orders"], help=f"scenarios to run ({', '.join(SCENARIOS)}; default: orders)")
+    parser.add_argument("--updates", type=int, default=200, help="realtime updates to drive (default: 200)")
+    parser.add_argument("--rate", type=float, default=10.0, help="updates per second (default: 10)")
+    parser.add_argument("--interval-ms", type=float, default=100, help="heap sampling interval (default: 100)")
+    parser.add_argument("--heap-snapshot", action="store_true", help="also write a .heapsnapshot after the updates")
+    parser.add_argument("--json", help="write the reports, including heap timelines, to this file")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        print(f"unknown scenarios: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+    reports = asyncio.run(run(args.scenarios, args.updates, args.rate, args.interval_ms, args.heap_snapshot,
+                              headless=not args.headed))
+    for report in reports:
+        print(report.format())
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump([{**asdict(r), "summary": r.summary()} for r in reports], fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
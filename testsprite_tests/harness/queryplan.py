@@ -0,0 +1,680 @@
+"""Query-plan auditor for the app's PostgREST access patterns.
+
+The migrations index a handful of columns (``idx_orders_status``,
+``idx_orders_client``, ``idx_messages_conversation``...), while the app
+reads every table and filters by client, technician, project or
+conversation. This module replays the query shapes the app issues against
+a local Postgres holding a seeded tier (:mod:`harness.seed`):
+
+* shapes come from a network log. That can be ``capture`` below,
+  ``harness.network --json`` or any JSON with ``url``/``method`` request
+  entries. :data:`BUILTIN_SHAPES` lists the shapes found in the source,
+  including the filters pages still apply client-side,
+* each PostgREST URL is translated to the SQL PostgREST would run, with
+  embedded resources (``client:clients(name)``) resolved through the live
+  foreign keys, and run under ``EXPLAIN (ANALYZE, BUFFERS)``,
+* sequential scans that filter or sort a table with at least ``--min-rows``
+  rows, and joins slower than ``--slow-ms``, are flagged,
+* every candidate index is created inside a transaction. The table is
+  re-analyzed and the affected shapes are timed again. Then everything is
+  rolled back, so the database is left as it was. Indexes that gain at
+  least ``--min-gain`` are written to a migration, with their timings.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.queryplan capture --paths /dashboard,/clients,/communication
+    python -m harness.queryplan audit --log tmp/query-log.json --builtin
+    python -m harness.queryplan audit --builtin --tiers smoke,10k,100k --seed
+
+``--seed`` truncates and reseeds each tier before auditing it. Review
+``tmp/proposed_indexes.sql`` before copying it into ``migrations/``. The
+command exits 1 when it proposes an index.
+
+Requires ``psycopg`` (v3): ``pip install "psycopg[binary]"``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+from .config import BASE_URL, TMP_DIR
+from .seed import DEFAULT_DSN, _connect
+
+DEFAULT_LOG = TMP_DIR / "query-log.json"
+DEFAULT_OUT = TMP_DIR / "proposed_indexes.sql"
+DEFAULT_ROUTES = ("/dashboard", "/orders", "/clients", "/quotes", "/invoices", "/projects", "/agenda", "/communication")
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_ROWS = 1000
+DEFAULT_SLOW_MS = 50.0
+DEFAULT_MIN_GAIN = 0.20
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+JOIN_NODES = {"Nested Loop", "Hash Join", "Merge Join"}
+SAMPLE = "{sample}"
+
+# (PostgREST path, where the app issues it). ``{sample}`` is replaced by the
+# most common value of the filtered column.
+BUILTIN_SHAPES: List[Tuple[str, str]] = [
+    # AppContext.fetchData on every login.
+    ("clients?select=*", "AppContext.fetchData"),
+    ("orders?select=*", "AppContext.fetchData"),
+    ("technicians?select=*", "AppContext.fetchData"),
+    ("inventory?select=*", "AppContext.fetchData"),
+    ("quotes?select=*,client:clients(name)", "AppContext.fetchData"),
+    ("contracts?select=*,client:clients(name)", "AppContext.fetchData"),
+    ("projects?select=*,client:clients(name),responsible:technicians(name)", "AppContext.fetchData"),
+    ("project_activities?select=*", "AppContext.fetchData"),
+    ("invoices?select=*", "AppContext.fetchData"),
+    ("appointments?select=*", "AppContext.fetchData"),
+    ("messages?select=*", "AppContext.fetchData"),
+    # Server-side filters.
+    ("clients?select=id,name,phone&phone=eq.{sample}", "Landing.tsx"),
+    ("clients?select=*&email=eq.{sample}", "Login.tsx"),
+    ("clients?select=id&name=ilike.*{sample}*&limit=1", "DataImportModal.tsx"),
+    ("order_extra_items?select=*&order_id=eq.{sample}", "OrderDetail.tsx"),
+    ("notifications?select=*&technician_id=eq.{sample}&order=created_at.desc", "MobileNotifications.tsx"),
+    # Filters pages apply client-side today, as they read once pushed down.
+    ("orders?select=*&client_id=eq.{sample}", "Clients.tsx, client/ClientDashboard.tsx"),
+    ("orders?select=*&technician_id=eq.{sample}", "MobileDashboard.tsx, MobileAgenda.tsx"),
+    ("orders?select=*&project_id=eq.{sample}", "ProjectDetail.tsx"),
+    ("orders?select=*&status=in.(nova,pendente)", "Dashboard.tsx"),
+    ("quotes?select=*&client_id=eq.{sample}&status=eq.sent", "client/ClientDashboard.tsx"),
+    ("contracts?select=*&client_id=eq.{sample}", "Clients.tsx"),
+    ("appointments?select=*&client_id=eq.{sample}", "Clients.tsx"),
+    ("invoices?select=*&client_id=eq.{sample}", "client/ClientInvoices.tsx"),
+    ("messages?select=*&conversation_id=eq.{sample}&order=created_at.asc", "client/ClientChat.tsx"),
+    ("project_activities?select=*&project_id=eq.{sample}&order=timestamp.desc", "ProjectDetail.tsx"),
+]
+
+_OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "like": "LIKE", "ilike": "ILIKE"}
+
+
+class ShapeError(ValueError):
+    """A request cannot be translated to SQL."""
+
+
+@dataclass
+class Filter:
+    column: str
+    op: str
+    value: str
+
+    @property
+    def equality(self) -> bool:
+        return self.op in ("eq", "in", "is")
+
+    @property
+    def substring(self) -> bool:
+        return self.op in ("like", "ilike") and self.value.startswith("*")
+
+
+@dataclass
+class QueryShape:
+    table: str
+    select: str = "*"
+    filters: List[Filter] = field(default_factory=list)
+    order: List[Tuple[str, bool]] = field(default_factory=list)
+    limit: Optional[int] = None
+    offset: Optional[int] = None
+    sources: List[str] = field(default_factory=list)
+    seen: int = 1
+
+    @classmethod
+    def parse(cls, path: str, source: str = "") -> "QueryShape":
+        """From ``table?select=...&col=op.value`` or a full PostgREST URL."""
+        parsed = urlparse(path)
+        route = parsed.path
+        if "/rest/v1/" in route:
+            route = route.split("/rest/v1/", 1)[1]
+        if not route or route.startswith("rpc/"):
+            raise ShapeError(f"not a table read: {path}")
+        shape = cls(route.strip("/"), sources=[source] if source else [])
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True):
+            if key == "select":
+                shape.select = value or "*"
+            elif key == "order":
+                for part in value.split(","):
+                    bits = part.split(".")
+                    shape.order.append((bits[0], "desc" in bits[1:]))
+            elif key in ("limit", "offset"):
+                setattr(shape, key, int(value))
+            elif key in ("or", "and"):
+                raise ShapeError(f"{key}= filters are not replayed: {path}")
+            elif key in RESERVED_PARAMS:
+                continue
+            else:
+                op, _, operand = value.partition(".")
+                if op == "not" or (op not in _OPERATORS and op not in ("in", "is")):
+                    raise ShapeError(f"unsupported filter: {key}={value}")
+                shape.filters.append(Filter(key, op, operand))
+        return shape
+
+    @property
+    def key(self) -> str:
+        """Shape identity: same columns and operators, any values."""
+        filters = "&".join(f"{f.column}={f.op}" for f in self.filters)
+        order = ",".join(f"{c}.{'desc' if d else 'asc'}" for c, d in self.order)
+        return f"{self.table}?select={self.select}&{filters}&order={order}&limit={self.limit is not None}"
+
+    def label(self) -> str:
+        parts = [f"select={self.select}"] if self.select != "*" else []
+        parts += [f"{f.column}={f.op}.{f.value}" for f in self.filters]
+        if self.order:
+            parts.append("order=" + ",".join(f"{c}.{'desc' if d else 'asc'}" for c, d in self.order))
+        if self.limit is not None:
+            parts.append(f"limit={self.limit}")
+        return f"{self.table}?{'&'.join(parts)}" if parts else self.table
+
+
+def _split(text: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for ch in text:
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += ch == "("
+        depth -= ch == ")"
+        current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class Catalog:
+    """Live foreign keys, indexes and row estimates of the ``public`` schema."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.refresh()
+
+    def refresh(self) -> None:
+        self.columns: Dict[str, List[str]] = {}
+        for table, column in self.conn.execute(
+            "SELECT table_name, column_name FROM information_schema.columns WHERE table_schema = 'public' ORDER BY ordinal_position"
+        ):
+            self.columns.setdefault(table, []).append(column)
+        self.foreign_keys: List[Tuple[str, str, str]] = [
+            (t, c, r) for t, c, r in self.conn.execute(
+                """
+                SELECT cl.relname, a.attname, rf.relname
+                FROM pg_constraint k
+                JOIN pg_class cl ON cl.oid = k.conrelid
+                JOIN pg_class rf ON rf.oid = k.confrelid
+                JOIN pg_attribute a ON a.attrelid = k.conrelid AND a.attnum = k.conkey[1]
+                WHERE k.contype = 'f' AND k.connamespace = 'public'::regnamespace
+                """
+            )
+        ]
+        self.indexes: Dict[str, List[Tuple[str, List[str]]]] = {}
+        for table, method, columns in self.conn.execute(
+            """
+            SELECT t.relname, am.amname, array_agg(a.attname ORDER BY k.ord)
+            FROM pg_index i
+            JOIN pg_class t ON t.oid = i.indrelid
+            JOIN pg_class ix ON ix.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = ix.relam
+            CROSS JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+            WHERE t.relnamespace = 'public'::regnamespace
+            GROUP BY i.indexrelid, t.relname, am.amname
+            """
+        ):
+            self.indexes.setdefault(table, []).append((method, list(columns)))
+        self.conn.rollback()
+
+    def rows(self, table: str) -> int:
+        row = self.conn.execute("SELECT count(*) FROM public." + _ident(table)).fetchone()
+        return int(row[0])
+
+    def covered(self, table: str, columns: Sequence[str], method: str = "btree") -> bool:
+        return any(m == method and cols[:len(columns)] == list(columns) for m, cols in self.indexes.get(table, []))
+
+    def relationship(self, table: str, target: str, hint: Optional[str] = None) -> Tuple[str, str, str]:
+        """``("one", fk_on_table, "id")`` or ``("many", "id", fk_on_target)``."""
+        for t, column, ref in self.foreign_keys:
+            if t == table and ref == target and hint in (None, column):
+                return "one", column, "id"
+        for t, column, ref in self.foreign_keys:
+            if t == target and ref == table and hint in (None, column):
+                return "many", "id", column
+        raise ShapeError(f"no foreign key between {table} and {target}")
+
+
+def to_sql(shape: QueryShape, catalog: Catalog) -> Tuple[str, list]:
+    """The statement PostgREST would run for ``shape``, with parameters."""
+    if shape.table not in catalog.columns:
+        raise ShapeError(f"table {shape.table} does not exist")
+    known = set(catalog.columns[shape.table])
+    items: List[str] = []
+    for part in _split(shape.select):
+        alias, _, expr = part.rpartition(":") if ":" in part.split("(")[0] else ("", "", part)
+        if "(" in expr:
+            target, _, inner = expr.partition("(")
+            target, _, hint = target.partition("!")
+            kind, local, remote = catalog.relationship(shape.table, target, hint or None)
+            cols = ", ".join("*" if c == "*" else _ident(c.split("::")[0]) for c in _split(inner.rstrip(")")))
+            sub = f"SELECT {cols} FROM public.{_ident(target)} e WHERE e.{_ident(remote)} = t.{_ident(local)}"
+            agg = "row_to_json(r)" if kind == "one" else "coalesce(json_agg(r), '[]')"
+            items.append(f"(SELECT {agg} FROM ({sub}) r) AS {_ident(alias or target)}")
+        elif expr == "*":
+            items.append("t.*")
+        else:
+            column = expr.split("::")[0]
+            if column not in known:
+                raise ShapeError(f"column {shape.table}.{column} does not exist")
+            items.append(f"t.{_ident(column)}" + (f" AS {_ident(alias)}" if alias else ""))
+    sql = f"SELECT {', '.join(items)} FROM public.{_ident(shape.table)} t"
+
+    where, params = [], []
+    for f in shape.filters:
+        if f.column not in known:
+            raise ShapeError(f"column {shape.table}.{f.column} does not exist")
+        col = f"t.{_ident(f.column)}"
+        if f.op == "in":
+            values = [v.strip().strip('"') for v in f.value.strip("()").split(",")]
+            where.append(f"{col} IN ({', '.join(['%s'] * len(values))})")
+            params.extend(values)
+        elif f.op == "is":
+            where.append(f"{col} IS {dict(null='NULL', true='TRUE', false='FALSE')[f.value.lower()]}")
+        else:
+            where.append(f"{col} {_OPERATORS[f.op]} %s")
+            params.append(f.value.replace("*", "%") if f.op in ("like", "ilike") else f.value)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if shape.order:
+        sql += " ORDER BY " + ", ".join(f"t.{_ident(c)} {'DESC' if d else 'ASC'}" for c, d in shape.order)
+    if shape.limit is not None:
+        sql += f" LIMIT {int(shape.limit)}"
+    if shape.offset:
+        sql += f" OFFSET {int(shape.offset)}"
+    return sql, params
+
+
+def fill_samples(shape: QueryShape, conn) -> QueryShape:
+    """Replace ``{sample}`` with the most common value of each filtered column."""
+    for f in shape.filters:
+        if SAMPLE not in f.value:
+            continue
+        row = conn.execute(
+            f"SELECT {_ident(f.column)}::text, count(*) FROM public.{_ident(shape.table)} "
+            f"WHERE {_ident(f.column)} IS NOT NULL GROUP BY 1 ORDER BY 2 DESC LIMIT 1"
+        ).fetchone()
+        if row is None:
+            raise ShapeError(f"{shape.table}.{f.column} has no values to sample")
+        f.value = f.value.replace(SAMPLE, row[0])
+    conn.rollback()
+    return shape
+
+
+# -- logs -----------------------------------------------------------------
+
+def _requests(data) -> Iterator[dict]:
+    """Every ``{"url": ..., "method": ...}`` object nested anywhere in ``data``."""
+    if isinstance(data, dict):
+        if isinstance(data.get("url"), str) and isinstance(data.get("method"), str):
+            yield data
+        for value in data.values():
+            yield from _requests(value)
+    elif isinstance(data, list):
+        for value in data:
+            yield from _requests(value)
+
+
+def load_shapes(logs: Sequence[Path], builtin: bool = False) -> Tuple[List[QueryShape], Dict[str, int]]:
+    """Distinct GET shapes from ``logs`` (and :data:`BUILTIN_SHAPES`), plus skip reasons."""
+    shapes: Dict[str, QueryShape] = {}
+    skipped: Dict[str, int] = {}
+
+    def add(shape: QueryShape) -> None:
+        existing = shapes.get(shape.key)
+        if existing is None:
+            shapes[shape.key] = shape
+            return
+        existing.seen += 1
+        existing.sources.extend(s for s in shape.sources if s not in existing.sources)
+
+    if builtin:
+        for path, source in BUILTIN_SHAPES:
+            add(QueryShape.parse(path, source))
+    for log in logs:
+        with open(log, encoding="utf-8") as fh:
+            data = json.load(fh)
+        for request in _requests(data):
+            if request["method"].upper() != "GET" or "/rest/v1/" not in request["url"]:
+                continue
+            try:
+                add(QueryShape.parse(request["url"], request.get("route") or log.name))
+            except ShapeError as exc:
+                reason = str(exc).split(":")[0]
+                skipped[reason] = skipped.get(reason, 0) + 1
+    return list(shapes.values()), skipped
+
+
+async def capture(paths: Sequence[str], role: str = "admin", headless: bool = True) -> List[dict]:
+    """Visit ``paths`` in one logged-in session and log the Supabase requests of each."""
+    from .network import NetworkCapture
+    from .pool import BrowserPool
+    from .readiness import Readiness
+
+    requests: List[dict] = []
+    async with BrowserPool(workers=1, headless=headless) as pool:
+        async with pool.context(role=role) as context:
+            page = await context.new_page()
+            recorder = NetworkCapture(page)
+            ready = Readiness(page, timeout_ms=60000)
+            for path in paths:
+                recorder.start()
+                await ready.goto(BASE_URL + path, wait_until="commit")
+                await ready.network_idle()
+                requests.extend({"route": path, "method": s.method, "url": s.url, "rows": s.rows}
+                                for s in await recorder.stop())
+    return requests
+
+
+# -- plans ----------------------------------------------------------------
+
+@dataclass
+class Finding:
+    kind: str
+    relation: str
+    detail: str
+    ms: float
+
+
+@dataclass
+class Proposal:
+    table: str
+    columns: List[str]
+    method: str = "btree"
+    shapes: List[str] = field(default_factory=list)
+    before_ms: Dict[str, float] = field(default_factory=dict)
+    after_ms: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        suffix = "_trgm" if self.method == "gin" else ""
+        return f"idx_{self.table}_{'_'.join(self.columns)}{suffix}"
+
+    @property
+    def ddl(self) -> str:
+        if self.method == "gin":
+            cols = ", ".join(f"{_ident(c)} gin_trgm_ops" for c in self.columns)
+            return f"CREATE INDEX IF NOT EXISTS {self.name} ON public.{_ident(self.table)} USING gin ({cols});"
+        return f"CREATE INDEX IF NOT EXISTS {self.name} ON public.{_ident(self.table)} ({', '.join(map(_ident, self.columns))});"
+
+    def gain(self, shape: str) -> float:
+        before, after = self.before_ms.get(shape), self.after_ms.get(shape)
+        return 1 - after / before if before and after is not None else 0.0
+
+
+@dataclass
+class ShapeResult:
+    shape: str
+    sources: List[str]
+    rows: Optional[int] = None
+    ms: Optional[float] = None
+    buffers: int = 0
+    findings: List[Finding] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+@dataclass
+class TierReport:
+    tier: str
+    table_rows: Dict[str, int] = field(default_factory=dict)
+    shapes: List[ShapeResult] = field(default_factory=list)
+    proposals: List[Proposal] = field(default_factory=list)
+
+    def format(self, min_gain: float = DEFAULT_MIN_GAIN) -> str:
+        lines = [f"tier {self.tier}: " + ", ".join(f"{t} {n:,}" for t, n in sorted(self.table_rows.items()))]
+        lines.append(f"  {'ms':>9} {'rows':>8} {'bufs':>7}  shape")
+        for r in sorted(self.shapes, key=lambda r: -(r.ms or 0)):
+            if r.error:
+                lines.append(f"  {'-':>9} {'':>8} {'':>7}  {r.shape}  [skipped: {r.error}]")
+                continue
+            lines.append(f"  {r.ms:9.2f} {r.rows:8,} {r.buffers:7,}  {r.shape}")
+            lines += [f"  {'':>27}  ! {f.kind} {f.relation}: {f.detail} ({f.ms:.1f}ms)" for f in r.findings]
+        for p in self.proposals:
+            for shape in p.shapes:
+                kept = "" if p.gain(shape) >= min_gain else "  (not kept)"
+                lines.append(f"  + {p.name}: {shape} {p.before_ms[shape]:.2f}ms -> {p.after_ms.get(shape, 0):.2f}ms "
+                             f"({100 * p.gain(shape):.0f}% faster){kept}")
+        return "\n".join(lines)
+
+
+def walk(node: dict, parent: Optional[dict] = None) -> Iterator[Tuple[dict, Optional[dict]]]:
+    yield node, parent
+    for child in node.get("Plans", []):
+        yield from walk(child, node)
+
+
+def explain(conn, sql: str, params: list, repeat: int = DEFAULT_REPEAT) -> Tuple[float, dict]:
+    """Median execution time (ms) over ``repeat`` runs and the last plan."""
+    times, plan = [], {}
+    for _ in range(repeat):
+        result = conn.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params).fetchone()[0]
+        plan = (json.loads(result) if isinstance(result, str) else result)[0]
+        times.append(plan["Execution Time"])
+    return statistics.median(times), plan
+
+
+def inspect(plan: dict, table_rows: Dict[str, int], min_rows: int = DEFAULT_MIN_ROWS,
+            slow_ms: float = DEFAULT_SLOW_MS) -> List[Finding]:
+    findings = []
+    for node, parent in walk(plan["Plan"]):
+        kind = node["Node Type"]
+        total_ms = node.get("Actual Total Time", 0.0) * node.get("Actual Loops", 1)
+        if kind == "Seq Scan" and table_rows.get(node.get("Relation Name", ""), 0) >= min_rows:
+            relation = node["Relation Name"]
+            if "Filter" in node:
+                findings.append(Finding("seq scan", relation, f"{node['Filter']} removed {node.get('Rows Removed by Filter', 0):,} rows "
+                                        f"x{node.get('Actual Loops', 1)}", total_ms))
+            elif parent is not None and parent["Node Type"] == "Sort":
+                findings.append(Finding("seq scan + sort", relation, ", ".join(parent.get("Sort Key", [])), total_ms))
+        elif kind in JOIN_NODES and total_ms >= slow_ms:
+            findings.append(Finding("slow join", kind, node.get("Join Filter") or node.get("Hash Cond") or "", total_ms))
+    return findings
+
+
+def candidates(shape: QueryShape, catalog: Catalog, findings: List[Finding]) -> List[Proposal]:
+    """Indexes that would serve ``shape``'s flagged scans."""
+    proposals = []
+    scanned = {f.relation for f in findings}
+    if shape.table in scanned:
+        eq = [f.column for f in shape.filters if f.equality]
+        rng = [f.column for f in shape.filters if not f.equality and not f.substring]
+        order = [c for c, _ in shape.order if c not in eq]
+        columns = list(dict.fromkeys(eq + (rng or order)[:1]))
+        if columns and not catalog.covered(shape.table, columns):
+            proposals.append(Proposal(shape.table, columns))
+        for f in shape.filters:
+            if f.substring and not catalog.covered(shape.table, [f.column], "gin"):
+                proposals.append(Proposal(shape.table, [f.column], "gin"))
+    # One-to-many embeds filter the embedded table by its foreign key.
+    for part in _split(shape.select):
+        expr = part.split(":", 1)[-1] if ":" in part.split("(")[0] else part
+        if "(" not in expr:
+            continue
+        target, _, hint = expr.partition("(")[0].partition("!")
+        try:
+            kind, _, remote = catalog.relationship(shape.table, target, hint or None)
+        except ShapeError:
+            continue
+        if kind == "many" and target in scanned and not catalog.covered(target, [remote]):
+            proposals.append(Proposal(target, [remote]))
+    return proposals
+
+
+class Auditor:
+    """Runs every shape against one database and measures candidate indexes."""
+
+    def __init__(self, conn, repeat: int = DEFAULT_REPEAT, min_rows: int = DEFAULT_MIN_ROWS,
+                 slow_ms: float = DEFAULT_SLOW_MS, timeout_ms: int = 60000):
+        self.conn = conn
+        self.repeat = repeat
+        self.min_rows = min_rows
+        self.slow_ms = slow_ms
+        conn.execute(f"SET statement_timeout = {int(timeout_ms)}")
+        conn.commit()
+        self.catalog = Catalog(conn)
+
+    def run(self, tier: str, shapes: Sequence[QueryShape]) -> TierReport:
+        import psycopg
+
+        report = TierReport(tier)
+        self.catalog.refresh()
+        tables = {s.table for s in shapes} | {t for t, _, r in self.catalog.foreign_keys if r in {s.table for s in shapes}}
+        report.table_rows = {t: self.catalog.rows(t) for t in sorted(tables) if t in self.catalog.columns}
+        self.conn.rollback()
+
+        statements: Dict[str, Tuple[str, list]] = {}
+        proposals: Dict[str, Proposal] = {}
+        for original in shapes:
+            shape = QueryShape(**{**asdict(original), "filters": [Filter(**asdict(f)) for f in original.filters]})
+            result = ShapeResult(shape.label(), shape.sources)
+            report.shapes.append(result)
+            try:
+                fill_samples(shape, self.conn)
+                result.shape = shape.label()
+                sql, params = to_sql(shape, self.catalog)
+                result.ms, plan = explain(self.conn, sql, params, self.repeat)
+            except (ShapeError, psycopg.Error) as exc:
+                self.conn.rollback()
+                result.error = str(exc).splitlines()[0]
+                continue
+            self.conn.rollback()
+            root = plan["Plan"]
+            result.rows = root.get("Actual Rows", 0)
+            result.buffers = root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0)
+            result.findings = inspect(plan, report.table_rows, self.min_rows, self.slow_ms)
+            statements[result.shape] = (sql, params)
+            for candidate in candidates(shape, self.catalog, result.findings):
+                proposal = proposals.setdefault(candidate.name, candidate)
+                proposal.shapes.append(result.shape)
+                proposal.before_ms[result.shape] = result.ms
+
+        for proposal in proposals.values():
+            self.measure(proposal, statements)
+            report.proposals.append(proposal)
+        return report
+
+    def measure(self, proposal: Proposal, statements: Dict[str, Tuple[str, list]]) -> None:
+        """Time ``proposal``'s shapes with the index in place, then roll it back."""
+        import psycopg
+
+        try:
+            with self.conn.transaction() as tx:
+                if proposal.method == "gin":
+                    self.conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                self.conn.execute(proposal.ddl)
+                self.conn.execute(f"ANALYZE public.{_ident(proposal.table)}")
+                for shape in proposal.shapes:
+                    proposal.after_ms[shape], _ = explain(self.conn, *statements[shape], self.repeat)
+                raise psycopg.Rollback(tx)
+        except psycopg.Error as exc:
+            print(f"could not measure {proposal.name}: {str(exc).splitlines()[0]}", file=sys.stderr)
+        self.conn.rollback()
+
+
+def migration(reports: Sequence[TierReport], min_gain: float = DEFAULT_MIN_GAIN) -> Tuple[str, List[str]]:
+    """Migration SQL for proposals that gained ``min_gain`` in any tier, and their names."""
+    kept: Dict[str, Tuple[Proposal, List[str]]] = {}
+    for report in reports:
+        for p in report.proposals:
+            notes = [f"--   {report.tier}: {shape}  {p.before_ms[shape]:.2f}ms -> {p.after_ms[shape]:.2f}ms"
+                     for shape in p.shapes if shape in p.after_ms and p.gain(shape) >= min_gain]
+            if notes:
+                kept.setdefault(p.name, (p, []))[1].extend(notes)
+    lines = ["-- Indexes proposed by harness.queryplan (EXPLAIN ANALYZE medians, before -> after).", ""]
+    if any(p.method == "gin" for p, _ in kept.values()):
+        lines += ["CREATE EXTENSION IF NOT EXISTS pg_trgm;", ""]
+    for proposal, notes in kept.values():
+        lines += [f"-- {proposal.name}"] + notes + [proposal.ddl, ""]
+    return "\n".join(lines), list(kept)
+
+
+def audit(dsn: str, shapes: Sequence[QueryShape], tiers: Sequence[str], reseed: bool = False,
+          repeat: int = DEFAULT_REPEAT, min_rows: int = DEFAULT_MIN_ROWS, slow_ms: float = DEFAULT_SLOW_MS) -> List[TierReport]:
+    from .seed import seed
+
+    reports = []
+    for tier in tiers:
+        if reseed:
+            seed(dsn, tier, truncate=True)
+        with _connect(dsn) as conn:
+            reports.append(Auditor(conn, repeat, min_rows, slow_ms).run(tier, shapes))
+    return reports
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Replay the app's query shapes under EXPLAIN ANALYZE and propose indexes.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    cap = sub.add_parser("capture", help="log the Supabase requests made while visiting app routes")
+    cap.add_argument("--paths", default=",".join(DEFAULT_ROUTES), help="comma-separated routes to visit")
+    cap.add_argument("--role", default="admin", help="cached login role (default: admin)")
+    cap.add_argument("--out", type=Path, default=DEFAULT_LOG, help="where to write the log (default: tmp/query-log.json)")
+    cap.add_argument("--headed", action="store_true", help="show the browser window")
+
+    aud = sub.add_parser("audit", help="explain every shape and measure candidate indexes")
+    aud.add_argument("--log", type=Path, action="append", default=[], help="network log to replay (repeatable)")
+    aud.add_argument("--builtin", action="store_true", help="also replay the shapes found in the app source")
+    aud.add_argument("--dsn", default=DEFAULT_DSN, help="Postgres DSN (default: $TESTSPRITE_PG_DSN or local Supabase)")
+    aud.add_argument("--tiers", default="current", help="comma-separated tier labels (default: current)")
+    aud.add_argument("--seed", action="store_true", help="truncate and seed each tier with harness.seed before auditing")
+    aud.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="EXPLAIN ANALYZE runs per shape (default: 5)")
+    aud.add_argument("--min-rows", type=int, default=DEFAULT_MIN_ROWS, help="ignore seq scans of smaller tables (default: 1000)")
+    aud.add_argument("--slow-ms", type=float, default=DEFAULT_SLOW_MS, help="flag joins slower than this (default: 50)")
+    aud.add_argument("--min-gain", type=float, default=DEFAULT_MIN_GAIN, help="keep indexes at least this much faster (default: 0.20)")
+    aud.add_argument("--out", type=Path, default=DEFAULT_OUT, help="proposed migration (default: tmp/proposed_indexes.sql)")
+    aud.add_argument("--json", help="write the tier reports to this file")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "capture":
+        requests = asyncio.run(capture([p for p in args.paths.split(",") if p], args.role, headless=not args.headed))
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps({"requests": requests}, indent=2), encoding="utf-8")
+        print(f"logged {len(requests)} requests to {args.out}")
+        return 0
+
+    logs = args.log or ([DEFAULT_LOG] if DEFAULT_LOG.exists() and not args.builtin else [])
+    shapes, skipped = load_shapes(logs, args.builtin)
+    if not shapes:
+        print("no query shapes: pass --log or --builtin", file=sys.stderr)
+        return 2
+    for reason, count in skipped.items():
+        print(f"skipped {count} requests: {reason}", file=sys.stderr)
+    tiers = [t for t in args.tiers.split(",") if t]
+    if args.seed and "current" in tiers:
+        print("--seed needs --tiers from harness.seed.TIERS", file=sys.stderr)
+        return 2
+    reports = audit(args.dsn, shapes, tiers, args.seed, args.repeat, args.min_rows, args.slow_ms)
+    for report in reports:
+        print(report.format(args.min_gain))
+    sql, kept = migration(reports, args.min_gain)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(sql, encoding="utf-8")
+    print(f"{len(kept)} indexes proposed in {args.out}" if kept else "no index proposals")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump([asdict(r) for r in reports], fh, indent=2)
+    return 1 if kept else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Event-driven waits that replace the fixed ``wait_for_timeout`` sleeps.
+
+Three signals decide when the page is ready for the next step:
+
+* **Supabase network idle** - no REST/auth/storage request to Supabase has
+  been in flight for ``quiet_ms``. Realtime websockets are not counted.
+* **Hydration marker** - ``AppContext`` sets ``<html data-hydrated="true">``
+  once its initial ``fetchData`` results are committed.
+* **Locator actionability** - left to Playwright's own auto-waiting on
+  ``click``/``fill``.
+
+Every step run through :class:`Readiness` is timed, so per-step latency
+reflects the app instead of hardcoded delays.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from .budget import Budget, active
+from .config import DEFAULT_TIMEOUT_MS
+from .results import record_step
+
+SUPABASE_PATHS = ("/rest/v1/", "/auth/v1/", "/storage/v1/")
+HYDRATED_SELECTOR = "html[data-hydrated='true']"
+
+
+_SELECTOR = re.compile(r"selector='(.*)'>$")
+
+
+def describe(locator) -> str:
+    """Short, run-stable name for ``locator`` (its selector, not its frame URL)."""
+    match = _SELECTOR.search(repr(locator))
+    return match.group(1) if match else repr(locator)
+
+
+@dataclass
+class StepTiming:
+    name: str
+    wait: float
+    action: float
+
+    @property
+    def total(self) -> float:
+        return self.wait + self.action
+
+
+class Readiness:
+    """Tracks Supabase traffic on ``page`` and waits on real readiness signals."""
+
+    def __init__(self, page, quiet_ms: int = 250, paths: Sequence[str] = SUPABASE_PATHS, timeout_ms: int = DEFAULT_TIMEOUT_MS * 2,
+                 budget: Optional[Budget] = None):
+        self.page = page
+        # Waits are capped by the case budget when one is active (see harness.budget).
+        self.budget = budget if budget is not None else active()
+        self.quiet_ms = quiet_ms
+        self.paths = tuple(paths)
+        self.timeout_ms = timeout_ms
+        self.steps: List[StepTiming] = []
+        self._inflight = set()
+        self._last_activity = time.monotonic()
+        self._changed = asyncio.Event()
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_done)
+        page.on("requestfailed", self._on_done)
+
+    def _tracked(self, request) -> bool:
+        return any(p in request.url for p in self.paths)
+
+    def _on_request(self, request) -> None:
+        if self._tracked(request):
+            self._inflight.add(request)
+            self._touch()
+
+    def _on_done(self, request) -> None:
+        if request in self._inflight:
+            self._inflight.discard(request)
+            self._touch()
+
+    def _touch(self) -> None:
+        self._last_activity = time.monotonic()
+        self._changed.set()
+
+    def _cap(self, timeout_ms: float) -> float:
+        return self.budget.cap(timeout_ms) if self.budget is not None else timeout_ms
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def network_idle(self, timeout_ms: Optional[int] = None) -> None:
+        """Wait until no tracked request has been in flight for ``quiet_ms``."""
+        timeout_ms = self._cap(timeout_ms or self.timeout_ms)
+        deadline = time.monotonic() + timeout_ms / 1000
+        quiet = self.quiet_ms / 1000
+        while True:
+            now = time.monotonic()
+            if not self._inflight and now - self._last_activity >= quiet:
+                return
+            remaining = deadline - now
+            if remaining <= 0:
+                raise TimeoutError(f"Supabase traffic not idle after {timeout_ms:.0f} ms ({self.inflight} in flight)")
+            self._changed.clear()
+            wait = remaining if self._inflight else min(remaining, quiet - (now - self._last_activity))
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=max(wait, 0.01))
+            except asyncio.TimeoutError:
+                pass
+
+    async def hydrated(self, timeout_ms: Optional[int] = None) -> None:
+        """Wait for ``AppContext`` to finish its initial fetch."""
+        await self.page.wait_for_selector(HYDRATED_SELECTOR, state="attached", timeout=self._cap(timeout_ms or self.timeout_ms))
+
+    async def settle(self, timeout_ms: Optional[int] = None) -> None:
+        """Hydration marker present and Supabase traffic idle."""
+        await self.hydrated(timeout_ms)
+        await self.network_idle(timeout_ms)
+
+    async def _step(self, name: str, action) -> None:
+        start = time.perf_counter()
+        await self.network_idle()
+        ready = time.perf_counter()
+        await action()
+        step = StepTiming(name, ready - start, time.perf_counter() - ready)
+        self.steps.append(step)
+        record_step(step.name, step.wait, step.action)
+
+    async def click(self, locator, name: Optional[str] = None, **kwargs) -> None:
+        kwargs["timeout"] = self._cap(kwargs.get("timeout", DEFAULT_TIMEOUT_MS))
+        await self._step(name or f"click {describe(locator)}", lambda: locator.click(**kwargs))
+
+    async def fill(self, locator, value: str, name: Optional[str] = None, **kwargs) -> None:
+        kwargs["timeout"] = self._cap(kwargs.get("timeout", DEFAULT_TIMEOUT_MS))
+        await self._step(name or f"fill {describe(locator)}", lambda: locator.fill(value, **kwargs))
+
+    async def goto(self, url: str, name: Optional[str] = None, **kwargs) -> None:
+        async def action():
+            await self.page.goto(url, **kwargs)
+            await self.settle()
+        await self._step(name or f"goto {url}", action)
+
+    def total(self) -> float:
+        return sum(s.total for s in self.steps)
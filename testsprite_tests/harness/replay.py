@@ -0,0 +1,297 @@
+"""HAR record/replay of Supabase traffic for backend-independent UI timings.
+
+Case timings include Supabase (or stand-in) latency and the TestSprite
+tunnel, so a rendering regression can hide in backend jitter. This module
+runs cases in two modes:
+
+* ``record`` runs each case once against the live backend and saves its
+  REST, auth and storage exchanges to ``tmp/har/<case>.har`` through
+  Playwright's ``route_from_har(update=True)``,
+* ``replay`` serves those exchanges from a ``context.route`` handler,
+  optionally after a fixed ``--latency-ms``. Requests missing from the HAR
+  are aborted and counted (``--passthrough`` lets them through), and the
+  realtime websocket is stubbed, so no Supabase traffic goes over the
+  network. Only the app itself (``localhost:3333``) is still fetched.
+
+Replays match on method, path, query and body, and fall back to method,
+path and query: the body holds the refresh token for auth refreshes and
+the fresh timestamps for inserts. Repeated requests get the recorded
+responses in order, and the last one after that. Cases run one at a time
+with the browser to themselves, so ``cpu.browser_ms`` is recorded too
+(:mod:`harness.runner`)::
+
+    python -m harness.replay record TC001 TC010 TC012
+    python -m harness.replay replay TC001 TC010 TC012 --runs 5 --latency-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import re
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from . import results
+from .config import BROWSER_MODES, DEFAULT_BROWSER_MODE, TMP_DIR, supabase_settings
+from .readiness import SUPABASE_PATHS
+from .stats import format_summary, summarize
+
+HAR_DIR = TMP_DIR / "har"
+DEFAULT_TIER = "replay"
+# Hop-by-hop or encoding headers that no longer describe the decoded body.
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+# supabase-js keeps reconnecting its realtime socket; a socket that never
+# opens keeps it quiet without touching the network.
+_REALTIME_STUB_JS = """
+(() => {
+  const Native = window.WebSocket;
+  window.WebSocket = function (url, protocols) {
+    if (String(url).includes('/realtime/')) {
+      const ws = new EventTarget();
+      ws.readyState = 0; ws.url = String(url); ws.send = () => {}; ws.close = () => { ws.readyState = 3; };
+      return ws;
+    }
+    return new Native(url, protocols);
+  };
+  Object.assign(window.WebSocket, { CONNECTING: 0, OPEN: 1, CLOSING: 2, CLOSED: 3 });
+})();
+"""
+
+
+def supabase_pattern(url: Optional[str] = None) -> re.Pattern:
+    """Requests to the project's REST, auth and storage endpoints."""
+    base = url or supabase_settings()[0]
+    paths = "|".join(re.escape(p) for p in SUPABASE_PATHS)
+    return re.compile(rf"^{re.escape(base)}({paths})")
+
+
+def har_path(case_id: str, har_dir: Path = HAR_DIR) -> Path:
+    return har_dir / f"{case_id}.har"
+
+
+def _request_key(method: str, url: str) -> str:
+    parsed = urlparse(url)
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return f"{method.upper()} {parsed.path}?{query}"
+
+
+def _body_hash(body: Optional[bytes]) -> str:
+    return hashlib.sha1(body or b"").hexdigest()
+
+
+@dataclass
+class Response:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+def _response(entry: dict) -> Response:
+    res = entry["response"]
+    content = res.get("content", {})
+    text = content.get("text") or ""
+    body = base64.b64decode(text) if content.get("encoding") == "base64" else text.encode("utf-8")
+    headers = {h["name"]: h["value"] for h in res.get("headers", []) if h["name"].lower() not in _DROP_HEADERS}
+    return Response(res["status"], headers, body)
+
+
+def _post_body(entry: dict) -> Optional[bytes]:
+    post = entry["request"].get("postData")
+    if not post:
+        return None
+    text = post.get("text") or ""
+    return base64.b64decode(text) if post.get("encoding") == "base64" else text.encode("utf-8")
+
+
+class HarReplay:
+    """Serves one HAR file's Supabase responses to a context's requests."""
+
+    def __init__(self, path: Path, latency_ms: float = 0.0, passthrough: bool = False):
+        with open(path, encoding="utf-8") as fh:
+            entries = json.load(fh)["log"]["entries"]
+        self.latency_ms = latency_ms
+        self.passthrough = passthrough
+        # Recorded responses per exact and loose key, with a cursor each.
+        self._exact: Dict[Tuple[str, str], List[Response]] = {}
+        self._loose: Dict[str, List[Response]] = {}
+        for entry in entries:
+            req = entry["request"]
+            key = _request_key(req["method"], req["url"])
+            response = _response(entry)
+            self._exact.setdefault((key, _body_hash(_post_body(entry))), []).append(response)
+            self._loose.setdefault(key, []).append(response)
+        self._served: Dict[object, int] = {}
+        self.hits = 0
+        self.misses: List[str] = []
+
+    def _next(self, key: object, responses: List[Response]) -> Response:
+        i = self._served.get(key, 0)
+        self._served[key] = i + 1
+        return responses[min(i, len(responses) - 1)]
+
+    def lookup(self, method: str, url: str, body: Optional[bytes]) -> Optional[Response]:
+        key = _request_key(method, url)
+        exact = (key, _body_hash(body))
+        if exact in self._exact:
+            return self._next(exact, self._exact[exact])
+        if key in self._loose:
+            return self._next(key, self._loose[key])
+        return None
+
+    async def handle(self, route) -> None:
+        request = route.request
+        response = self.lookup(request.method, request.url, request.post_data_buffer)
+        if response is None:
+            self.misses.append(_request_key(request.method, request.url))
+            if self.passthrough:
+                await route.continue_()
+            else:
+                await route.abort("internetdisconnected")
+            return
+        self.hits += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        await route.fulfill(status=response.status, headers=response.headers, body=response.body)
+
+    async def install(self, context) -> None:
+        await context.add_init_script(_REALTIME_STUB_JS)
+        await context.route(supabase_pattern(), self.handle)
+
+
+@dataclass
+class ReplayResult:
+    case_id: str
+    runs: int
+    passed: int = 0
+    duration: Dict[str, float] = field(default_factory=dict)
+    cpu_ms: Dict[str, float] = field(default_factory=dict)
+    hits: int = 0
+    misses: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    def format(self) -> str:
+        lines = [
+            f"{self.case_id:<7} {self.passed}/{self.runs} passed, {self.hits} responses replayed, {len(self.misses)} missing",
+            "  " + format_summary("duration ms", self.duration),
+            "  " + format_summary("browser cpu ms", self.cpu_ms),
+        ]
+        lines += [f"  MISS {m}" for m in sorted(set(self.misses))[:10]]
+        lines += [f"  ERROR {e.splitlines()[0][:120]}" for e in self.errors[:3]]
+        return "\n".join(lines)
+
+
+async def record(case_ids: Sequence[str], har_dir: Path = HAR_DIR, headless: bool = True,
+                 mode: str = DEFAULT_BROWSER_MODE) -> list:
+    """Run each case once against the live backend, saving its HAR."""
+    from .pool import BrowserPool
+    from .runner import run_case_id
+
+    har_dir.mkdir(parents=True, exist_ok=True)
+    current: Dict[str, Path] = {}
+
+    async def setup(context) -> None:
+        # Written when the context closes, at the end of the case.
+        await context.route_from_har(str(current["path"]), url=supabase_pattern(), update=True,
+                                     update_content="embed", update_mode="full")
+
+    outcome = []
+    async with BrowserPool(workers=1, headless=headless, mode=mode, setup=setup) as pool:
+        for case_id in case_ids:
+            current["path"] = har_path(case_id, har_dir)
+            current["path"].unlink(missing_ok=True)
+            result = await run_case_id(pool, case_id)
+            print(f"{case_id:<7} {result.status:<7} {result.duration:7.2f}s -> {current['path']}")
+            outcome.append(result)
+    return outcome
+
+
+async def replay(case_ids: Sequence[str], runs: int = 3, latency_ms: float = 0.0, passthrough: bool = False,
+                 har_dir: Path = HAR_DIR, headless: bool = True, mode: str = DEFAULT_BROWSER_MODE):
+    """Run each case ``runs`` times against its HAR; returns summaries and raw results."""
+    from .pool import BrowserPool
+    from .runner import run_case_id
+
+    current: Dict[str, HarReplay] = {}
+
+    async def setup(context) -> None:
+        await current["replay"].install(context)
+
+    summaries, raw = [], []
+    async with BrowserPool(workers=1, headless=headless, mode=mode, setup=setup) as pool:
+        for case_id in case_ids:
+            summary = ReplayResult(case_id, runs)
+            path = har_path(case_id, har_dir)
+            if not path.exists():
+                summary.errors.append(f"no HAR at {path}; record it first")
+                summaries.append(summary)
+                continue
+            durations, cpu = [], []
+            for _ in range(runs):
+                current["replay"] = HarReplay(path, latency_ms, passthrough)
+                result = await run_case_id(pool, case_id)
+                raw.append(result)
+                summary.hits += current["replay"].hits
+                summary.misses += current["replay"].misses
+                if result.status == "PASSED":
+                    summary.passed += 1
+                elif result.error:
+                    summary.errors.append(result.error)
+                durations.append(result.duration * 1000)
+                cpu.extend(v for m, v in result.samples if m == "cpu.browser_ms")
+            summary.duration = summarize(durations)
+            summary.cpu_ms = summarize(cpu)
+            summaries.append(summary)
+    return summaries, raw
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Record Supabase traffic of cases to HAR files and replay it without a backend.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, text in (("record", "run cases live and save their HAR files"),
+                       ("replay", "run cases against their HAR files")):
+        p = sub.add_parser(name, help=text)
+        p.add_argument("cases", nargs="+", help="case ids (e.g. TC001)")
+        p.add_argument("--har-dir", type=Path, default=HAR_DIR, help="HAR directory (default: tmp/har)")
+        p.add_argument("--browser", choices=sorted(BROWSER_MODES), default=DEFAULT_BROWSER_MODE, help=f"Chromium process model (default: {DEFAULT_BROWSER_MODE})")
+        p.add_argument("--headed", action="store_true", help="show the browser window")
+    rep = sub.choices["replay"]
+    rep.add_argument("--runs", type=int, default=3, help="runs per case (default: 3)")
+    rep.add_argument("--latency-ms", type=float, default=0.0, help="fixed delay before each replayed response")
+    rep.add_argument("--passthrough", action="store_true", help="send requests missing from the HAR to the live backend")
+    rep.add_argument("--tier", default=DEFAULT_TIER, help=f"tier of the stored run (default: {DEFAULT_TIER})")
+    rep.add_argument("--db", type=Path, default=results.DEFAULT_DB, help="results database (default: tmp/results.sqlite)")
+    rep.add_argument("--no-record", action="store_true", help="do not append the runs to the results database")
+    rep.add_argument("--json", help="write the summaries to this file")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    cases = [c.upper() for c in args.cases]
+    if args.command == "record":
+        outcome = asyncio.run(record(cases, args.har_dir, headless=not args.headed, mode=args.browser))
+        return 0 if all(r.status == "PASSED" for r in outcome) else 1
+    summaries, raw = asyncio.run(replay(cases, args.runs, args.latency_ms, args.passthrough, args.har_dir,
+                                        headless=not args.headed, mode=args.browser))
+    for summary in summaries:
+        print(summary.format())
+    if raw and not args.no_record:
+        with results.ResultsStore(args.db) as store:
+            run_id = store.record_run(raw, tier=args.tier, workers=1)
+        print(f"recorded as run {run_id} in {args.db} (tier {args.tier!r})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump([asdict(s) for s in summaries], fh, indent=2)
+    return 0 if all(s.passed == s.runs and not s.misses for s in summaries) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,401 @@
+"""Append-only results store with run-over-run regression checks.
+
+``tmp/test_results.json`` only says PASSED or FAILED. Every run of
+:mod:`harness.runner` is also appended to a SQLite database
+(``tmp/results.sqlite``, or ``TESTSPRITE_RESULTS_DB``) keyed by git SHA and
+scale tier, with one row per sample:
+
+* ``duration`` - the whole case once its context is leased, in ms,
+* ``queue.wait_ms`` - wait for a worker slot and the login before that,
+* ``step:<name>`` - each :class:`~harness.readiness.Readiness` step, in ms,
+* ``assert:<selector>`` - time each assertion waited, in ms,
+* ``load.<phase>.<metric>`` - TC001's cold/warm page-load timings, in ms,
+* ``network.requests`` / ``network.bytes`` - Supabase traffic of the case,
+* ``memory.js_heap_bytes`` - largest JS heap of the case's pages at the end.
+
+``compare`` pools the samples of every run at two SHAs and flags metrics
+that got slower with a one-sided Mann-Whitney U test, so a case that still
+passes but takes twice as long fails the check::
+
+    python -m harness.results runs
+    python -m harness.results compare --tier 10k            # latest SHA vs the one before
+    python -m harness.results compare --base 5ad3b22 --head HEAD
+    python -m harness.results trend TC001 --metric duration
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextvars
+import math
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .config import REPO_ROOT, TMP_DIR
+from .stats import percentile
+
+DEFAULT_DB = Path(os.environ.get("TESTSPRITE_RESULTS_DB", TMP_DIR / "results.sqlite"))
+DEFAULT_TIER = os.environ.get("TESTSPRITE_TIER", "default")
+# Flag a metric when it is significantly slower *and* its median moved by
+# at least this much; tiny but consistent shifts are not worth a red build.
+DEFAULT_ALPHA = 0.05
+DEFAULT_MIN_CHANGE = 0.10
+MIN_SAMPLES = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    git_sha TEXT NOT NULL,
+    dirty INTEGER NOT NULL,
+    tier TEXT NOT NULL,
+    host TEXT,
+    workers INTEGER
+);
+CREATE TABLE IF NOT EXISTS cases (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    case_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration_ms REAL NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    case_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_sha_tier ON runs (git_sha, tier);
+CREATE INDEX IF NOT EXISTS samples_run ON samples (run_id, case_id, metric);
+"""
+
+
+class Recorder:
+    """Collects the samples of one case while it runs."""
+
+    def __init__(self):
+        self.samples: List[Tuple[str, float]] = []
+        self.totals: Dict[str, float] = {}
+        self._pending: set = set()
+
+    def add(self, metric: str, value: float) -> None:
+        self.samples.append((metric, float(value)))
+
+    def total(self, metric: str, value: float) -> None:
+        """Add ``value`` to a per-case total (one sample per case)."""
+        self.totals[metric] = self.totals.get(metric, 0.0) + value
+
+    def rows(self) -> List[Tuple[str, float]]:
+        return self.samples + list(self.totals.items())
+
+    def watch_network(self, context, paths: Sequence[str]) -> None:
+        """Count Supabase requests and response bytes finished in ``context``."""
+        def on_finished(request):
+            if request.method == "OPTIONS" or not any(p in request.url for p in paths):
+                return
+            self.total("network.requests", 1)
+            task = asyncio.ensure_future(request.sizes())
+            task.add_done_callback(self._on_sizes)
+            self._pending.add(task)
+
+        context.on("requestfinished", on_finished)
+
+    def _on_sizes(self, task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is None:
+            sizes = task.result()
+            self.total("network.bytes", sizes["responseBodySize"] + sizes["responseHeadersSize"])
+
+    async def collect_page_metrics(self, context) -> None:
+        """Record the largest JS heap and the summed main-thread task time of
+        ``context``'s open pages (Chromium)."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        heaps = []
+        task_s = None
+        for page in context.pages:
+            try:
+                session = await context.new_cdp_session(page)
+                await session.send("Performance.enable")
+                metrics = {m["name"]: m["value"] for m in (await session.send("Performance.getMetrics"))["metrics"]}
+                await session.detach()
+            except Exception:  # noqa: BLE001 - closed page or non-Chromium browser
+                continue
+            if "JSHeapUsedSize" in metrics:
+                heaps.append(metrics["JSHeapUsedSize"])
+            if "TaskDuration" in metrics:
+                task_s = (task_s or 0.0) + metrics["TaskDuration"]
+        if heaps:
+            self.add("memory.js_heap_bytes", max(heaps))
+        if task_s is not None:
+            self.add("cpu.renderer_ms", task_s * 1000)
+
+
+_current: contextvars.ContextVar[Optional[Recorder]] = contextvars.ContextVar("testsprite_recorder", default=None)
+
+
+def activate(recorder: Recorder) -> contextvars.Token:
+    return _current.set(recorder)
+
+
+def record_step(name: str, wait_s: float, action_s: float) -> None:
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.add(f"step:{name}", (wait_s + action_s) * 1000)
+
+
+def record_metric(metric: str, value: float) -> None:
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.add(metric, value)
+
+
+def record_assertion(selector: str, waited_s: float) -> None:
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.add(f"assert:{selector}", waited_s * 1000)
+
+
+def git_revision(root: Path = REPO_ROOT) -> Tuple[str, bool]:
+    """``(sha, dirty)`` of the checkout; ``TESTSPRITE_GIT_SHA`` overrides it."""
+    override = os.environ.get("TESTSPRITE_GIT_SHA")
+    if override:
+        return override, False
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return sha, bool(status.strip())
+
+
+class ResultsStore:
+    """SQLite database of runs, case outcomes and samples. Rows are never updated."""
+
+    def __init__(self, path: Path = DEFAULT_DB):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def record_run(self, results: Iterable, tier: str = DEFAULT_TIER, workers: Optional[int] = None,
+                   sha: Optional[str] = None, dirty: Optional[bool] = None) -> int:
+        """Append ``results`` (runner ``CaseResult``\\ s) as one run; returns its id."""
+        if sha is None:
+            sha, dirty = git_revision()
+        with self.conn:
+            run_id = self.conn.execute(
+                "INSERT INTO runs (started_at, git_sha, dirty, tier, host, workers) VALUES (?, ?, ?, ?, ?, ?)",
+                (time.time(), sha, int(bool(dirty)), tier, socket.gethostname(), workers),
+            ).lastrowid
+            for r in results:
+                self.conn.execute("INSERT INTO cases VALUES (?, ?, ?, ?, ?)",
+                                  (run_id, r.case_id, r.status, r.duration * 1000, r.error))
+                rows = [("duration", r.duration * 1000)] + list(r.samples)
+                self.conn.executemany("INSERT INTO samples VALUES (?, ?, ?, ?)",
+                                      [(run_id, r.case_id, metric, value) for metric, value in rows])
+        return run_id
+
+    def runs(self, tier: Optional[str] = None, limit: int = 20) -> List[tuple]:
+        query = ("SELECT r.id, r.started_at, r.git_sha, r.dirty, r.tier, COUNT(c.case_id), "
+                 "SUM(c.status = 'PASSED') FROM runs r LEFT JOIN cases c ON c.run_id = r.id")
+        args: list = []
+        if tier:
+            query += " WHERE r.tier = ?"
+            args.append(tier)
+        query += " GROUP BY r.id ORDER BY r.id DESC LIMIT ?"
+        return self.conn.execute(query, args + [limit]).fetchall()
+
+    def resolve(self, rev: str, tier: str) -> Optional[str]:
+        """Full SHA with runs in ``tier`` matching ``rev`` (prefix or ``HEAD``)."""
+        if rev.upper() == "HEAD":
+            rev = git_revision()[0]
+        row = self.conn.execute(
+            "SELECT git_sha FROM runs WHERE tier = ? AND git_sha LIKE ? ORDER BY id DESC LIMIT 1",
+            (tier, rev + "%"),
+        ).fetchone()
+        return row[0] if row else None
+
+    def shas(self, tier: str) -> List[str]:
+        """SHAs with runs in ``tier``, oldest first by their latest run."""
+        rows = self.conn.execute(
+            "SELECT git_sha FROM runs WHERE tier = ? GROUP BY git_sha ORDER BY MAX(id)", (tier,)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def samples(self, sha: str, tier: str) -> Dict[Tuple[str, str], List[float]]:
+        """``{(case_id, metric): values}`` pooled over every run of ``sha``."""
+        grouped: Dict[Tuple[str, str], List[float]] = {}
+        rows = self.conn.execute(
+            "SELECT s.case_id, s.metric, s.value FROM samples s JOIN runs r ON r.id = s.run_id "
+            "WHERE r.git_sha = ? AND r.tier = ?", (sha, tier),
+        )
+        for case_id, metric, value in rows:
+            grouped.setdefault((case_id, metric), []).append(value)
+        return grouped
+
+    def durations(self, tier: str, runs: int = 10) -> Dict[str, float]:
+        """Median case duration (ms) over the last ``runs`` runs of ``tier``.
+
+        Timed-out cases are left out: their duration is the budget, not the work.
+        """
+        grouped: Dict[str, List[float]] = {}
+        rows = self.conn.execute(
+            "SELECT case_id, duration_ms FROM cases WHERE status != 'TIMEOUT' AND run_id IN "
+            "(SELECT id FROM runs WHERE tier = ? ORDER BY id DESC LIMIT ?)", (tier, runs),
+        )
+        for case_id, duration in rows:
+            grouped.setdefault(case_id, []).append(duration)
+        return {case_id: percentile(values, 50) for case_id, values in grouped.items()}
+
+
+def mann_whitney_greater(base: Sequence[float], head: Sequence[float]) -> float:
+    """One-sided p-value that ``head`` tends to be larger than ``base``.
+
+    Normal approximation with tie correction; fine for the handful-to-
+    hundreds of samples a metric collects.
+    """
+    n1, n2 = len(base), len(head)
+    pooled = sorted([(v, 0) for v in base] + [(v, 1) for v in head])
+    ranks = [0.0] * len(pooled)
+    ties = 0.0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        t = j - i + 1
+        ties += t ** 3 - t
+        i = j + 1
+    u = sum(r for r, (_, side) in zip(ranks, pooled) if side == 1) - n2 * (n2 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+@dataclass
+class Change:
+    case_id: str
+    metric: str
+    base_p50: float
+    head_p50: float
+    p_value: float
+    n_base: int
+    n_head: int
+
+    @property
+    def ratio(self) -> float:
+        return self.head_p50 / self.base_p50 if self.base_p50 else math.inf
+
+
+@dataclass
+class Comparison:
+    base: str
+    head: str
+    regressions: List[Change] = field(default_factory=list)
+    checked: int = 0
+    skipped: int = 0
+
+
+def compare(store: ResultsStore, base: str, head: str, tier: str, alpha: float = DEFAULT_ALPHA,
+            min_change: float = DEFAULT_MIN_CHANGE) -> Comparison:
+    """Metrics significantly larger at ``head`` than at ``base``."""
+    result = Comparison(base, head)
+    before, after = store.samples(base, tier), store.samples(head, tier)
+    for key in sorted(before.keys() & after.keys()):
+        a, b = before[key], after[key]
+        if len(a) < MIN_SAMPLES or len(b) < MIN_SAMPLES:
+            result.skipped += 1
+            continue
+        result.checked += 1
+        p50a, p50b = percentile(a, 50), percentile(b, 50)
+        if p50b < p50a * (1 + min_change):
+            continue
+        p = mann_whitney_greater(a, b)
+        if p < alpha:
+            result.regressions.append(Change(key[0], key[1], p50a, p50b, p, len(a), len(b)))
+    result.regressions.sort(key=lambda c: c.ratio, reverse=True)
+    return result
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Inspect stored TestSprite runs and flag performance regressions.")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help="results database (default: tmp/results.sqlite)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    runs = sub.add_parser("runs", help="list recent runs")
+    runs.add_argument("--tier", help="only this tier")
+    runs.add_argument("--limit", type=int, default=20)
+    cmp_ = sub.add_parser("compare", help="flag metrics that got significantly slower")
+    cmp_.add_argument("--tier", default=DEFAULT_TIER, help=f"scale tier (default: {DEFAULT_TIER})")
+    cmp_.add_argument("--base", help="baseline SHA (default: the SHA run before --head)")
+    cmp_.add_argument("--head", help="SHA to check (default: the latest run's SHA)")
+    cmp_.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="significance level (default: 0.05)")
+    cmp_.add_argument("--min-change", type=float, default=DEFAULT_MIN_CHANGE, help="minimum median slowdown (default: 0.10)")
+    trend = sub.add_parser("trend", help="median of one metric per SHA")
+    trend.add_argument("case", help="case id, e.g. TC001")
+    trend.add_argument("--metric", default="duration", help="metric name (default: duration)")
+    trend.add_argument("--tier", default=DEFAULT_TIER)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    with ResultsStore(args.db) as store:
+        if args.command == "runs":
+            for run_id, started, sha, dirty, tier, cases, passed in store.runs(args.tier, args.limit):
+                stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(started))
+                print(f"{run_id:>5}  {stamp}  {sha[:10]}{'+' if dirty else ' '}  {tier:<8} {passed or 0}/{cases} passed")
+            return 0
+        if args.command == "trend":
+            case_id = args.case.upper()
+            for sha in store.shas(args.tier):
+                values = store.samples(sha, args.tier).get((case_id, args.metric), [])
+                if values:
+                    print(f"{sha[:10]}  n={len(values):<4} p50={percentile(values, 50):10.1f}  p95={percentile(values, 95):10.1f}")
+            return 0
+        shas = store.shas(args.tier)
+        head = store.resolve(args.head, args.tier) if args.head else (shas[-1] if shas else None)
+        if head is None:
+            print(f"no runs for head in tier {args.tier!r}", file=sys.stderr)
+            return 2
+        if args.base:
+            base = store.resolve(args.base, args.tier)
+        else:
+            earlier = shas[:shas.index(head)] if head in shas else []
+            base = earlier[-1] if earlier else None
+        if base is None:
+            print(f"no baseline runs in tier {args.tier!r}", file=sys.stderr)
+            return 2
+        result = compare(store, base, head, args.tier, args.alpha, args.min_change)
+    print(f"{base[:10]} -> {head[:10]} ({args.tier}): {result.checked} metrics compared, "
+          f"{result.skipped} with fewer than {MIN_SAMPLES} samples")
+    for c in result.regressions:
+        print(f"REGRESSION {c.case_id:<6} {c.metric[:60]:<60} p50 {c.base_p50:10.1f} -> {c.head_p50:10.1f} "
+              f"({c.ratio:.2f}x, p={c.p_value:.4f}, n={c.n_base}/{c.n_head})")
+    return 1 if result.regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
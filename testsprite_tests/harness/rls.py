@@ -0,0 +1,402 @@
+"""Row-level security cost profiler for the Admin, Technician and Client roles.
+
+The migrations put policies on ``clients``, ``orders``, ``order_timeline``,
+``leads``, ``order_items``, ``order_extra_items``... Some of them call
+``auth.uid()``/``auth.jwt()`` or run a subquery on every row. This module
+replays the app's query shapes (:data:`harness.queryplan.BUILTIN_SHAPES`,
+plus ``--log``) once for each role, against a local Postgres holding a
+seeded tier:
+
+* **shapes** - every shape runs under ``EXPLAIN ANALYZE`` twice. The RLS
+  run sets the role and ``request.jwt.claims`` the way PostgREST applies a
+  JWT. The bypass run keeps the connecting superuser with the same claims.
+  Row counts are shown with the times: a policy that hides rows can make
+  a query faster and still be expensive,
+* **policies** - the ``USING`` clause of every ``SELECT``/``ALL`` policy
+  from ``pg_policies`` is timed on its own, as a ``WHERE`` on its table,
+  and ranked by the time it adds. Clauses that call ``auth.*()`` per row,
+  or whose plan holds a ``SubPlan``, are flagged,
+* **http** (``--http``) - the shapes are also sent over REST with a minted
+  JWT per role, compared to a ``service_role`` token. The target
+  (``--url``) is the stand-in started with ``--dsn ... --rls`` by default,
+  or Supabase's PostgREST when ``TESTSPRITE_JWT_SECRET`` signs the tokens.
+  Requests that fail are listed in the report.
+
+Roles: ``admin`` (an authenticated user who is not a technician),
+``technician`` (the technician with the most orders), ``client`` (the
+client with the most orders) and ``anon`` (the Landing page). Everything
+runs in transactions that are rolled back. Only reads are measured::
+
+    python -m harness.rls --tiers smoke,10k,100k --seed
+    python -m harness.rls --roles admin,technician --http --json tmp/rls.json
+    python -m harness.rls --http --url http://localhost:54321
+
+Requires ``psycopg`` (v3): ``pip install "psycopg[binary]"``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import hmac
+import http.client
+import json
+import os
+import re
+import statistics
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+from urllib.parse import quote, urlparse
+
+from .config import STANDIN_URL
+from .queryplan import (DEFAULT_REPEAT, Catalog, Filter, QueryShape, ShapeError, explain, fill_samples, load_shapes,
+                        to_sql, walk)
+from .seed import DEFAULT_DSN, _connect
+
+DEFAULT_ROLES = ("admin", "technician", "client", "anon")
+DEFAULT_TOP = 15
+JWT_SECRET = os.environ.get("TESTSPRITE_JWT_SECRET")
+# The stand-in accepts any apikey; Supabase's PostgREST wants the anon key.
+DEFAULT_KEY = os.environ.get("TESTSPRITE_SUPABASE_KEY", "standin")
+ADMIN_SUB = str(uuid.uuid5(uuid.NAMESPACE_URL, "testsprite:rls:admin"))
+# auth.uid()/auth.jwt()/auth.role() not wrapped in a scalar subquery.
+_PER_ROW_AUTH = re.compile(r"(?<!SELECT )\bauth\.(uid|jwt|role)\(\)")
+
+
+def _most_common(conn, column: str) -> Optional[str]:
+    row = conn.execute(
+        f"SELECT {column}::text FROM public.orders WHERE {column} IS NOT NULL GROUP BY 1 ORDER BY count(*) DESC LIMIT 1"
+    ).fetchone()
+    return row[0] if row else None
+
+
+# role -> (database role, sub picker)
+ROLES: Dict[str, tuple] = {
+    "admin": ("authenticated", lambda conn: ADMIN_SUB),
+    "technician": ("authenticated", lambda conn: _most_common(conn, "technician_id")),
+    "client": ("authenticated", lambda conn: _most_common(conn, "client_id")),
+    "anon": ("anon", lambda conn: None),
+}
+
+
+def claims_for(role: str, conn) -> dict:
+    db_role, pick = ROLES[role]
+    claims = {"role": db_role, "aud": db_role, "exp": int(time.time()) + 3600, "app_role": role}
+    sub = pick(conn)
+    conn.rollback()
+    if sub:
+        claims["sub"] = sub
+    return claims
+
+
+def mint_jwt(claims: dict, secret: Optional[str] = JWT_SECRET) -> str:
+    """HS256 token for ``claims``; unsigned without a secret (the stand-in does not verify)."""
+    def b64(data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+    head = b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode()) + "." + b64(json.dumps(claims).encode())
+    signature = b64(hmac.new(secret.encode(), head.encode(), hashlib.sha256).digest()) if secret else ""
+    return f"{head}.{signature}"
+
+
+@contextmanager
+def session(conn, claims: dict, as_role: bool) -> Iterator[None]:
+    """A transaction carrying ``claims``, optionally under their role; always rolled back."""
+    import psycopg
+
+    with conn.transaction():
+        conn.execute(
+            "SELECT set_config('request.jwt.claims', %s, true), set_config('request.jwt.claim.sub', %s, true)",
+            (json.dumps(claims), claims.get("sub", "")),
+        )
+        if as_role:
+            conn.execute("SELECT set_config('role', %s, true)", (claims["role"],))
+        yield
+        raise psycopg.Rollback()
+
+
+@dataclass
+class ShapeCost:
+    role: str
+    shape: str
+    bypass_ms: Optional[float] = None
+    rls_ms: Optional[float] = None
+    bypass_rows: Optional[int] = None
+    rls_rows: Optional[int] = None
+    http_bypass_ms: Optional[float] = None
+    http_rls_ms: Optional[float] = None
+    error: Optional[str] = None
+    http_error: Optional[str] = None
+
+    @property
+    def added_ms(self) -> float:
+        if self.rls_ms is None or self.bypass_ms is None:
+            return 0.0
+        return self.rls_ms - self.bypass_ms
+
+
+@dataclass
+class PolicyCost:
+    table: str
+    policy: str
+    cmd: str
+    roles: List[str]
+    role: str
+    qual: str
+    rows: int = 0
+    passed: Optional[int] = None
+    added_ms: float = 0.0
+    hints: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def per_row_us(self) -> float:
+        return 1000 * self.added_ms / self.rows if self.rows else 0.0
+
+
+@dataclass
+class TierReport:
+    tier: str
+    shapes: List[ShapeCost] = field(default_factory=list)
+    policies: List[PolicyCost] = field(default_factory=list)
+
+    def format(self, top: int = DEFAULT_TOP) -> str:
+        lines = [f"tier {self.tier}"]
+        for role in dict.fromkeys(s.role for s in self.shapes):
+            mine = [s for s in self.shapes if s.role == role and s.error is None]
+            bypass = sum(s.bypass_ms or 0 for s in mine)
+            rls = sum(s.rls_ms or 0 for s in mine)
+            denied = sum(1 for s in self.shapes if s.role == role and s.error)
+            change = f"{100 * (rls - bypass) / bypass:+.0f}%" if bypass else "n/a"
+            lines.append(f"  {role:<11} {len(mine)} shapes: bypass {bypass:8.2f}ms, rls {rls:8.2f}ms ({change})"
+                         + (f", {denied} failed" if denied else ""))
+            for s in sorted(mine, key=lambda s: -s.added_ms)[:3]:
+                if s.added_ms <= 0:
+                    break
+                http = (f"  http {s.http_bypass_ms:.1f} -> {s.http_rls_ms:.1f}ms"
+                        if s.http_rls_ms is not None and s.http_bypass_ms is not None else "")
+                lines.append(f"      {s.added_ms:+8.2f}ms  rows {s.bypass_rows} -> {s.rls_rows}  {s.shape}{http}")
+        ranked = sorted((p for p in self.policies if p.error is None), key=lambda p: -p.added_ms)[:top]
+        if ranked:
+            lines.append("  most expensive policies (USING clause alone, full table):")
+        for p in ranked:
+            lines.append(f"    {p.added_ms:+8.2f}ms {p.per_row_us:7.2f}us/row  {p.table}.\"{p.policy}\" as {p.role} "
+                         f"({p.passed}/{p.rows} rows pass)")
+            lines += [f"        {hint}" for hint in p.hints]
+        lines += [f"  ERROR {p.table}.\"{p.policy}\" as {p.role}: {p.error}" for p in self.policies if p.error]
+        lines += [f"  HTTP ERROR {s.shape} as {s.role}: {s.http_error}" for s in self.shapes if s.http_error]
+        return "\n".join(lines)
+
+
+def policies(conn) -> List[dict]:
+    rows = conn.execute(
+        "SELECT tablename, policyname, cmd, roles::text[], qual FROM pg_policies "
+        "WHERE schemaname = 'public' AND qual IS NOT NULL AND cmd IN ('SELECT', 'ALL') ORDER BY 1, 2"
+    ).fetchall()
+    conn.rollback()
+    return [{"table": r[0], "policy": r[1], "cmd": r[2], "roles": list(r[3]), "qual": r[4]} for r in rows]
+
+
+def hints(qual: str, plan: dict) -> List[str]:
+    out = []
+    if _PER_ROW_AUTH.search(qual):
+        out.append("calls auth.*() per row; wrap it as (select auth.uid())")
+    if any(node.get("Subplan Name", "").startswith("SubPlan") for node, _ in walk(plan.get("Plan", {}))):
+        out.append("runs a correlated SubPlan per row")
+    return out
+
+
+class Profiler:
+    def __init__(self, conn, repeat: int = DEFAULT_REPEAT, timeout_ms: int = 60000):
+        self.conn = conn
+        self.repeat = repeat
+        conn.execute(f"SET statement_timeout = {int(timeout_ms)}")
+        conn.commit()
+        self.catalog = Catalog(conn)
+
+    def _explain(self, claims: dict, as_role: bool, sql: str, params: list):
+        with session(self.conn, claims, as_role):
+            ms, plan = explain(self.conn, sql, params, self.repeat)
+        return ms, plan["Plan"].get("Actual Rows")
+
+    def shape(self, role: str, claims: dict, shape: QueryShape) -> ShapeCost:
+        import psycopg
+
+        cost = ShapeCost(role, shape.label())
+        try:
+            sql, params = to_sql(shape, self.catalog)
+            cost.bypass_ms, cost.bypass_rows = self._explain(claims, False, sql, params)
+            # A permission error under the role is a result, not a failure.
+            cost.rls_ms, cost.rls_rows = self._explain(claims, True, sql, params)
+        except (ShapeError, psycopg.Error) as exc:
+            cost.error = str(exc).splitlines()[0]
+        return cost
+
+    def policy(self, role: str, claims: dict, entry: dict) -> PolicyCost:
+        import psycopg
+
+        cost = PolicyCost(entry["table"], entry["policy"], entry["cmd"], entry["roles"], role, entry["qual"])
+        table = f'public."{entry["table"]}"'
+        try:
+            base_ms, base_plan = self._plain(claims, f"SELECT count(*) FROM {table}")
+            qual_ms, qual_plan = self._plain(claims, f"SELECT count(*) FROM {table} WHERE ({entry['qual']})")
+        except psycopg.Error as exc:
+            cost.error = str(exc).splitlines()[0]
+            return cost
+        cost.rows = _scanned(base_plan)
+        cost.passed = _scanned(qual_plan, filtered=True)
+        cost.added_ms = qual_ms - base_ms
+        cost.hints = hints(entry["qual"], qual_plan)
+        return cost
+
+    def _plain(self, claims: dict, sql: str):
+        with session(self.conn, claims, as_role=False):
+            return explain(self.conn, sql, [], self.repeat)
+
+    def run(self, tier: str, roles: Sequence[str], shapes: Sequence[QueryShape],
+            http: Optional[Callable[[str, dict, QueryShape], tuple]] = None) -> TierReport:
+        report = TierReport(tier)
+        entries = policies(self.conn)
+        for role in roles:
+            claims = claims_for(role, self.conn)
+            for shape in shapes:
+                cost = self.shape(role, claims, shape)
+                if http is not None and cost.error is None:
+                    cost.http_bypass_ms, cost.http_rls_ms, cost.http_error = http(role, claims, shape)
+                report.shapes.append(cost)
+            for entry in entries:
+                if claims["role"] in entry["roles"] or "public" in entry["roles"]:
+                    report.policies.append(self.policy(role, claims, entry))
+        return report
+
+
+def _scanned(plan: dict, filtered: bool = False) -> int:
+    """Rows out of the scan under the aggregate (after the filter if ``filtered``)."""
+    node = plan.get("Plan", {})
+    while node.get("Plans"):
+        node = node["Plans"][0]
+    rows = node.get("Actual Rows", 0)
+    return rows if filtered else rows + node.get("Rows Removed by Filter", 0)
+
+
+def rest_path(shape: QueryShape) -> str:
+    """``shape`` as a PostgREST path with every value URL-encoded.
+
+    Seeded values hold spaces (client names) and a leading ``+`` (phones),
+    which :meth:`QueryShape.label` leaves as they are.
+    """
+    parts = [f"select={quote(shape.select, safe='*,():!')}"] if shape.select != "*" else []
+    parts += [f"{quote(f.column)}={f.op}.{quote(str(f.value), safe='(),*')}" for f in shape.filters]
+    if shape.order:
+        parts.append("order=" + ",".join(f"{quote(c)}.{'desc' if d else 'asc'}" for c, d in shape.order))
+    if shape.limit is not None:
+        parts.append(f"limit={shape.limit}")
+    return f"{shape.table}?{'&'.join(parts)}" if parts else shape.table
+
+
+class RestTimer:
+    """Times shapes over REST with a JWT per role against one keep-alive connection."""
+
+    def __init__(self, url: str, key: str, repeat: int = DEFAULT_REPEAT):
+        parsed = urlparse(url)
+        cls = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        self.conn = cls(parsed.hostname, parsed.port)
+        self.prefix = parsed.path.rstrip("/") + "/rest/v1/"
+        self.key = key
+        self.repeat = repeat
+
+    def _get(self, path: str, token: str) -> float:
+        times = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            self.conn.request("GET", self.prefix + path, headers={"apikey": self.key, "Authorization": f"Bearer {token}"})
+            response = self.conn.getresponse()
+            body = response.read()
+            times.append((time.perf_counter() - start) * 1000)
+            if response.status >= 400:
+                raise RuntimeError(f"HTTP {response.status}: {body.decode(errors='replace')[:200]}")
+        return statistics.median(times)
+
+    def __call__(self, role: str, claims: dict, shape: QueryShape) -> tuple:
+        """``(bypass_ms, rls_ms, error)``; the times are ``None`` when a request failed."""
+        path = rest_path(shape)
+        service = dict(claims, role="service_role", aud="service_role")
+        try:
+            return self._get(path, mint_jwt(service)), self._get(path, mint_jwt(claims)), None
+        except (OSError, RuntimeError, http.client.HTTPException) as exc:
+            self.conn.close()
+            return None, None, str(exc) or type(exc).__name__
+
+
+def profile(dsn: str, tiers: Sequence[str], roles: Sequence[str], shapes: Sequence[QueryShape], reseed: bool = False,
+            repeat: int = DEFAULT_REPEAT, use_http: bool = False, url: str = STANDIN_URL,
+            key: str = DEFAULT_KEY) -> List[TierReport]:
+    import psycopg
+
+    reports = []
+    for tier in tiers:
+        if reseed:
+            from .seed import seed
+
+            seed(dsn, tier, truncate=True)
+        with _connect(dsn) as conn:
+            filled = []
+            for original in shapes:
+                shape = QueryShape(**{**asdict(original), "filters": [Filter(**asdict(f)) for f in original.filters]})
+                try:
+                    filled.append(fill_samples(shape, conn))
+                except (ShapeError, psycopg.Error) as exc:
+                    conn.rollback()
+                    print(f"{tier}: skipped {original.label()}: {str(exc).splitlines()[0]}", file=sys.stderr)
+            timer = RestTimer(url, key, repeat=repeat) if use_http else None
+            reports.append(Profiler(conn, repeat).run(tier, roles, filled, timer))
+    return reports
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Measure what row-level security costs the app's queries, per role.")
+    parser.add_argument("--dsn", default=DEFAULT_DSN, help="Postgres DSN (default: $TESTSPRITE_PG_DSN or local Supabase)")
+    parser.add_argument("--tiers", default="current", help="comma-separated tier labels (default: current)")
+    parser.add_argument("--seed", action="store_true", help="truncate and seed each tier with harness.seed first")
+    parser.add_argument("--roles", default=",".join(DEFAULT_ROLES), help="roles to profile (default: admin,technician,client,anon)")
+    parser.add_argument("--log", type=Path, action="append", default=[], help="network log with more shapes (repeatable)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per measurement (default: 5)")
+    parser.add_argument("--http", action="store_true", help="also time the shapes over REST with per-role JWTs")
+    parser.add_argument("--url", default=STANDIN_URL, help=f"REST target for --http (default: the stand-in, {STANDIN_URL})")
+    parser.add_argument("--key", default=DEFAULT_KEY, help="apikey for --http (default: $TESTSPRITE_SUPABASE_KEY or 'standin')")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="policies to list per tier (default: 15)")
+    parser.add_argument("--json", help="write the tier reports to this file")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    tiers = [t for t in args.tiers.split(",") if t]
+    if args.seed and "current" in tiers:
+        print("--seed needs --tiers from harness.seed.TIERS", file=sys.stderr)
+        return 2
+    roles = [r for r in args.roles.split(",") if r]
+    unknown = [r for r in roles if r not in ROLES]
+    if unknown:
+        print(f"unknown roles: {', '.join(unknown)} (expected {', '.join(ROLES)})", file=sys.stderr)
+        return 2
+    shapes, skipped = load_shapes(args.log, builtin=True)
+    for reason, count in skipped.items():
+        print(f"skipped {count} requests: {reason}", file=sys.stderr)
+    reports = profile(args.dsn, tiers, roles, shapes, args.seed, args.repeat, args.http, args.url, args.key)
+    for report in reports:
+        print(report.format(args.top))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump([asdict(r) for r in reports], fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""Run the TC cases concurrently against a shared :class:`BrowserPool`.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.runner                 # every TC*.py, 4 workers
+    python -m harness.runner -w 8 TC001 TC012
+    python -m harness.runner --tier 10k      # label the stored run's scale tier
+    python -m harness.runner --browser multi --isolation process -w 4
+
+Plan entries without a TC file (TC006, TC008, TC011) are compiled by
+:mod:`harness.plan` and run through :mod:`harness.engine` alongside them. Every run is appended to the
+:mod:`harness.results` store; :mod:`harness.shard` spreads the same cases
+over several processes or hosts.
+
+``--browser multi`` drops TestSprite's ``--single-process``/``--ipc=host``
+flags, which serialise renderer, GPU and network work on one thread.
+``--isolation process`` runs each case in a worker process that owns its own
+browser (one context at a time), so a crash only takes down that worker
+and its cases are retried alone. Cases report ``cpu.renderer_ms`` (page
+main-thread task time); with one context per browser they also report
+``cpu.browser_ms`` (all browser processes) and ``cpu.harness_ms`` (Python).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import multiprocessing
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from . import budget, results
+from .config import BROWSER_MODES, DEFAULT_BROWSER_MODE, TESTS_DIR
+from .plan import PLAN_PATH, CompiledPlan, compile_plan
+from .pool import BrowserPool
+from .readiness import SUPABASE_PATHS
+
+# Extra time past a case's budget before it is cancelled outright; waits are
+# already capped by the budget, so this only catches steps that ignore it.
+ABORT_GRACE_S = 5.0
+
+
+@dataclass
+class CaseResult:
+    case_id: str
+    path: Path
+    status: str = "PENDING"
+    duration: float = 0.0
+    error: Optional[str] = None
+    extra: dict = field(default_factory=dict)
+    samples: List[Tuple[str, float]] = field(default_factory=list)
+
+
+def discover(selected: Optional[List[str]] = None, root: Path = TESTS_DIR) -> List[Path]:
+    """Return the TC files under ``root``, filtered by case id prefix."""
+    paths = sorted(root.glob("TC[0-9][0-9][0-9]_*.py"))
+    if selected:
+        wanted = {s.upper() for s in selected}
+        paths = [p for p in paths if p.name.split("_", 1)[0] in wanted]
+    return paths
+
+
+def load_case(path: Path):
+    """Import a TC module without triggering its ``__main__`` block."""
+    spec = importlib.util.spec_from_file_location(f"testsprite_case_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def discover_plans(selected: Optional[List[str]] = None, covered: Optional[List[Path]] = None) -> List[CompiledPlan]:
+    """Compiled plan entries that have no TC file of their own.
+
+    Without ``selected``, entries the compiler cannot map are skipped;
+    explicitly selected ones are compiled regardless so errors surface.
+    """
+    have = {p.name.split("_", 1)[0] for p in (covered if covered is not None else discover())}
+    plans, errors = compile_plan(selected)
+    if selected:
+        for error in errors:
+            if error.split(" ", 1)[0] not in have:
+                print(f"plan: {error}", file=sys.stderr)
+    return [p for p in plans if p.case_id not in have]
+
+
+class CaseAborted(Exception):
+    """The case ran past its budget plus ``ABORT_GRACE_S`` and was cancelled."""
+
+
+class WaitTimeout(AssertionError):
+    """A wait inside the case (e.g. ``Readiness.network_idle``) timed out."""
+
+
+async def _guard(coro):
+    # Keep a wait that timed out inside the case apart from the abort below:
+    # on Python 3.11+ both are the builtin TimeoutError.
+    try:
+        return await coro
+    except (TimeoutError, asyncio.TimeoutError) as exc:
+        raise WaitTimeout(f"timed out: {exc}" if str(exc) else "timed out") from exc
+
+
+async def _execute(pool: BrowserPool, result: CaseResult, role: Optional[str], budget_s: float, test) -> CaseResult:
+    """Run ``test(context)`` under a fresh budget and record the outcome.
+
+    The budget and ``duration`` start once a context is leased; the wait for
+    a worker slot and the login before it are recorded as ``queue.wait_ms``.
+    """
+    queued = time.perf_counter()
+    start = None
+    recorder = results.Recorder()
+    # Process-wide CPU is only this case's when it has the browser to itself.
+    exclusive = pool.workers == 1
+    try:
+        async with pool.context(role=role) as context:
+            start = time.perf_counter()
+            recorder.add("queue.wait_ms", (start - queued) * 1000)
+            limit = budget.Budget(budget_s)
+            budget.activate(limit)
+            results.activate(recorder)
+            recorder.watch_network(context, SUPABASE_PATHS)
+            cpu_start = (await pool.cpu_time(), time.process_time()) if exclusive else None
+            try:
+                await asyncio.wait_for(_guard(test(context)), timeout=limit.total_s + ABORT_GRACE_S)
+            except (TimeoutError, asyncio.TimeoutError):
+                raise CaseAborted(f"aborted after exceeding its {limit.total_s:g}s budget") from None
+            finally:
+                await recorder.collect_page_metrics(context)
+                if cpu_start is not None:
+                    browser_s = await pool.cpu_time()
+                    if browser_s is not None and cpu_start[0] is not None:
+                        recorder.add("cpu.browser_ms", (browser_s - cpu_start[0]) * 1000)
+                    recorder.add("cpu.harness_ms", (time.process_time() - cpu_start[1]) * 1000)
+        result.status = "PASSED"
+    except CaseAborted as exc:
+        result.status = "TIMEOUT"
+        result.error = str(exc)
+    except AssertionError as exc:
+        result.status = "FAILED"
+        result.error = str(exc) or "assertion failed"
+    except Exception as exc:  # noqa: BLE001 - report every crash as a case error
+        result.status = "ERROR"
+        result.error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+    result.duration = time.perf_counter() - start if start is not None else 0.0
+    result.samples = recorder.rows()
+    return result
+
+
+async def run_case(pool: BrowserPool, path: Path) -> CaseResult:
+    result = CaseResult(case_id=path.name.split("_", 1)[0], path=path)
+    try:
+        module = load_case(path)
+    except Exception as exc:  # noqa: BLE001 - an unimportable case is a case error
+        result.status = "ERROR"
+        result.error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+        return result
+    budget_s = getattr(module, "BUDGET_S", budget.DEFAULT_CASE_BUDGET_S)
+    return await _execute(pool, result, getattr(module, "ROLE", None), budget_s, module.run_test)
+
+
+async def run_plan_case(pool: BrowserPool, plan: CompiledPlan) -> CaseResult:
+    from .engine import Engine
+
+    result = CaseResult(case_id=plan.case_id, path=PLAN_PATH)
+
+    async def test(context):
+        run = await Engine(context, plan).execute()
+        result.extra.update(wall=run.wall, serial=run.serial)
+
+    return await _execute(pool, result, plan.role, budget.DEFAULT_CASE_BUDGET_S, test)
+
+
+async def run_case_id(pool: BrowserPool, case_id: str) -> CaseResult:
+    """Run a TC file or, failing that, the compiled plan entry ``case_id``."""
+    paths = discover([case_id])
+    if paths:
+        return await run_case(pool, paths[0])
+    plans = discover_plans([case_id], covered=discover())
+    if not plans:
+        return CaseResult(case_id, PLAN_PATH, "ERROR", error="no TC file or compilable plan entry")
+    return await run_plan_case(pool, plans[0])
+
+
+async def run_suite(paths: List[Path], workers: int = 4, headless: bool = True,
+                    plans: Optional[List[CompiledPlan]] = None, mode: str = DEFAULT_BROWSER_MODE) -> List[CaseResult]:
+    async with BrowserPool(workers=workers, headless=headless, mode=mode) as pool:
+        jobs = [run_case(pool, p) for p in paths] + [run_plan_case(pool, plan) for plan in plans or []]
+        outcome = await asyncio.gather(*jobs)
+    return sorted(outcome, key=lambda r: r.case_id)
+
+
+# State of an --isolation process worker: one event loop and one browser,
+# kept across the cases the executor hands it.
+_worker: dict = {}
+
+
+def _worker_init(headless: bool, mode: str) -> None:
+    _worker.update(loop=asyncio.new_event_loop(), pool=BrowserPool(workers=1, headless=headless, mode=mode), started=False)
+    Finalize(None, _worker_close, exitpriority=10)
+
+
+def _worker_close() -> None:
+    if _worker.get("started"):
+        _worker["loop"].run_until_complete(_worker["pool"].close())
+    _worker["loop"].close()
+
+
+async def _worker_case(case_id: str) -> CaseResult:
+    pool = _worker["pool"]
+    if _worker["started"] and not pool.browser.is_connected():
+        # The browser crashed under a previous case; start a fresh one.
+        await pool.close()
+        _worker["started"] = False
+    if not _worker["started"]:
+        await pool.start()
+        _worker["started"] = True
+    return await run_case_id(pool, case_id)
+
+
+def _run_in_worker(case_id: str) -> CaseResult:
+    return _worker["loop"].run_until_complete(_worker_case(case_id))
+
+
+def run_isolated(case_ids: List[str], workers: int = 4, headless: bool = True,
+                 mode: str = DEFAULT_BROWSER_MODE) -> List[CaseResult]:
+    """Run each case in a worker process with a browser of its own."""
+    spawn = multiprocessing.get_context("spawn")
+    outcome: dict = {}
+    broken: List[str] = []
+    with ProcessPoolExecutor(workers, mp_context=spawn, initializer=_worker_init, initargs=(headless, mode)) as executor:
+        futures = {executor.submit(_run_in_worker, c): c for c in case_ids}
+        for future in as_completed(futures):
+            try:
+                outcome[futures[future]] = future.result()
+            except BrokenProcessPool:
+                broken.append(futures[future])
+    # A dead worker fails every queued case with it; rerun those one per
+    # fresh process so only the case that kills its worker is reported.
+    for case_id in sorted(broken):
+        with ProcessPoolExecutor(1, mp_context=spawn, initializer=_worker_init, initargs=(headless, mode)) as executor:
+            try:
+                outcome[case_id] = executor.submit(_run_in_worker, case_id).result()
+            except BrokenProcessPool:
+                paths = discover([case_id])
+                outcome[case_id] = CaseResult(case_id, paths[0] if paths else PLAN_PATH, "ERROR",
+                                              error="worker process died while running the case")
+    return sorted(outcome.values(), key=lambda r: r.case_id)
+
+
+def _cpu_ms(result: CaseResult) -> Optional[float]:
+    """Whole-browser CPU when it was attributable, else page main-thread time."""
+    samples = dict(result.samples)
+    return samples.get("cpu.browser_ms", samples.get("cpu.renderer_ms"))
+
+
+def print_report(results: List[CaseResult], wall: float) -> None:
+    for r in results:
+        line = f"{r.case_id:<7} {r.status:<7} {r.duration:7.2f}s"
+        cpu_ms = _cpu_ms(r)
+        line += f"  cpu {cpu_ms / 1000:6.2f}s" if cpu_ms is not None else " " * 13
+        if r.error:
+            first, *rest = r.error.splitlines()
+            line += f"  {first[:120]}"
+            # Multi-line failures list the missed expectations (harness.budget).
+            line += "".join(f"\n{'':>38}{detail[:120]}" for detail in rest[:20])
+        print(line)
+    slowest = max((r.duration for r in results), default=0.0)
+    total = sum(r.duration for r in results)
+    cpu = sum(_cpu_ms(r) or 0.0 for r in results) / 1000
+    print(f"\n{len(results)} cases | wall {wall:.2f}s | slowest {slowest:.2f}s | sum {total:.2f}s | cpu {cpu:.2f}s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run TestSprite cases in parallel.")
+    parser.add_argument("cases", nargs="*", help="case ids to run (e.g. TC001); default: all")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="concurrent contexts (default: 4)")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--browser", choices=sorted(BROWSER_MODES), default=DEFAULT_BROWSER_MODE,
+                        help=f"Chromium process model (default: {DEFAULT_BROWSER_MODE})")
+    parser.add_argument("--isolation", choices=("context", "process"), default="context",
+                        help="share one browser between contexts, or give each worker process its own (default: context)")
+    parser.add_argument("--tier", default=results.DEFAULT_TIER, help=f"scale tier of the data under test (default: {results.DEFAULT_TIER})")
+    parser.add_argument("--db", type=Path, default=results.DEFAULT_DB, help="results database (default: tmp/results.sqlite)")
+    parser.add_argument("--no-record", action="store_true", help="do not append this run to the results database")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    paths = discover(args.cases)
+    plans = discover_plans(args.cases, covered=discover())
+    if not paths and not plans:
+        print("no matching TC files or plan entries", file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+    if args.isolation == "process":
+        case_ids = [p.name.split("_", 1)[0] for p in paths] + [plan.case_id for plan in plans]
+        outcome = run_isolated(case_ids, workers=args.workers, headless=not args.headed, mode=args.browser)
+    else:
+        outcome = asyncio.run(run_suite(paths, workers=args.workers, headless=not args.headed, plans=plans, mode=args.browser))
+    print_report(outcome, time.perf_counter() - start)
+    if not args.no_record:
+        with results.ResultsStore(args.db) as store:
+            run_id = store.record_run(outcome, tier=args.tier, workers=args.workers)
+        print(f"recorded as run {run_id} in {args.db}")
+    return 0 if all(r.status == "PASSED" for r in outcome) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
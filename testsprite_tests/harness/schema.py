@@ -0,0 +1,229 @@
+"""Best-effort reader for the app's SQL migrations.
+
+Parses ``supabase/migration.sql`` followed by ``migrations/*.sql`` (in file
+name order) into a :class:`Schema`: tables with their columns, enum types,
+``CHECK (col IN (...))`` value lists, foreign keys and indexes. It is not a
+SQL parser; it understands the statement shapes these migrations use and
+ignores everything else (policies, functions, ``DO`` blocks).
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .config import TESTS_DIR
+
+REPO_DIR = TESTS_DIR.parent
+MIGRATION_FILES = [REPO_DIR / "supabase" / "migration.sql"] + sorted((REPO_DIR / "migrations").glob("*.sql"))
+
+_CONSTRAINT_KEYWORDS = ("primary key", "constraint", "unique", "check", "foreign key", "exclude")
+
+
+@dataclass
+class Column:
+    name: str
+    type: str
+    not_null: bool = False
+    has_default: bool = False
+    default: Optional[str] = None
+    generated: bool = False
+    primary_key: bool = False
+    unique: bool = False
+    references: Optional[str] = None
+    allowed: Optional[List[str]] = None
+
+    @property
+    def base_type(self) -> str:
+        return self.type.split("(")[0].strip().lower()
+
+    @property
+    def is_array(self) -> bool:
+        return self.type.endswith("[]")
+
+
+@dataclass
+class Index:
+    name: str
+    table: str
+    columns: List[str]
+    method: str = "btree"
+
+
+@dataclass
+class Table:
+    name: str
+    columns: Dict[str, Column] = field(default_factory=dict)
+
+    def insertable(self) -> List[Column]:
+        return [c for c in self.columns.values() if not c.generated]
+
+
+@dataclass
+class Schema:
+    tables: Dict[str, Table] = field(default_factory=dict)
+    enums: Dict[str, List[str]] = field(default_factory=dict)
+    indexes: Dict[str, Index] = field(default_factory=dict)
+
+    def table(self, name: str) -> Table:
+        return self.tables.setdefault(name, Table(name))
+
+    def allowed_values(self, column: Column) -> Optional[List[str]]:
+        """Values a column accepts, from its enum type or CHECK constraint."""
+        enum = self.enums.get(column.base_type)
+        return list(enum) if enum else column.allowed
+
+    def indexed_columns(self, table: str) -> List[Tuple[str, ...]]:
+        cols = [tuple(i.columns) for i in self.indexes.values() if i.table == table]
+        cols.extend((c.name,) for c in self.tables.get(table, Table(table)).columns.values() if c.primary_key or c.unique)
+        return cols
+
+
+def _strip_comments(sql: str) -> str:
+    sql = re.sub(r"/\*.*?\*/", "", sql, flags=re.S)
+    return re.sub(r"--[^\n]*", "", sql)
+
+
+def _unqualify(name: str) -> str:
+    name = name.strip().strip('"')
+    return name.split(".")[-1].strip('"').lower()
+
+
+def _split_top_level(body: str, sep: str = ",") -> Iterator[str]:
+    depth, start = 0, 0
+    in_str = False
+    for i, ch in enumerate(body):
+        if ch == "'":
+            in_str = not in_str
+        elif in_str:
+            continue
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == sep and depth == 0:
+            yield body[start:i].strip()
+            start = i + 1
+    tail = body[start:].strip()
+    if tail:
+        yield tail
+
+
+def _paren_body(sql: str, open_idx: int) -> Tuple[str, int]:
+    depth = 0
+    for i in range(open_idx, len(sql)):
+        if sql[i] == "(":
+            depth += 1
+        elif sql[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return sql[open_idx + 1:i], i
+    raise ValueError("unbalanced parentheses")
+
+
+_TYPE_STOP = re.compile(
+    r"\s+(not\s+null|null|default|primary\s+key|references|unique|check|generated|constraint|collate)\b",
+    re.I,
+)
+
+
+def _parse_column(defn: str) -> Optional[Column]:
+    m = re.match(r'\s*("?[\w]+"?)\s+(.*)$', defn, re.S)
+    if not m or defn.strip().lower().startswith(_CONSTRAINT_KEYWORDS):
+        return None
+    name, rest = m.group(1).strip('"').lower(), m.group(2).strip()
+    stop = _TYPE_STOP.search(" " + rest)
+    col_type = (rest if not stop else (" " + rest)[: stop.start()]).strip()
+    lower = rest.lower()
+    col = Column(name=name, type=col_type.lower())
+    col.not_null = bool(re.search(r"\bnot\s+null\b", lower)) or "primary key" in lower
+    col.has_default = " default " in f" {lower} "
+    default = re.search(r"\bdefault\s+(.+?)(?=\s+(?:not\s+null|null|primary\s+key|references|unique|check|constraint)\b|$)", rest, re.I | re.S)
+    if default:
+        col.default = default.group(1).strip()
+    col.generated = "generated always" in lower
+    col.primary_key = "primary key" in lower
+    col.unique = bool(re.search(r"\bunique\b", lower))
+    ref = re.search(r"references\s+([\w.\"]+)", rest, re.I)
+    if ref:
+        col.references = _unqualify(ref.group(1))
+    check = re.search(r"check\s*\(\s*\w+\s+in\s*\(([^)]*)\)", rest, re.I)
+    if check:
+        col.allowed = re.findall(r"'([^']*)'", check.group(1))
+    return col
+
+
+def parse(sql: str, schema: Optional[Schema] = None) -> Schema:
+    """Fold the statements in ``sql`` into ``schema`` (a new one by default)."""
+    schema = schema or Schema()
+    sql = _strip_comments(sql)
+
+    for m in re.finditer(r"create\s+type\s+([\w.]+)\s+as\s+enum\s*\(([^)]*)\)", sql, re.I):
+        schema.enums[_unqualify(m.group(1))] = re.findall(r"'([^']*)'", m.group(2))
+    for m in re.finditer(r"alter\s+type\s+([\w.]+)\s+add\s+value\s+(?:if\s+not\s+exists\s+)?'([^']*)'", sql, re.I):
+        values = schema.enums.setdefault(_unqualify(m.group(1)), [])
+        if m.group(2) not in values:
+            values.append(m.group(2))
+
+    for m in re.finditer(r"create\s+table\s+(?:if\s+not\s+exists\s+)?([\w.\"]+)\s*\(", sql, re.I):
+        table = schema.table(_unqualify(m.group(1)))
+        body, _ = _paren_body(sql, m.end() - 1)
+        for defn in _split_top_level(body):
+            col = _parse_column(defn)
+            if col and col.name not in table.columns:
+                table.columns[col.name] = col
+
+    for m in re.finditer(r"alter\s+table\s+(?:only\s+)?(?:if\s+exists\s+)?([\w.\"]+)\s+(.*?);", sql, re.I | re.S):
+        name = _unqualify(m.group(1))
+        if name not in schema.tables:
+            continue
+        table = schema.tables[name]
+        for action in _split_top_level(m.group(2)):
+            add = re.match(r"add\s+column\s+(?:if\s+not\s+exists\s+)?(.*)$", action, re.I | re.S)
+            if add:
+                col = _parse_column(add.group(1))
+                if col and col.name not in table.columns:
+                    table.columns[col.name] = col
+                continue
+            alter = re.match(r"alter\s+column\s+(\w+)\s+(.*)$", action, re.I | re.S)
+            if alter and alter.group(1).lower() in table.columns:
+                col, what = table.columns[alter.group(1).lower()], alter.group(2).strip()
+                retype = re.match(r"type\s+([\w.\[\]() ,]+?)(?:\s+using\b.*)?$", what, re.I | re.S)
+                if retype:
+                    col.type = _unqualify(retype.group(1).strip()) if "." in retype.group(1) else retype.group(1).strip().lower()
+                    col.allowed = None
+                elif re.match(r"set\s+not\s+null", what, re.I):
+                    col.not_null = True
+                elif re.match(r"drop\s+not\s+null", what, re.I):
+                    col.not_null = False
+                elif re.match(r"set\s+default", what, re.I):
+                    col.has_default = True
+                    col.default = re.sub(r"(?is)^set\s+default\s+", "", what).strip()
+                continue
+            uniq = re.match(r"add\s+constraint\s+\w+\s+unique\s*\((\w+)\)", action, re.I)
+            if uniq and uniq.group(1).lower() in table.columns:
+                table.columns[uniq.group(1).lower()].unique = True
+            if re.match(r"drop\s+constraint\s+(if\s+exists\s+)?\w+_(status|type|priority)_check", action, re.I):
+                col_name = re.search(r"_(status|type|priority)_check", action, re.I).group(1).lower()
+                if col_name in table.columns:
+                    table.columns[col_name].allowed = None
+
+    for m in re.finditer(
+        r"create\s+(?:unique\s+)?index\s+(?:concurrently\s+)?(?:if\s+not\s+exists\s+)?(\w+)\s+on\s+([\w.\"]+)\s*(?:using\s+(\w+)\s*)?\(([^)]*)\)",
+        sql,
+        re.I,
+    ):
+        cols = [re.split(r"\s+", c.strip())[0].strip('"').lower() for c in m.group(4).split(",")]
+        schema.indexes[m.group(1).lower()] = Index(m.group(1).lower(), _unqualify(m.group(2)), cols, (m.group(3) or "btree").lower())
+    return schema
+
+
+def load_schema(paths: Optional[List[Path]] = None) -> Schema:
+    """Parse every migration in order into one :class:`Schema`."""
+    schema = Schema()
+    for path in paths or MIGRATION_FILES:
+        if path.exists():
+            parse(path.read_text(encoding="utf-8"), schema)
+    return schema
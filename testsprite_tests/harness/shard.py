@@ -0,0 +1,400 @@
+"""Sharded execution of the suite across processes or hosts.
+
+One Chromium per host tops out at a few concurrent contexts, and cases
+differ a lot in cost (TC013 is ~15 focus clicks, TC001 ~45 assertions). This
+module spreads the TC files and compiled plan cases (:mod:`harness.plan`)
+over many worker processes through a small SQLite queue:
+
+* ``init`` creates the queue with one job per case. Each job is estimated
+  by its median duration in the last runs of the tier
+  (:meth:`~harness.results.ResultsStore.durations`). It also prints the
+  longest-processing-time-first split and how many shards reach
+  ``--target-s``,
+* ``work`` claims jobs longest-first (``BEGIN IMMEDIATE``), so idle workers
+  pick up what is left. A job whose worker died is re-leased after its
+  budget. ``--shard i`` restricts a worker to its static LPT share, for CI
+  matrices that cannot share a file,
+* ``merge`` prints one report for all workers, with per-worker busy time,
+  and records the run in the results store like :mod:`harness.runner`,
+* ``run`` does all three on one machine with ``-n`` local processes.
+
+Across hosts, put the queue on a shared filesystem that honours file
+locks::
+
+    python -m harness.shard run -n 4 -w 3                  # local, 4 processes x 3 contexts
+    python -m harness.shard init /mnt/ci/q.sqlite --shards 6
+    python -m harness.shard work /mnt/ci/q.sqlite -w 3      # on every host
+    python -m harness.shard merge /mnt/ci/q.sqlite --wait
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import budget, results
+from .config import BROWSER_MODES, DEFAULT_BROWSER_MODE, TESTS_DIR, TMP_DIR
+from .stats import percentile
+
+SHARD_DIR = TMP_DIR / "shards"
+DEFAULT_ESTIMATE_S = 30.0
+DEFAULT_TARGET_S = 60.0
+HISTORY_RUNS = 10
+MAX_ATTEMPTS = 2
+# A claimed job is handed to another worker once this much longer than its
+# budget has passed without a result.
+LEASE_GRACE_S = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    case_id TEXT PRIMARY KEY,
+    estimate_s REAL NOT NULL,
+    shard INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL
+);
+CREATE TABLE IF NOT EXISTS outcomes (
+    case_id TEXT PRIMARY KEY,
+    worker TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration_s REAL NOT NULL,
+    error TEXT,
+    extra TEXT NOT NULL,
+    samples TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    name TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    lanes INTEGER NOT NULL,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def lpt(estimates: Dict[str, float], shards: int) -> List[List[str]]:
+    """Longest-processing-time-first split of ``estimates`` into ``shards``."""
+    heap = [(0.0, i) for i in range(shards)]
+    buckets: List[List[str]] = [[] for _ in range(shards)]
+    for case_id, est in sorted(estimates.items(), key=lambda kv: (-kv[1], kv[0])):
+        load, i = heapq.heappop(heap)
+        buckets[i].append(case_id)
+        heapq.heappush(heap, (load + est, i))
+    return buckets
+
+
+def makespan(estimates: Dict[str, float], buckets: Sequence[Sequence[str]]) -> float:
+    return max((sum(estimates[c] for c in b) for b in buckets), default=0.0)
+
+
+def shards_for(estimates: Dict[str, float], target_s: float, lanes: int = 1) -> Optional[int]:
+    """Fewest shards of ``lanes`` contexts whose LPT split fits ``target_s``."""
+    if not estimates or max(estimates.values()) > target_s:
+        return None
+    for n in range(1, len(estimates) + 1):
+        if makespan(estimates, lpt(estimates, n * lanes)) <= target_s:
+            return n
+    return None
+
+
+def estimate(case_ids: Sequence[str], history: Dict[str, float]) -> Dict[str, float]:
+    """Seconds per case from ``history`` (ms); unseen cases get the median."""
+    known = [history[c] / 1000 for c in case_ids if c in history]
+    fallback = percentile(known, 50) if known else DEFAULT_ESTIMATE_S
+    return {c: history[c] / 1000 if c in history else fallback for c in case_ids}
+
+
+class Queue:
+    """The coordinator: a SQLite file every worker opens."""
+
+    def __init__(self, path: Path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(path)
+        # Autocommit; claims open their own BEGIN IMMEDIATE.
+        self.conn = sqlite3.connect(str(path), timeout=60, isolation_level=None)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "Queue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _tx(self, fn):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            value = fn()
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return value
+
+    def meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def fill(self, estimates: Dict[str, float], shards: int, tier: str) -> List[List[str]]:
+        buckets = lpt(estimates, shards)
+        shard_of = {c: i for i, b in enumerate(buckets) for c in b}
+
+        def write():
+            self.conn.execute("DELETE FROM jobs")
+            self.conn.execute("DELETE FROM outcomes")
+            self.conn.execute("DELETE FROM workers")
+            self.conn.execute("DELETE FROM meta")
+            self.conn.executemany("INSERT INTO jobs (case_id, estimate_s, shard) VALUES (?, ?, ?)",
+                                  [(c, est, shard_of[c]) for c, est in estimates.items()])
+            self.conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                                  [("tier", tier), ("shards", str(shards)), ("created_at", str(time.time()))])
+        self._tx(write)
+        return buckets
+
+    def register(self, name: str, lanes: int) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO workers VALUES (?, ?, ?, ?)", (name, socket.gethostname(), lanes, time.time()))
+        self.conn.execute("INSERT OR IGNORE INTO meta VALUES ('started_at', ?)", (str(time.time()),))
+
+    def claim(self, worker: str, shard: Optional[int] = None) -> Optional[Tuple[str, float]]:
+        """Lease the longest job still open (or abandoned); None when drained."""
+        def take():
+            now = time.time()
+            row = self.conn.execute(
+                "SELECT case_id, estimate_s FROM jobs WHERE attempts < ? AND (? IS NULL OR shard = ?) "
+                "AND (state = 'pending' OR (state = 'running' AND lease_until < ?)) "
+                "ORDER BY estimate_s DESC, case_id LIMIT 1",
+                (MAX_ATTEMPTS, shard, shard, now),
+            ).fetchone()
+            if row is None:
+                return None
+            lease = max(3 * row[1], budget.DEFAULT_CASE_BUDGET_S) + LEASE_GRACE_S
+            self.conn.execute(
+                "UPDATE jobs SET state = 'running', worker = ?, attempts = attempts + 1, lease_until = ? WHERE case_id = ?",
+                (worker, now + lease, row[0]),
+            )
+            return row[0], row[1]
+        return self._tx(take)
+
+    def finish(self, worker: str, result, started_at: float) -> None:
+        def write():
+            self.conn.execute(
+                "INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (result.case_id, worker, result.status, result.duration, result.error,
+                 json.dumps(result.extra, default=str), json.dumps(result.samples), started_at, time.time()),
+            )
+            self.conn.execute("UPDATE jobs SET state = 'done', lease_until = NULL WHERE case_id = ?", (result.case_id,))
+        self._tx(write)
+
+    def open_jobs(self) -> int:
+        """Jobs that may still produce a result."""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE state != 'done' AND (attempts < ? OR lease_until >= ?)",
+            (MAX_ATTEMPTS, time.time()),
+        ).fetchone()[0]
+
+    def collect(self) -> list:
+        """Runner ``CaseResult``\\ s; jobs without an outcome become errors."""
+        from .plan import PLAN_PATH
+        from .runner import CaseResult, discover
+
+        paths = {p.name.split("_", 1)[0]: p for p in discover()}
+        outcome = []
+        for case_id, status, duration, error, extra, samples in self.conn.execute(
+            "SELECT case_id, status, duration_s, error, extra, samples FROM outcomes"
+        ):
+            outcome.append(CaseResult(case_id, paths.get(case_id, PLAN_PATH), status, duration, error,
+                                      json.loads(extra), [tuple(s) for s in json.loads(samples)]))
+        for case_id, worker, attempts in self.conn.execute(
+            "SELECT case_id, worker, attempts FROM jobs WHERE state != 'done'"
+        ):
+            error = f"lost: claimed {attempts}x, last by {worker}" if attempts else "never claimed"
+            outcome.append(CaseResult(case_id, paths.get(case_id, PLAN_PATH), "ERROR", 0.0, error))
+        return sorted(outcome, key=lambda r: r.case_id)
+
+    def busy(self) -> List[Tuple[str, int, float, float]]:
+        """``(worker, cases, busy_s, span_s)`` per worker."""
+        return self.conn.execute(
+            "SELECT worker, COUNT(*), SUM(finished_at - started_at), MAX(finished_at) - MIN(started_at) "
+            "FROM outcomes GROUP BY worker ORDER BY worker"
+        ).fetchall()
+
+    def wall(self) -> float:
+        row = self.conn.execute("SELECT MAX(finished_at) FROM outcomes").fetchone()
+        started = self.meta("started_at")
+        return row[0] - float(started) if row[0] is not None and started else 0.0
+
+    def lanes(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(lanes), 0) FROM workers").fetchone()[0]
+
+
+def case_ids(selected: Optional[List[str]] = None) -> List[str]:
+    """Every TC file and plan-only case, as the runner would pick them."""
+    from .runner import discover, discover_plans
+
+    paths = discover(selected)
+    plans = discover_plans(selected, covered=discover())
+    return sorted({p.name.split("_", 1)[0] for p in paths} | {p.case_id for p in plans})
+
+
+def init(path: Path, selected: Optional[List[str]], shards: int, tier: str, db: Path,
+         target_s: float = DEFAULT_TARGET_S, lanes: int = 1) -> Dict[str, float]:
+    cases = case_ids(selected)
+    with results.ResultsStore(db) as store:
+        history = store.durations(tier, HISTORY_RUNS)
+    estimates = estimate(cases, history)
+    with Queue(path) as queue:
+        buckets = queue.fill(estimates, shards, tier)
+    print(f"{len(cases)} cases queued in {path} ({sum(c in history for c in cases)} with history in tier {tier!r})")
+    for i, bucket in enumerate(buckets):
+        print(f"  shard {i}: {sum(estimates[c] for c in bucket):6.1f}s  {' '.join(bucket)}")
+    span = makespan(estimates, lpt(estimates, shards * lanes))
+    needed = shards_for(estimates, target_s, lanes)
+    print(f"estimated wall {span:.1f}s with {shards} shards x {lanes} contexts; "
+          + (f"{needed} shards fit {target_s:g}s" if needed else f"the longest case alone exceeds {target_s:g}s"))
+    return estimates
+
+
+async def work(path: Path, lanes: int, name: Optional[str] = None, shard: Optional[int] = None,
+               headless: bool = True, mode: str = DEFAULT_BROWSER_MODE) -> int:
+    """Drain the queue with ``lanes`` concurrent contexts; returns cases run."""
+    from .pool import BrowserPool
+    from .runner import run_case_id
+
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    queue = Queue(path)
+    queue.register(name, lanes)
+    done = 0
+
+    async def lane(pool) -> None:
+        nonlocal done
+        while True:
+            job = queue.claim(name, shard)
+            if job is None:
+                return
+            started = time.time()
+            result = await run_case_id(pool, job[0])
+            queue.finish(name, result, started)
+            done += 1
+            print(f"[{name}] {result.case_id:<7} {result.status:<7} {result.duration:7.2f}s (est {job[1]:.1f}s)", flush=True)
+
+    try:
+        async with BrowserPool(workers=lanes, headless=headless, mode=mode) as pool:
+            await asyncio.gather(*(lane(pool) for _ in range(lanes)))
+    finally:
+        queue.close()
+    return done
+
+
+def merge(path: Path, db: Optional[Path], wait: bool = False, poll_s: float = 2.0) -> int:
+    from .runner import print_report
+
+    with Queue(path) as queue:
+        while wait and queue.open_jobs():
+            time.sleep(poll_s)
+        outcome = queue.collect()
+        wall = queue.wall()
+        print_report(outcome, wall)
+        estimates = dict(queue.conn.execute("SELECT case_id, estimate_s FROM jobs").fetchall())
+        for worker, cases, busy_s, span_s in queue.busy():
+            print(f"  {worker:<32} {cases:3} cases  busy {busy_s:7.1f}s  span {span_s:7.1f}s")
+        lanes = queue.lanes()
+        if lanes:
+            print(f"  estimated wall {makespan(estimates, lpt(estimates, lanes)):.1f}s for {lanes} contexts, actual {wall:.1f}s")
+        tier = queue.meta("tier", results.DEFAULT_TIER)
+    if db is not None:
+        with results.ResultsStore(db) as store:
+            run_id = store.record_run(outcome, tier=tier, workers=lanes or None)
+        print(f"recorded as run {run_id} in {db}")
+    return 0 if outcome and all(r.status == "PASSED" for r in outcome) else 1
+
+
+def run_local(selected: Optional[List[str]], processes: int, lanes: int, tier: str, db: Optional[Path],
+              headless: bool = True, target_s: float = DEFAULT_TARGET_S, mode: str = DEFAULT_BROWSER_MODE) -> int:
+    path = SHARD_DIR / f"run-{os.getpid()}.sqlite"
+    init(path, selected, processes, tier, db or results.DEFAULT_DB, target_s, lanes)
+    command = [sys.executable, "-m", "harness.shard", "work", str(path), "-w", str(lanes), "--browser", mode]
+    if not headless:
+        command.append("--headed")
+    procs = [subprocess.Popen(command + ["--name", f"local-{i}"], cwd=TESTS_DIR) for i in range(processes)]
+    for proc in procs:
+        proc.wait()
+    try:
+        return merge(path, db)
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run the suite sharded over processes or hosts via a SQLite queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p, record: bool = True):
+        p.add_argument("--tier", default=results.DEFAULT_TIER, help=f"scale tier for history and the stored run (default: {results.DEFAULT_TIER})")
+        p.add_argument("--db", type=Path, default=results.DEFAULT_DB, help="results database (default: tmp/results.sqlite)")
+        if record:
+            p.add_argument("--no-record", action="store_true", help="do not append the merged run to the results database")
+
+    run = sub.add_parser("run", help="init, work with -n local processes, merge")
+    run.add_argument("cases", nargs="*", help="case ids (default: all TC files and plan cases)")
+    run.add_argument("-n", "--processes", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="worker processes (default: half the CPUs)")
+    run.add_argument("-w", "--workers", type=int, default=2, help="contexts per process (default: 2)")
+    run.add_argument("--target-s", type=float, default=DEFAULT_TARGET_S, help="wall-clock goal for the shard estimate (default: 60)")
+    run.add_argument("--headed", action="store_true", help="show the browser windows")
+    run.add_argument("--browser", choices=sorted(BROWSER_MODES), default=DEFAULT_BROWSER_MODE, help="Chromium process model")
+    common(run)
+
+    ini = sub.add_parser("init", help="create a queue with one job per case")
+    ini.add_argument("queue", type=Path)
+    ini.add_argument("cases", nargs="*")
+    ini.add_argument("--shards", type=int, default=4, help="static shards for 'work --shard' (default: 4)")
+    ini.add_argument("-w", "--workers", type=int, default=1, help="contexts per shard, for the estimate (default: 1)")
+    ini.add_argument("--target-s", type=float, default=DEFAULT_TARGET_S)
+    common(ini, record=False)
+
+    wrk = sub.add_parser("work", help="claim and run jobs until the queue is drained")
+    wrk.add_argument("queue", type=Path)
+    wrk.add_argument("-w", "--workers", type=int, default=2, help="concurrent contexts (default: 2)")
+    wrk.add_argument("--shard", type=int, help="only this static shard's jobs")
+    wrk.add_argument("--name", help="worker name in the report (default: host:pid)")
+    wrk.add_argument("--headed", action="store_true", help="show the browser window")
+    wrk.add_argument("--browser", choices=sorted(BROWSER_MODES), default=DEFAULT_BROWSER_MODE, help="Chromium process model")
+
+    mrg = sub.add_parser("merge", help="report and record the queue's results")
+    mrg.add_argument("queue", type=Path)
+    mrg.add_argument("--wait", action="store_true", help="wait until no job can still finish")
+    common(mrg)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "init":
+        init(args.queue, args.cases, args.shards, args.tier, args.db, args.target_s, args.workers)
+        return 0
+    if args.command == "work":
+        asyncio.run(work(args.queue, args.workers, args.name, args.shard, headless=not args.headed, mode=args.browser))
+        return 0
+    db = None if args.no_record else args.db
+    if args.command == "merge":
+        return merge(args.queue, db, args.wait)
+    return run_local(args.cases, args.processes, args.workers, args.tier, db, not args.headed, args.target_s, args.browser)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
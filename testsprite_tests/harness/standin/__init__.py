@@ -0,0 +1,21 @@
+"""Local Supabase stand-in for offline, deterministic performance runs.
+
+Serves the subset of Supabase the app uses:
+
+* PostgREST-style ``/rest/v1/<table>`` select/insert/update/upsert/delete,
+  including ``alias:table(cols)`` embeds, and ``/rest/v1/rpc/<fn>``;
+* the Phoenix ``/realtime/v1/websocket`` protocol for ``postgres_changes``
+  subscriptions (events are emitted for writes made through the stand-in);
+* injectable latency/bandwidth profiles (:mod:`.profiles`).
+
+The server needs ``aiohttp``. Rows live in SQLite (default) or in a local
+Postgres (``--dsn``, needs ``psycopg``). With ``--rls`` too, requests carrying an
+``anon``/``authenticated`` JWT run under that role, so the migrations' policies
+apply (:mod:`harness.rls`). Point the app at it by starting Vite with
+``VITE_SUPABASE_URL=http://localhost:54321``.
+"""
+
+from .profiles import PROFILES, NetworkProfile
+from .store import PostgresStore, SQLiteStore, Store
+
+__all__ = ["NetworkProfile", "PROFILES", "PostgresStore", "SQLiteStore", "Store"]
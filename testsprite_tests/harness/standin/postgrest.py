@@ -0,0 +1,170 @@
+"""Parsing of the PostgREST query syntax used by supabase-js."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+OPERATORS = {"eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "is", "in"}
+
+
+class PostgrestError(Exception):
+    """Error rendered as a PostgREST-style JSON body."""
+
+    def __init__(self, message: str, code: str = "PGRST100", status: int = 400, details: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        self.status = status
+        self.details = details
+
+    def body(self) -> dict:
+        return {"message": self.message, "code": self.code, "details": self.details, "hint": None}
+
+
+@dataclass
+class Embed:
+    alias: str
+    table: str
+    select: "Select"
+    inner: bool = False
+
+
+@dataclass
+class Select:
+    star: bool = True
+    columns: List[Tuple[str, str]] = field(default_factory=list)  # (output name, column)
+    embeds: List[Embed] = field(default_factory=list)
+
+    def project(self, row: Mapping[str, Any]) -> Dict[str, Any]:
+        out = dict(row) if self.star else {}
+        for alias, col in self.columns:
+            out[alias] = row.get(col)
+        return out
+
+
+@dataclass
+class Filter:
+    column: str
+    op: str
+    value: Any
+    negate: bool = False
+    # The operand as sent (a list for ``in``) before numbers and booleans
+    # were coerced; stores compare string columns against it.
+    raw: Any = None
+
+
+@dataclass
+class Order:
+    column: str
+    desc: bool = False
+    nulls_first: Optional[bool] = None
+
+
+def _split(s: str) -> List[str]:
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(s):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(s[start:i])
+            start = i + 1
+    parts.append(s[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def parse_select(text: Optional[str]) -> Select:
+    if not text:
+        return Select()
+    select = Select(star=False)
+    for part in _split(text):
+        m = re.match(r"^(?:(\w+):)?([\w]+)(!inner)?(?:!\w+)?\((.*)\)$", part, re.S)
+        if m:
+            alias, table, inner, inner_select = m.groups()
+            select.embeds.append(Embed(alias or table, table, parse_select(inner_select), bool(inner)))
+        elif part == "*":
+            select.star = True
+        else:
+            alias, _, col = part.rpartition(":")
+            col = col.split("::")[0]
+            select.columns.append((alias or col, col))
+    return select
+
+
+def _coerce(value: str) -> Any:
+    if value == "null":
+        return None
+    if value in ("true", "false"):
+        return value == "true"
+    if re.fullmatch(r"-?\d+", value):
+        return int(value)
+    if re.fullmatch(r"-?\d+\.\d+", value):
+        return float(value)
+    return value
+
+
+def parse_filter(column: str, expr: str) -> Filter:
+    negate = expr.startswith("not.")
+    if negate:
+        expr = expr[4:]
+    op, _, raw = expr.partition(".")
+    if op not in OPERATORS:
+        raise PostgrestError(f"unsupported operator {op!r} on {column}")
+    if op == "in":
+        items = raw.strip("()")
+        text = [v.strip().strip('"') for v in items.split(",")] if items else []
+        return Filter(column, op, [_coerce(v) for v in text], negate, text)
+    if op in ("like", "ilike"):
+        value = raw.replace("*", "%")
+    else:
+        value = _coerce(raw)
+    return Filter(column, op, value, negate, raw)
+
+
+def parse_filters(params: Mapping[str, str]) -> List[Filter]:
+    return [parse_filter(k, v) for k, v in params.items() if k not in RESERVED_PARAMS]
+
+
+def parse_order(text: Optional[str]) -> List[Order]:
+    orders = []
+    for part in _split(text or ""):
+        bits = part.split(".")
+        o = Order(bits[0])
+        for b in bits[1:]:
+            if b == "desc":
+                o.desc = True
+            elif b == "nullsfirst":
+                o.nulls_first = True
+            elif b == "nullslast":
+                o.nulls_first = False
+        orders.append(o)
+    return orders
+
+
+def matches(row: Mapping[str, Any], filters: List[Filter]) -> bool:
+    """Evaluate ``filters`` against an in-memory row (used for realtime filters)."""
+    for f in filters:
+        v = row.get(f.column)
+        if f.op == "eq":
+            ok = v == f.value or str(v) == str(f.value)
+        elif f.op == "neq":
+            ok = v != f.value and str(v) != str(f.value)
+        elif f.op == "is":
+            ok = v is f.value or v == f.value
+        elif f.op == "in":
+            ok = v in f.value or str(v) in {str(x) for x in f.value}
+        elif f.op in ("like", "ilike"):
+            pattern = "^" + re.escape(str(f.value)).replace("%", ".*") + "$"
+            ok = v is not None and re.match(pattern, str(v), re.I if f.op == "ilike" else 0) is not None
+        else:
+            try:
+                ok = {"gt": v > f.value, "gte": v >= f.value, "lt": v < f.value, "lte": v <= f.value}[f.op]
+            except TypeError:
+                ok = False
+        if ok == f.negate:
+            return False
+    return True
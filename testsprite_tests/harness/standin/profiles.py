@@ -0,0 +1,55 @@
+"""Latency and bandwidth profiles applied to stand-in responses."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True)
+class NetworkProfile:
+    name: str
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # Downstream bandwidth in kbit/s; 0 means unlimited.
+    bandwidth_kbps: float = 0.0
+
+    def latency(self, rng: Optional[random.Random] = None) -> float:
+        """One round of latency (plus uniform jitter), in seconds."""
+        if self.latency_ms <= 0 and self.jitter_ms <= 0:
+            return 0.0
+        rng = rng or random
+        return max(0.0, self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    async def delay(self, rng: Optional[random.Random] = None) -> None:
+        """Sleep for one round of latency (plus uniform jitter)."""
+        seconds = self.latency(rng)
+        if seconds:
+            await asyncio.sleep(seconds)
+
+    async def transfer(self, nbytes: int) -> None:
+        """Sleep for the time ``nbytes`` take at this profile's bandwidth."""
+        if self.bandwidth_kbps > 0 and nbytes:
+            await asyncio.sleep(nbytes * 8 / (self.bandwidth_kbps * 1000))
+
+
+PROFILES: Dict[str, NetworkProfile] = {
+    p.name: p
+    for p in (
+        NetworkProfile("none"),
+        NetworkProfile("lan", latency_ms=1, jitter_ms=0.5),
+        NetworkProfile("wan", latency_ms=80, jitter_ms=20, bandwidth_kbps=20_000),
+        NetworkProfile("4g", latency_ms=60, jitter_ms=15, bandwidth_kbps=9_000),
+        NetworkProfile("slow-4g", latency_ms=150, jitter_ms=40, bandwidth_kbps=1_600),
+        NetworkProfile("3g", latency_ms=300, jitter_ms=80, bandwidth_kbps=750),
+    )
+}
+
+
+def get_profile(name: str) -> NetworkProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"unknown network profile {name!r}; choose from {', '.join(PROFILES)}") from None
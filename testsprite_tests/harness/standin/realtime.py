@@ -0,0 +1,183 @@
+"""Minimal Phoenix-channel server for supabase-js ``postgres_changes``.
+
+Supports both serializers realtime-js may negotiate: ``vsn=1.0.0`` (JSON
+objects) and ``vsn=2.0.0`` (JSON arrays ``[join_ref, ref, topic, event,
+payload]``). Only ``phx_join``/``phx_leave``/``heartbeat``/``access_token``
+are handled; broadcast and presence are accepted and ignored.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .postgrest import Filter, matches, parse_filter
+from .profiles import NetworkProfile
+from .store import Change, json_default
+
+_binding_ids = itertools.count(1)
+
+
+@dataclass
+class Binding:
+    id: int
+    event: str
+    schema: str
+    table: Optional[str]
+    filter: Optional[str]
+    parsed: List[Filter] = field(default_factory=list)
+
+    def wants(self, change: Change) -> bool:
+        if self.table not in (None, "*", change.table):
+            return False
+        if self.event not in ("*", change.type):
+            return False
+        return matches(change.new or change.old or {}, self.parsed)
+
+
+@dataclass
+class Subscription:
+    topic: str
+    join_ref: Optional[str]
+    bindings: List[Binding]
+
+
+class Connection:
+    """One websocket client; outbound frames go through a per-connection queue.
+
+    Each frame is due one latency after it was queued, so a burst arrives
+    one latency late rather than one latency per frame; only the bandwidth
+    share of the link is paid frame after frame.
+    """
+
+    def __init__(self, ws, vsn: str, profile_getter):
+        self.ws = ws
+        self.array_format = vsn.startswith("2")
+        self.subscriptions: Dict[str, Subscription] = {}
+        self._profile_getter = profile_getter
+        self._queue: "asyncio.Queue[Tuple[float, str]]" = asyncio.Queue()
+        self._sender = asyncio.ensure_future(self._drain())
+
+    async def _drain(self) -> None:
+        while True:
+            queued_at, frame = await self._queue.get()
+            profile: NetworkProfile = self._profile_getter()
+            wait = queued_at + profile.latency() - asyncio.get_running_loop().time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await profile.transfer(len(frame))
+            try:
+                await self.ws.send_str(frame)
+            except (ConnectionResetError, RuntimeError):
+                return
+
+    def close(self) -> None:
+        self._sender.cancel()
+
+    def decode(self, raw: str) -> Dict[str, Any]:
+        msg = json.loads(raw)
+        if isinstance(msg, list):
+            join_ref, ref, topic, event, payload = msg
+            return {"join_ref": join_ref, "ref": ref, "topic": topic, "event": event, "payload": payload}
+        return msg
+
+    def send(self, topic: str, event: str, payload: Any, ref: Optional[str] = None, join_ref: Optional[str] = None) -> None:
+        if self.array_format:
+            frame = [join_ref, ref, topic, event, payload]
+        else:
+            frame = {"topic": topic, "event": event, "payload": payload, "ref": ref, "join_ref": join_ref}
+        self._queue.put_nowait((asyncio.get_running_loop().time(), json.dumps(frame, default=json_default)))
+
+    def reply(self, msg: Dict[str, Any], response: Any = None, status: str = "ok") -> None:
+        self.send(msg["topic"], "phx_reply", {"status": status, "response": response or {}}, msg.get("ref"), msg.get("join_ref"))
+
+
+class RealtimeHub:
+    """Tracks subscriptions across connections and fans out changes."""
+
+    def __init__(self, profile_getter):
+        self.connections: List[Connection] = []
+        self._profile_getter = profile_getter
+        self.events_sent = 0
+
+    def connect(self, ws, vsn: str = "1.0.0") -> Connection:
+        conn = Connection(ws, vsn, self._profile_getter)
+        self.connections.append(conn)
+        return conn
+
+    def disconnect(self, conn: Connection) -> None:
+        conn.close()
+        if conn in self.connections:
+            self.connections.remove(conn)
+
+    def handle(self, conn: Connection, raw: str) -> None:
+        msg = conn.decode(raw)
+        topic, event = msg.get("topic"), msg.get("event")
+        if topic == "phoenix" and event == "heartbeat":
+            conn.reply(msg)
+        elif event == "phx_join":
+            self._join(conn, msg)
+        elif event == "phx_leave":
+            conn.subscriptions.pop(topic, None)
+            conn.reply(msg)
+        elif event == "access_token":
+            return
+        elif msg.get("ref") is not None:
+            conn.reply(msg)
+
+    def _join(self, conn: Connection, msg: Dict[str, Any]) -> None:
+        config = (msg.get("payload") or {}).get("config") or {}
+        bindings = []
+        for spec in config.get("postgres_changes") or []:
+            flt = spec.get("filter")
+            parsed = []
+            if flt:
+                column, _, expr = flt.partition("=")
+                parsed = [parse_filter(column, expr)]
+            bindings.append(Binding(next(_binding_ids), spec.get("event", "*"), spec.get("schema", "public"), spec.get("table"), flt, parsed))
+        conn.subscriptions[msg["topic"]] = Subscription(msg["topic"], msg.get("join_ref"), bindings)
+        response = {
+            "postgres_changes": [
+                {"id": b.id, "event": b.event, "schema": b.schema, "table": b.table, **({"filter": b.filter} if b.filter else {})}
+                for b in bindings
+            ]
+        }
+        conn.reply(msg, response)
+        if bindings:
+            conn.send(msg["topic"], "system", {
+                "channel": msg["topic"].split(":", 1)[-1],
+                "extension": "postgres_changes",
+                "message": "Subscribed to PostgreSQL",
+                "status": "ok",
+            }, join_ref=msg.get("join_ref"))
+
+    def publish(self, changes: List[Change]) -> None:
+        for change in changes:
+            record = change.new or {}
+            old = change.old or {}
+            columns = [
+                {"name": k, "type": "jsonb" if isinstance(v, (dict, list)) else "text"}
+                for k, v in (record or old).items()
+            ]
+            data = {
+                "schema": "public",
+                "table": change.table,
+                "commit_timestamp": change.commit_timestamp,
+                "type": change.type,
+                "eventType": change.type,
+                "columns": columns,
+                "record": record,
+                "old_record": old,
+                "new": record,
+                "old": old,
+                "errors": None,
+            }
+            for conn in list(self.connections):
+                for sub in conn.subscriptions.values():
+                    ids = [b.id for b in sub.bindings if b.wants(change)]
+                    if ids:
+                        conn.send(sub.topic, "postgres_changes", {"ids": ids, "data": data}, join_ref=sub.join_ref)
+                        self.events_sent += 1
@@ -0,0 +1,489 @@
+"""Row storage behind the stand-in: SQLite (default) or local Postgres."""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import json
+import re
+import sqlite3
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..schema import Column, Schema, load_schema
+from .postgrest import Embed, Filter, Order, PostgrestError, Select
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# JWT claims of the request being served (set by the server); PostgresStore
+# runs as their role when row-level security is on.
+CLAIMS: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("standin_claims", default=None)
+RLS_ROLES = ("anon", "authenticated")
+
+# PostgresStore connections; the server runs store calls in worker threads.
+DEFAULT_POOL_SIZE = 8
+
+
+def ident(name: str) -> str:
+    if not _IDENT.match(name):
+        raise PostgrestError(f"invalid identifier {name!r}")
+    return f'"{name}"'
+
+
+def json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (uuid.UUID, bytes)):
+        return str(value)
+    raise TypeError(f"not JSON serializable: {type(value).__name__}")
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def python_default(col: Column) -> Any:
+    """Evaluate the handful of column defaults the migrations use."""
+    expr = (col.default or "").strip()
+    low = expr.lower()
+    if not expr or low == "null" or "auth.uid()" in low:
+        return None
+    if "uuid" in low and "(" in low:
+        return str(uuid.uuid4())
+    if "now()" in low:
+        return now_iso()
+    if low in ("true", "false"):
+        return low == "true"
+    literal = re.match(r"^'(.*)'(?:::[\w\[\]]+)?$", expr, re.S)
+    if literal:
+        text = literal.group(1)
+        if "::json" in low:
+            return json.loads(text)
+        if text == "{}" and col.is_array:
+            return []
+        return text
+    try:
+        return int(expr)
+    except ValueError:
+        try:
+            return float(expr)
+        except ValueError:
+            return None
+
+
+@dataclass
+class Change:
+    """One row-level change, shaped like a ``postgres_changes`` event."""
+
+    type: str  # INSERT | UPDATE | DELETE
+    table: str
+    new: Optional[dict]
+    old: Optional[dict]
+    commit_timestamp: str = ""
+
+    def __post_init__(self):
+        self.commit_timestamp = self.commit_timestamp or now_iso()
+
+
+def _singular(name: str) -> str:
+    return name[:-1] if name.endswith("s") else name
+
+
+class Store:
+    """Backend-agnostic PostgREST semantics on top of a few primitives."""
+
+    def __init__(self, schema: Optional[Schema] = None):
+        self.schema = schema or load_schema()
+        self.rpcs: Dict[str, Callable[["Store", dict], Tuple[Any, List[Change]]]] = dict(RPCS)
+
+    # -- primitives implemented by backends ------------------------------
+    def _select(self, table: str, filters: List[Filter], order: List[Order], limit: Optional[int], offset: int) -> List[dict]:
+        raise NotImplementedError
+
+    def _count(self, table: str, filters: List[Filter]) -> int:
+        raise NotImplementedError
+
+    def _insert(self, table: str, rows: List[dict]) -> List[dict]:
+        raise NotImplementedError
+
+    def _update(self, table: str, values: dict, filters: List[Filter]) -> List[Tuple[dict, dict]]:
+        raise NotImplementedError
+
+    def _delete(self, table: str, filters: List[Filter]) -> List[dict]:
+        raise NotImplementedError
+
+    def tables(self) -> List[str]:
+        raise NotImplementedError
+
+    # -- PostgREST operations --------------------------------------------
+    def with_defaults(self, table: str, row: dict) -> dict:
+        out = dict(row)
+        columns = self.schema.tables[table].columns if table in self.schema.tables else {}
+        for col in columns.values():
+            if col.name not in out and col.has_default and not col.generated:
+                out[col.name] = python_default(col)
+        out.setdefault("id", str(uuid.uuid4()))
+        return out
+
+    def select(self, table: str, select: Select, filters: List[Filter], order: List[Order],
+               limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+        rows = self._select(table, filters, order, limit, offset)
+        for embed in select.embeds:
+            self._embed(table, rows, embed)
+        if any(e.inner for e in select.embeds):
+            rows = [r for r in rows if all(r.get(e.alias) not in (None, []) for e in select.embeds if e.inner)]
+        names = [e.alias for e in select.embeds]
+        return [{**select.project(r), **{n: r.get(n) for n in names}} for r in rows]
+
+    def count(self, table: str, filters: List[Filter]) -> int:
+        return self._count(table, filters)
+
+    def insert(self, table: str, rows: List[dict]) -> List[Change]:
+        created = self._insert(table, [self.with_defaults(table, r) for r in rows])
+        return [Change("INSERT", table, new=r, old=None) for r in created]
+
+    def upsert(self, table: str, rows: List[dict], on_conflict: Sequence[str] = ("id",), ignore_duplicates: bool = False) -> List[Change]:
+        changes: List[Change] = []
+        for row in rows:
+            key = [Filter(c, "eq", row.get(c)) for c in on_conflict]
+            existing = self._select(table, key, [], 1, 0) if all(row.get(c) is not None for c in on_conflict) else []
+            if existing:
+                if not ignore_duplicates:
+                    changes.extend(Change("UPDATE", table, new=new, old=old) for old, new in self._update(table, row, key))
+            else:
+                changes.extend(self.insert(table, [row]))
+        return changes
+
+    def update(self, table: str, values: dict, filters: List[Filter]) -> List[Change]:
+        if "updated_at" in self._columns(table) and "updated_at" not in values:
+            values = {**values, "updated_at": now_iso()}
+        return [Change("UPDATE", table, new=new, old=old) for old, new in self._update(table, values, filters)]
+
+    def delete(self, table: str, filters: List[Filter]) -> List[Change]:
+        return [Change("DELETE", table, new=None, old=r) for r in self._delete(table, filters)]
+
+    def rpc(self, name: str, args: dict) -> Tuple[Any, List[Change]]:
+        fn = self.rpcs.get(name)
+        if fn is None:
+            raise PostgrestError(f"Could not find the function public.{name}", code="PGRST202", status=404)
+        return fn(self, args)
+
+    # -- embeds -----------------------------------------------------------
+    def _columns(self, table: str) -> Dict[str, Column]:
+        return self.schema.tables[table].columns if table in self.schema.tables else {}
+
+    def _embed(self, table: str, rows: List[dict], embed: Embed) -> None:
+        if not rows:
+            return
+        sample = rows[0]
+        fk = None
+        refs = [c.name for c in self._columns(table).values() if c.references == embed.table]
+        for candidate in sorted(refs, key=lambda c: not c.startswith(embed.alias)) + [f"{embed.alias}_id", f"{_singular(embed.table)}_id"]:
+            if candidate in sample:
+                fk = candidate
+                break
+        if fk:
+            ids = sorted({r[fk] for r in rows if r.get(fk) is not None}, key=str)
+            related = {str(r["id"]): r for r in self._select(embed.table, [Filter("id", "in", ids)], [], None, 0)} if ids else {}
+            for r in rows:
+                target = related.get(str(r.get(fk)))
+                r[embed.alias] = embed.select.project(target) if target else None
+            return
+        back = f"{_singular(table)}_id"
+        ids = [r["id"] for r in rows]
+        children: Dict[str, List[dict]] = {}
+        for child in self._select(embed.table, [Filter(back, "in", ids)], [], None, 0):
+            children.setdefault(str(child.get(back)), []).append(embed.select.project(child))
+        for r in rows:
+            r[embed.alias] = children.get(str(r["id"]), [])
+
+
+class SQLiteStore(Store):
+    """Schemaless SQLite store: one ``(id, data JSON)`` table per app table."""
+
+    def __init__(self, path: str = ":memory:", schema: Optional[Schema] = None):
+        super().__init__(schema)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.lock = threading.Lock()
+        self._known: set = set()
+
+    def _ensure(self, table: str) -> str:
+        name = ident(table)
+        if table not in self._known:
+            with self.lock:
+                self.conn.execute(f"CREATE TABLE IF NOT EXISTS {name} (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            self._known.add(table)
+        return name
+
+    def tables(self) -> List[str]:
+        with self.lock:
+            return [r[0] for r in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+
+    @staticmethod
+    def _expr(column: str) -> str:
+        ident(column)
+        return f"json_extract(data, '$.{column}')"
+
+    @staticmethod
+    def _type(column: str) -> str:
+        ident(column)
+        return f"json_type(data, '$.{column}')"
+
+    @staticmethod
+    def _param(value: Any) -> Any:
+        return int(value) if isinstance(value, bool) else value
+
+    def _where(self, filters: List[Filter]) -> Tuple[str, list]:
+        clauses, params = [], []
+        for f in filters:
+            e = self._expr(f.column)
+            if f.op == "is":
+                sql = f"{e} IS NULL" if f.value is None else f"{e} = ?"
+                if f.value is not None:
+                    params.append(self._param(f.value))
+            elif f.op == "in":
+                if not f.value:
+                    sql = "0"
+                else:
+                    sql = f"{e} IN ({', '.join('?' * len(f.value))})"
+                    if f.raw is not None:
+                        sql = f"(CASE WHEN {self._type(f.column)} = 'text' THEN {sql} ELSE {sql} END)"
+                        params.extend(f.raw)
+                    params.extend(self._param(v) for v in f.value)
+            elif f.op == "ilike":
+                sql = f"LOWER({e}) LIKE LOWER(?)"
+                params.append(f.value)
+            else:
+                op = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "like": "LIKE"}[f.op]
+                sql = f"{e} {op} ?"
+                if f.op in ("eq", "neq") and f.raw is not None:
+                    # "123" was coerced to 123, which never equals a JSON string.
+                    sql = f"(CASE WHEN {self._type(f.column)} = 'text' THEN {sql} ELSE {sql} END)"
+                    params.append(f.raw)
+                params.append(self._param(f.value))
+            clauses.append(f"NOT ({sql})" if f.negate else sql)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _select(self, table, filters, order, limit, offset):
+        name = self._ensure(table)
+        where, params = self._where(filters)
+        sql = f"SELECT data FROM {name}{where}"
+        if order:
+            sql += " ORDER BY " + ", ".join(
+                f"{self._expr(o.column)} {'DESC' if o.desc else 'ASC'}"
+                + ("" if o.nulls_first is None else (" NULLS FIRST" if o.nulls_first else " NULLS LAST"))
+                for o in order
+            )
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params += [-1 if limit is None else limit, offset]
+        with self.lock:
+            return [json.loads(r[0]) for r in self.conn.execute(sql, params)]
+
+    def _count(self, table, filters):
+        name = self._ensure(table)
+        where, params = self._where(filters)
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {name}{where}", params).fetchone()[0]
+
+    def _insert(self, table, rows):
+        name = self._ensure(table)
+        payload = [(str(r["id"]), json.dumps(r, default=json_default)) for r in rows]
+        with self.lock:
+            try:
+                self.conn.execute("BEGIN")
+                self.conn.executemany(f"INSERT INTO {name} (id, data) VALUES (?, ?)", payload)
+                self.conn.execute("COMMIT")
+            except sqlite3.IntegrityError as exc:
+                self.conn.execute("ROLLBACK")
+                raise PostgrestError(str(exc), code="23505", status=409) from None
+        return [json.loads(p[1]) for p in payload]
+
+    def _update(self, table, values, filters):
+        name = self._ensure(table)
+        pairs = []
+        with self.lock:
+            self.conn.execute("BEGIN")
+            where, params = self._where(filters)
+            for rid, data in self.conn.execute(f"SELECT id, data FROM {name}{where}", params).fetchall():
+                old = json.loads(data)
+                new = json.loads(json.dumps({**old, **values}, default=json_default))
+                self.conn.execute(f"UPDATE {name} SET data = ? WHERE id = ?", (json.dumps(new), rid))
+                pairs.append((old, new))
+            self.conn.execute("COMMIT")
+        return pairs
+
+    def _delete(self, table, filters):
+        name = self._ensure(table)
+        where, params = self._where(filters)
+        with self.lock:
+            self.conn.execute("BEGIN")
+            rows = [json.loads(r[0]) for r in self.conn.execute(f"SELECT data FROM {name}{where}", params)]
+            self.conn.execute(f"DELETE FROM {name}{where}", params)
+            self.conn.execute("COMMIT")
+        return rows
+
+
+class PostgresStore(Store):
+    """Store backed by real tables in a local Postgres (e.g. one seeded by :mod:`harness.seed`).
+
+    With ``rls``, statements for an ``anon``/``authenticated`` JWT run under
+    that role and its ``request.jwt.claims``, as PostgREST does, so the
+    migrations' policies apply. Other requests keep the connecting user.
+
+    Statements run on a pool of ``pool_size`` connections, so concurrent
+    requests served from worker threads do not queue behind one another.
+    """
+
+    def __init__(self, dsn: str, schema: Optional[Schema] = None, rls: bool = False, pool_size: int = DEFAULT_POOL_SIZE):
+        super().__init__(schema)
+        try:
+            from psycopg.rows import dict_row
+            from psycopg.types.json import Jsonb
+            from psycopg_pool import ConnectionPool
+        except ImportError:  # pragma: no cover - optional dependency
+            raise SystemExit('PostgresStore needs psycopg 3 and its pool: pip install "psycopg[binary,pool]"')
+        self._jsonb = Jsonb
+        self.pool = ConnectionPool(dsn, min_size=1, max_size=pool_size, open=True,
+                                   kwargs={"autocommit": True, "row_factory": dict_row})
+        self.rls = rls
+
+    def tables(self) -> List[str]:
+        return [r["table_name"] for r in self._run(
+            "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'")]
+
+    def _adapt(self, table: str, column: str, value: Any) -> Any:
+        # psycopg sends lists as Postgres arrays: right for uuid[]/text[]
+        # columns, wrong for the JSON arrays the app stores in jsonb ones.
+        spec = self.schema.tables.get(table)
+        col = spec.columns.get(column) if spec else None
+        if value is not None and (col.base_type in ("json", "jsonb") if col else isinstance(value, dict)):
+            return self._jsonb(value)
+        return value
+
+    def _where(self, filters: List[Filter]) -> Tuple[str, list]:
+        clauses, params = [], []
+        for f in filters:
+            col = ident(f.column)
+            if f.op == "is":
+                sql = f"{col} IS {'NULL' if f.value is None else ('TRUE' if f.value else 'FALSE')}"
+            elif f.op == "in":
+                sql = f"{col}::text = ANY(%s)"
+                params.append([str(v) for v in f.value])
+            else:
+                op = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "like": "LIKE", "ilike": "ILIKE"}[f.op]
+                cast = "::text" if f.op in ("eq", "neq", "like", "ilike") else ""
+                sql = f"{col}{cast} {op} %s"
+                params.append(str(f.value) if cast else f.value)
+            clauses.append(f"NOT ({sql})" if f.negate else sql)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """One pooled connection inside a transaction, under the request's role with ``rls``."""
+        import psycopg
+
+        claims = CLAIMS.get() if self.rls else None
+        with self.pool.connection() as conn:
+            try:
+                with conn.transaction():
+                    if claims is not None and claims.get("role") in RLS_ROLES:
+                        conn.execute(
+                            "SELECT set_config('role', %s, true), set_config('request.jwt.claims', %s, true), "
+                            "set_config('request.jwt.claim.sub', %s, true)",
+                            (claims["role"], json.dumps(claims), str(claims.get("sub") or "")),
+                        )
+                    yield conn
+            except psycopg.Error as exc:
+                diag = getattr(exc, "diag", None)
+                raise PostgrestError(str(exc).strip(), code=getattr(diag, "sqlstate", None) or "XX000") from None
+
+    @staticmethod
+    def _fetch(conn, sql: str, params: Iterable[Any] = ()) -> List[dict]:
+        cur = conn.execute(sql, list(params))
+        return cur.fetchall() if cur.description else []
+
+    def _run(self, sql: str, params: Iterable[Any] = ()) -> List[dict]:
+        with self._transaction() as conn:
+            return self._fetch(conn, sql, params)
+
+    def _select(self, table, filters, order, limit, offset):
+        where, params = self._where(filters)
+        sql = f"SELECT * FROM public.{ident(table)}{where}"
+        if order:
+            sql += " ORDER BY " + ", ".join(
+                f"{ident(o.column)} {'DESC' if o.desc else 'ASC'}"
+                + ("" if o.nulls_first is None else (" NULLS FIRST" if o.nulls_first else " NULLS LAST"))
+                for o in order
+            )
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(limit)
+        if offset:
+            sql += " OFFSET %s"
+            params.append(offset)
+        return self._run(sql, params)
+
+    def _count(self, table, filters):
+        where, params = self._where(filters)
+        return self._run(f"SELECT COUNT(*) AS n FROM public.{ident(table)}{where}", params)[0]["n"]
+
+    def with_defaults(self, table, row):
+        # Postgres evaluates its own defaults.
+        return dict(row)
+
+    def _insert(self, table, rows):
+        out = []
+        for row in rows:
+            cols = list(row)
+            sql = (
+                f"INSERT INTO public.{ident(table)} ({', '.join(ident(c) for c in cols)}) "
+                f"VALUES ({', '.join(['%s'] * len(cols))}) RETURNING *"
+                if cols else f"INSERT INTO public.{ident(table)} DEFAULT VALUES RETURNING *"
+            )
+            out.extend(self._run(sql, [self._adapt(table, c, row[c]) for c in cols]))
+        return out
+
+    def _update(self, table, values, filters):
+        where, params = self._where(filters)
+        sets = ", ".join(f"{ident(c)} = %s" for c in values)
+        # Lock the rows while reading them so ``old`` is what the UPDATE replaced.
+        with self._transaction() as conn:
+            old = {str(r["id"]): r for r in self._fetch(conn, f"SELECT * FROM public.{ident(table)}{where} FOR UPDATE", params)}
+            new = self._fetch(
+                conn,
+                f"UPDATE public.{ident(table)} SET {sets}{where} RETURNING *",
+                [self._adapt(table, c, v) for c, v in values.items()] + params,
+            )
+        return [(old.get(str(r["id"]), {}), r) for r in new]
+
+    def _delete(self, table, filters):
+        where, params = self._where(filters)
+        return self._run(f"DELETE FROM public.{ident(table)}{where} RETURNING *", params)
+
+
+def _get_or_create_client_v1(store: Store, args: dict) -> Tuple[Any, List[Change]]:
+    """Mirror of the hosted RPC used by ``useLeadCapture``: find a client by phone or create it."""
+    phone = args.get("p_phone")
+    existing = store.select("clients", Select(), [Filter("phone", "eq", phone)], [], 1) if phone else []
+    if existing:
+        return existing[0]["id"], []
+    changes = store.insert("clients", [{
+        "name": args.get("p_name") or "Cliente Site",
+        "phone": phone,
+        "type": args.get("p_type") or "pf",
+        "status": args.get("p_status") or "active",
+    }])
+    return changes[0].new["id"], changes
+
+
+RPCS: Dict[str, Callable[[Store, dict], Tuple[Any, List[Change]]]] = {
+    "get_or_create_client_v1": _get_or_create_client_v1,
+}
@@ -0,0 +1,44 @@
+"""Small percentile helpers shared by the benchmark modules."""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, List
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Linear-interpolated percentile (``pct`` in 0-100) of ``values``."""
+    data: List[float] = sorted(values)
+    if not data:
+        return math.nan
+    if len(data) == 1:
+        return data[0]
+    rank = (len(data) - 1) * pct / 100
+    lo = math.floor(rank)
+    hi = math.ceil(rank)
+    return data[lo] + (data[hi] - data[lo]) * (rank - lo)
+
+
+def summarize(values: Iterable[float]) -> Dict[str, float]:
+    """Count, mean, min/max and p50/p95/p99 of ``values``."""
+    data = list(values)
+    if not data:
+        return {"n": 0}
+    return {
+        "n": len(data),
+        "mean": sum(data) / len(data),
+        "min": min(data),
+        "p50": percentile(data, 50),
+        "p95": percentile(data, 95),
+        "p99": percentile(data, 99),
+        "max": max(data),
+    }
+
+
+def format_summary(name: str, summary: Dict[str, float], unit: str = "ms") -> str:
+    if not summary.get("n"):
+        return f"{name:<28} (no samples)"
+    return (
+        f"{name:<28} n={summary['n']:<4} p50={summary['p50']:8.1f}{unit} "
+        f"p95={summary['p95']:8.1f}{unit} p99={summary['p99']:8.1f}{unit} max={summary['max']:8.1f}{unit}"
+    )
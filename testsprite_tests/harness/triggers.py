@@ -0,0 +1,334 @@
+"""Write-path benchmark for the ``orders`` triggers.
+
+Every order change fires ``trg_order_audit`` (``fn_capture_order_changes``,
+:file:`migrations/20260122_fix_rls_timeline_emergency.sql`), which writes
+the old and new row as JSONB to ``order_timeline``. Every insert without a
+protocol also goes through ``trg_set_protocol``, and ``fn_get_protocol``
+increments the single ``daily_protocol_counters`` row for today. Updates do
+not touch the counter; only new orders (leads, the Orders form) share that
+row.
+
+This module drives both paths directly against a local Postgres with
+``--writers`` concurrent connections. Each connection sets
+``request.jwt.claim.sub`` to a technician id, the way PostgREST does:
+
+* ``update`` alternates status changes (TC011) and technician
+  reassignments (TC009) on ``TRIGBENCH-`` orders it created, with
+  ``trg_order_audit`` on and off. Each writer has its own rows, so any
+  slowdown comes from the trigger, not row locks,
+* ``insert`` creates orders with the counter (``protocol`` left NULL) and
+  with an explicit protocol. The difference is the cost of queueing on the
+  counter row.
+
+Per-operation latency and throughput are reported for every writer count.
+A monitor connection samples ``pg_stat_activity`` every 50ms for the
+writers' lock waits (``transactionid``/``tuple`` waits are row locks). The
+``TRIGBENCH-`` orders and their timeline rows are deleted afterwards. The
+protocol counter stays advanced. Disabling the trigger needs the table
+owner::
+
+    python -m harness.triggers --writers 1,8,32 --duration 10
+    python -m harness.triggers --tiers smoke,10k,100k --seed --workloads update
+
+Requires ``psycopg`` (v3): ``pip install "psycopg[binary]"``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from .seed import DEFAULT_DSN, _connect, live_columns
+from .stats import summarize
+
+TAG = "TRIGBENCH"
+AUDIT_TRIGGER = "trg_order_audit"
+DEFAULT_WRITERS = (1, 8, 32)
+DEFAULT_DURATION_S = 10.0
+DEFAULT_ROWS_PER_WRITER = 20
+MONITOR_INTERVAL_S = 0.05
+# Filled by the database or its triggers; never copied from the template row.
+_SKIP_COLUMNS = {"id", "protocol", "created_at", "updated_at"}
+
+
+@dataclass
+class StageResult:
+    tier: str
+    workload: str
+    audit: bool
+    protocol: Optional[str]
+    writers: int
+    ops: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+    latency: Dict[str, float] = field(default_factory=dict)
+    # Lock-waiting writers per monitor sample, and waits by wait_event.
+    lock_waiting: Dict[str, float] = field(default_factory=dict)
+    lock_events: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return self.ops / self.seconds if self.seconds else 0.0
+
+    @property
+    def label(self) -> str:
+        parts = [self.workload, "audit on" if self.audit else "audit off"]
+        if self.protocol:
+            parts.append(f"protocol {self.protocol}")
+        return ", ".join(parts)
+
+    def format(self) -> str:
+        waiting = self.lock_waiting
+        line = (f"  {self.label:<38} {self.writers:>3} writers  {self.throughput:8.1f} ops/s  "
+                f"p50 {self.latency.get('p50', 0):6.2f}ms  p95 {self.latency.get('p95', 0):6.2f}ms  "
+                f"p99 {self.latency.get('p99', 0):6.2f}ms  lock-waiting mean {waiting.get('mean', 0):4.1f} "
+                f"max {waiting.get('max', 0):3.0f}")
+        if self.lock_events:
+            line += "  (" + ", ".join(f"{e} {n}" for e, n in sorted(self.lock_events.items())) + ")"
+        line += "".join(f"\n      ERROR {n}x {e}" for e, n in self.errors.items())
+        return line
+
+
+@dataclass
+class TierResult:
+    tier: str
+    order_rows: int
+    audit_trigger: bool
+    stages: List[StageResult] = field(default_factory=list)
+
+    def format(self) -> str:
+        lines = [f"tier {self.tier}: {self.order_rows:,} orders"
+                 + ("" if self.audit_trigger else f" ({AUDIT_TRIGGER} not found; audit on/off are the same)")]
+        lines += [s.format() for s in self.stages]
+        lines += overhead_lines(self.stages)
+        return "\n".join(lines)
+
+
+def overhead_lines(stages: Sequence[StageResult]) -> List[str]:
+    """Audit-on vs audit-off, and counter vs explicit protocol, per writer count."""
+    by_key = {(s.workload, s.audit, s.protocol, s.writers): s for s in stages}
+    lines = []
+    for (workload, audit, protocol, writers), on in sorted(by_key.items(), key=lambda kv: (kv[0][0], str(kv[0][2]), kv[0][3])):
+        if audit:
+            off = by_key.get((workload, False, protocol, writers))
+            if off and off.latency.get("p50") and off.throughput:
+                lines.append(f"  {AUDIT_TRIGGER} cost, {workload}{f' ({protocol})' if protocol else ''}, {writers} writers: "
+                             f"p50 {_change(on.latency['p50'], off.latency['p50'])}, "
+                             f"throughput {_change(on.throughput, off.throughput)}")
+        if protocol == "counter":
+            explicit = by_key.get((workload, audit, "explicit", writers))
+            if explicit and explicit.latency.get("p50") and explicit.throughput:
+                lines.append(f"  counter row cost, audit {'on' if audit else 'off'}, {writers} writers: "
+                             f"p50 {_change(on.latency['p50'], explicit.latency['p50'])}, "
+                             f"throughput {_change(on.throughput, explicit.throughput)}")
+    return lines
+
+
+def _change(value: float, base: float) -> str:
+    return f"{100 * (value - base) / base:+.0f}%"
+
+
+class Bench:
+    """One tier's stages on an open connection (used for setup and cleanup)."""
+
+    def __init__(self, conn, dsn: str, run: str):
+        self.conn = conn
+        self.dsn = dsn
+        self.run = run
+        columns = live_columns(conn, "orders")
+        self.columns = [c for c, info in columns.items()
+                        if c not in _SKIP_COLUMNS and not info["generated"]]
+        self.has_technician = "technician_id" in columns
+        self.template = conn.execute(
+            "SELECT id FROM public.orders WHERE client_name NOT LIKE %s LIMIT 1", (f"{TAG}-%",)
+        ).fetchone()
+        if self.template is None:
+            raise RuntimeError("orders is empty; seed a tier first (python -m harness.seed)")
+        # Values the column already holds are valid for its enum/CHECK.
+        self.statuses = [r[0] for r in conn.execute("SELECT DISTINCT status FROM public.orders WHERE status IS NOT NULL")]
+        if not self.statuses:
+            raise RuntimeError("no orders.status values to cycle through")
+        self.technicians = [str(r[0]) for r in conn.execute("SELECT id FROM public.technicians LIMIT 500")] \
+            if live_columns(conn, "technicians") else []
+        self.audit_trigger = conn.execute(
+            "SELECT 1 FROM pg_trigger WHERE tgrelid = 'public.orders'::regclass AND tgname = %s", (AUDIT_TRIGGER,)
+        ).fetchone() is not None
+        conn.commit()
+
+    def insert_sql(self, explicit_protocol: bool) -> str:
+        cols = [c for c in self.columns if c != "client_name"]
+        col_sql = ", ".join(f'"{c}"' for c in cols)
+        target = f'"client_name", {col_sql}' + (', "protocol"' if explicit_protocol else "")
+        source = f"%(name)s, {col_sql}" + (", %(protocol)s" if explicit_protocol else "")
+        return f"INSERT INTO public.orders ({target}) SELECT {source} FROM public.orders WHERE id = %(template)s RETURNING id"
+
+    def prepare(self, count: int) -> List[str]:
+        """Create ``count`` orders for the update workload."""
+        sql = self.insert_sql(explicit_protocol=False)
+        ids = [str(self.conn.execute(sql, {"name": f"{TAG}-{self.run}-u{i}", "template": self.template[0]}).fetchone()[0])
+               for i in range(count)]
+        self.conn.commit()
+        return ids
+
+    def cleanup(self) -> int:
+        deleted = self.conn.execute("DELETE FROM public.orders WHERE client_name LIKE %s", (f"{TAG}-{self.run}-%",)).rowcount
+        self.conn.commit()
+        return deleted
+
+    def set_audit(self, enabled: bool) -> None:
+        if self.audit_trigger:
+            self.conn.execute(f"ALTER TABLE public.orders {'ENABLE' if enabled else 'DISABLE'} TRIGGER {AUDIT_TRIGGER}")
+            self.conn.commit()
+
+    def stage(self, tier: str, workload: str, audit: bool, protocol: Optional[str], writers: int,
+              duration_s: float, rows: List[str]) -> StageResult:
+        result = StageResult(tier, workload, audit, protocol, writers)
+        app = f"{TAG.lower()}-{self.run}"
+        latencies: List[List[float]] = [[] for _ in range(writers)]
+        errors: Counter = Counter()
+        stop = threading.Event()
+        waiting: List[int] = []
+        events: Counter = Counter()
+        sql = self.insert_sql(explicit_protocol=protocol == "explicit")
+        clock: Dict[str, float] = {}
+
+        def go() -> None:
+            clock["start"] = time.perf_counter()
+            clock["deadline"] = clock["start"] + duration_s
+
+        # Connections are opened first; the clock starts when all are ready.
+        ready = threading.Barrier(writers + 1, action=go, timeout=60)
+
+        def writer(i: int) -> None:
+            rng = random.Random(i)
+            mine = rows[i::writers]
+            with _connect(self.dsn) as conn:
+                conn.autocommit = True
+                conn.execute(f"SET application_name = '{app}'")
+                if self.technicians:
+                    conn.execute("SELECT set_config('request.jwt.claim.sub', %s, false)", (self.technicians[i % len(self.technicians)],))
+                ready.wait()
+                for n in itertools.count():
+                    if time.perf_counter() >= clock["deadline"]:
+                        return
+                    start = time.perf_counter()
+                    try:
+                        if workload == "insert":
+                            conn.execute(sql, {"name": f"{TAG}-{self.run}-i{i}-{n}", "template": self.template[0],
+                                               "protocol": f"TB{self.run}{i:03d}{n:07d}"})
+                        elif n % 2 and self.has_technician and self.technicians:
+                            conn.execute("UPDATE public.orders SET technician_id = %s WHERE id = %s",
+                                         (rng.choice(self.technicians), mine[n % len(mine)]))
+                        else:
+                            conn.execute("UPDATE public.orders SET status = %s WHERE id = %s",
+                                         (self.statuses[n % len(self.statuses)], mine[n % len(mine)]))
+                    except Exception as exc:  # noqa: BLE001 - count failures, keep writing
+                        errors[type(exc).__name__ + ": " + str(exc).splitlines()[0][:120]] += 1
+                        continue
+                    latencies[i].append((time.perf_counter() - start) * 1000)
+
+        def monitor() -> None:
+            with _connect(self.dsn) as conn:
+                conn.autocommit = True
+                while not stop.is_set():
+                    rows_ = conn.execute(
+                        "SELECT wait_event FROM pg_stat_activity WHERE application_name = %s AND wait_event_type = 'Lock'", (app,)
+                    ).fetchall()
+                    waiting.append(len(rows_))
+                    events.update(r[0] for r in rows_)
+                    time.sleep(MONITOR_INTERVAL_S)
+
+        threads = [threading.Thread(target=writer, args=(i,), daemon=True) for i in range(writers)]
+        watcher = threading.Thread(target=monitor, daemon=True)
+        for t in threads:
+            t.start()
+        ready.wait()
+        watcher.start()
+        for t in threads:
+            t.join()
+        result.seconds = time.perf_counter() - clock["start"]
+        stop.set()
+        watcher.join()
+        flat = [ms for per in latencies for ms in per]
+        result.ops = len(flat)
+        result.latency = summarize(flat)
+        result.errors = dict(errors)
+        result.lock_waiting = summarize(waiting)
+        result.lock_events = dict(events)
+        return result
+
+
+def bench(dsn: str, tier: str, workloads: Sequence[str], audits: Sequence[bool], protocols: Sequence[str],
+          writer_counts: Sequence[int], duration_s: float, rows_per_writer: int = DEFAULT_ROWS_PER_WRITER) -> TierResult:
+    run = f"{int(time.time()) % 100000:05d}"
+    with _connect(dsn) as conn:
+        b = Bench(conn, dsn, run)
+        order_rows = conn.execute("SELECT count(*) FROM public.orders").fetchone()[0]
+        conn.commit()
+        result = TierResult(tier, order_rows, b.audit_trigger)
+        rows = b.prepare(max(writer_counts) * rows_per_writer) if "update" in workloads else []
+        try:
+            for workload in workloads:
+                for audit in audits:
+                    b.set_audit(audit)
+                    for protocol in (protocols if workload == "insert" else [None]):
+                        for writers in writer_counts:
+                            stage = b.stage(tier, workload, audit, protocol, writers, duration_s, rows)
+                            print(stage.format(), flush=True)
+                            result.stages.append(stage)
+        finally:
+            b.set_audit(True)
+            b.cleanup()
+    return result
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark orders writes with the audit trigger on and off, and protocol counter contention.")
+    parser.add_argument("--dsn", default=DEFAULT_DSN, help="Postgres DSN (default: $TESTSPRITE_PG_DSN or local Supabase)")
+    parser.add_argument("--tiers", default="current", help="comma-separated tier labels (default: current)")
+    parser.add_argument("--seed", action="store_true", help="truncate and seed each tier with harness.seed first")
+    parser.add_argument("--workloads", default="update,insert", help="update and/or insert (default: both)")
+    parser.add_argument("--audit", default="on,off", help=f"{AUDIT_TRIGGER} states to measure (default: on,off)")
+    parser.add_argument("--protocols", default="counter,explicit", help="insert protocol sources (default: counter,explicit)")
+    parser.add_argument("--writers", default=",".join(str(n) for n in DEFAULT_WRITERS), help="concurrent connections (default: 1,8,32)")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION_S, help="seconds per stage (default: 10)")
+    parser.add_argument("--json", help="write the results to this file")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    tiers = [t for t in args.tiers.split(",") if t]
+    if args.seed and "current" in tiers:
+        print("--seed needs --tiers from harness.seed.TIERS", file=sys.stderr)
+        return 2
+    workloads = [w for w in args.workloads.split(",") if w in ("update", "insert")]
+    audits = [a == "on" for a in args.audit.split(",") if a in ("on", "off")]
+    protocols = [p for p in args.protocols.split(",") if p in ("counter", "explicit")]
+    writers = [int(n) for n in args.writers.split(",") if n]
+    results = []
+    for tier in tiers:
+        if args.seed:
+            from .seed import seed
+
+            seed(args.dsn, tier, truncate=True)
+        results.append(bench(args.dsn, tier, workloads, audits, protocols, writers, args.duration))
+    for result in results:
+        print(result.format())
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump([asdict(r) for r in results], fh, indent=2)
+    errors = sum(sum(s.errors.values()) for r in results for s in r.stages)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())